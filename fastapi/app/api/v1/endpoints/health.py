@@ -1,19 +1,34 @@
 from fastapi import APIRouter, Request, Depends
+from fastapi.responses import JSONResponse
 from app.services.model_service import ModelRegistry, get_model_registry
 from app.services.mlflow_status import get_mlflow_status
 from app.services.mongo_status import get_mongo_status
+from app.services.health_prober import HealthProber, get_health_prober
+from app.services.startup import PreloadState, get_preload_state
 from app.core.config import settings
 
 router = APIRouter()
 
+# As rotas só mudam na inicialização: a busca por /metrics é refeita apenas se a lista mudar
+_metrics_route_cache = {}
+
+def _has_metrics_route(routes: list) -> bool:
+    key = (id(routes), len(routes))
+    if key not in _metrics_route_cache:
+        _metrics_route_cache.clear()
+        _metrics_route_cache[key] = any(route.path == "/metrics" for route in routes)
+    return _metrics_route_cache[key]
+
+
 @router.get("/health", tags=["Health Check"])
 async def health_check(
     request: Request,
     model_registry: ModelRegistry = Depends(get_model_registry),
     mlflow_ok: bool = Depends(get_mlflow_status),
     mongo_ok: bool = Depends(get_mongo_status),
+    prober: HealthProber = Depends(get_health_prober),
 ):
-    prometheus_ok = any(route.path == "/metrics" for route in request.app.routes)
+    prometheus_ok = _has_metrics_route(request.app.routes)
 
     return {
         "status": "ok",
@@ -21,5 +36,32 @@ async def health_check(
         "mlflow_tracking_uri": settings.MLFLOW_TRACKING_URI,
         "mlflow_reachable": mlflow_ok,
         "mongodb_reachable": mongo_ok,
-        "prometheus_metrics_available": prometheus_ok
+        "prometheus_metrics_available": prometheus_ok,
+        # Idade e latência da última checagem em segundo plano de cada dependência
+        "checks": prober.snapshot(),
     }
+
+
+@router.get("/health/live", tags=["Health Check"])
+async def liveness():
+    # Sem dependências externas: indica apenas que o processo está respondendo
+    return {"status": "alive"}
+
+
+@router.get("/health/ready", tags=["Health Check"])
+async def readiness(
+    model_registry: ModelRegistry = Depends(get_model_registry),
+    preload: PreloadState = Depends(get_preload_state),
+):
+    # Um modelo só entra no registro depois de aquecido: carregado == pronto
+    ready = model_registry.is_model_loaded()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "model_loaded": ready,
+            "model_uri": model_registry.get_model_uri() if ready else None,
+            "model_version": model_registry.get_model_version() if ready else None,
+            "preload": preload.to_dict(),
+        },
+    )
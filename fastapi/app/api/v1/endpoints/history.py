@@ -1,19 +1,197 @@
+import asyncio
+import datetime
+from typing import Optional
+import pyarrow as pa
 from fastapi import APIRouter, HTTPException, Query, Depends
-from app.services.history_service import HistoryService, get_history_service
-from app.schemas.history import HistoryResponse
+from fastapi.responses import StreamingResponse
+from app.services.history_service import (
+    HistoryService,
+    InvalidCursorError,
+    RollupsDisabledError,
+    get_history_service,
+    get_shadow_history_service,
+    history_export_rows,
+)
+from app.services.history_rollups import BUCKET_UNITS
+from app.services.model_service import get_model_registry
+from app.schemas.history import HistoryAnalyticsResponse, HistoryFilters, HistoryResponse
 from app.core.logger import logger
+from app.core.config import settings
+from app.utils import arrow_io, ndjson
 
 router = APIRouter()
 
+
+def get_history_filters(
+    model_name: Optional[str] = Query(None),
+    model_version: Optional[str] = Query(None),
+    start: Optional[datetime.datetime] = Query(None, description="Início (inclusivo) do intervalo de timestamp"),
+    end: Optional[datetime.datetime] = Query(None, description="Fim (exclusivo) do intervalo de timestamp"),
+) -> HistoryFilters:
+    return HistoryFilters(model_name=model_name, model_version=model_version, start=start, end=end)
+
+
 @router.get("/history", response_model=HistoryResponse, summary="Retorna histórico de predições com paginação")
 async def get_history(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Token opaco retornado em next_cursor"),
+    exact_count: bool = Query(False, description="Conta exatamente os documentos (mais lento)"),
+    filters: HistoryFilters = Depends(get_history_filters),
     history_service: HistoryService = Depends(get_history_service),
 ):
     try:
-        items, total = await history_service.list(skip=skip, limit=limit)
-        return HistoryResponse(total=total, skip=skip, limit=limit, items=items)
+        items, total, next_cursor = await history_service.list(
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+            filters=filters,
+            exact_count=exact_count,
+        )
+        return HistoryResponse(total=total, skip=skip, limit=limit, items=items, next_cursor=next_cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Erro ao buscar histórico: {e}")
         raise HTTPException(status_code=500, detail="Erro interno ao buscar histórico")
+
+
+@router.get("/history/shadow", response_model=HistoryResponse,
+            summary="Retorna as predições do modelo em sombra, com a saída do modelo principal em shadow_of")
+async def get_shadow_history(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Token opaco retornado em next_cursor"),
+    exact_count: bool = Query(False, description="Conta exatamente os documentos (mais lento)"),
+    filters: HistoryFilters = Depends(get_history_filters),
+    history_service: HistoryService = Depends(get_shadow_history_service),
+):
+    return await get_history(skip, limit, cursor, exact_count, filters, history_service)
+
+
+async def _export_ndjson(batches):
+    exported = 0
+    try:
+        async for batch in batches:
+            exported += len(batch)
+            yield b"".join(ndjson.dumps_line(item) for item in batch)
+    except Exception as e:
+        logger.error(f"Erro na exportação do histórico após {exported} documentos: {str(e)}")
+        yield ndjson.dumps_line({"error": str(e), "exported": exported})
+        return
+    logger.info(f"Exportação do histórico concluída: {exported} documentos.")
+
+
+# Metadados de history_export_rows que podem vir nulos (timestamp e row_index nunca vêm)
+_EXPORT_METADATA_SCHEMA = pa.schema([
+    ("model_name", pa.string()),
+    ("model_version", pa.string()),
+    ("model_alias", pa.string()),
+])
+
+
+def _export_schema(filters: HistoryFilters) -> pa.Schema:
+    # Tipos das colunas de entrada vêm da assinatura dos modelos carregados, não do primeiro lote
+    input_schemas = get_model_registry().input_schemas(filters.model_name, filters.model_version)
+    inputs = arrow_io.schema_from_signatures(input_schemas)
+    fields = [field for field in inputs if field.name not in _EXPORT_METADATA_SCHEMA.names]
+    return pa.schema(fields + list(_EXPORT_METADATA_SCHEMA))
+
+
+async def _export_parquet(batches, schema: pa.Schema = None):
+    # Cada lote vira um row group; sem o rodapé, um arquivo interrompido é inválido
+    writer = arrow_io.ParquetStreamWriter(schema, max_pending_rows=settings.HISTORY_EXPORT_PARQUET_MAX_PENDING_ROWS)
+    exported = 0
+    try:
+        async for batch in batches:
+            exported += len(batch)
+            data = await asyncio.to_thread(writer.write, history_export_rows(batch))
+            if data:
+                yield data
+        yield await asyncio.to_thread(writer.close)
+    except Exception as e:
+        logger.error(f"Erro na exportação do histórico após {exported} documentos: {str(e)}")
+        # Parquet não tem como sinalizar o erro no corpo: a exceção aborta a conexão sem
+        # o fim do chunked encoding, e o cliente vê um download incompleto, nunca um 200 completo
+        raise
+    logger.info(f"Exportação do histórico concluída: {exported} documentos.")
+
+
+async def _prime(stream):
+    # Gera a primeira parte antes de responder: um erro logo no início ainda vira HTTP 500
+    try:
+        first = await stream.__anext__()
+    except StopAsyncIteration:
+        first = b""
+
+    async def chained():
+        yield first
+        async for data in stream:
+            yield data
+
+    return chained()
+
+
+@router.get("/history/export",
+            summary="Exporta o histórico filtrado em streaming (NDJSON ou Parquet)",
+            response_description="NDJSON com um documento do histórico por linha, ou Parquet com um registro predito por linha")
+async def export_history(
+    export_format: str = Query("ndjson", alias="format", pattern="^(ndjson|parquet)$"),
+    batch_size: Optional[int] = Query(None, ge=1, le=50000, description="Documentos lidos do MongoDB por lote"),
+    limit: Optional[int] = Query(None, ge=1, description="Máximo de documentos exportados"),
+    filters: HistoryFilters = Depends(get_history_filters),
+    history_service: HistoryService = Depends(get_history_service),
+):
+    batches = history_service.export(
+        filters=filters,
+        batch_size=batch_size or settings.HISTORY_EXPORT_BATCH_SIZE,
+        limit=limit,
+    )
+    if export_format == "parquet":
+        try:
+            stream = await _prime(_export_parquet(batches, _export_schema(filters)))
+        except Exception:
+            raise HTTPException(status_code=500, detail="Erro interno ao exportar histórico")
+        return StreamingResponse(
+            stream,
+            media_type=arrow_io.PARQUET_MEDIA_TYPES[0],
+            headers={"Content-Disposition": 'attachment; filename="history.parquet"'},
+        )
+    return StreamingResponse(_export_ndjson(batches), media_type=ndjson.NDJSON_MEDIA_TYPE)
+
+
+@router.get("/history/analytics", response_model=HistoryAnalyticsResponse,
+            summary="Volume, histograma e score médio das predições por modelo, versão e janela de tempo")
+async def get_history_analytics(
+    bucket: str = Query("hour", pattern=f"^({'|'.join(BUCKET_UNITS)})$", description="Tamanho da janela de tempo"),
+    filters: HistoryFilters = Depends(get_history_filters),
+    history_service: HistoryService = Depends(get_history_service),
+):
+    try:
+        items = await history_service.analytics(filters=filters, unit=bucket)
+        return HistoryAnalyticsResponse(
+            bucket=bucket,
+            histogram_edges=history_service.rollups.histogram_edges,
+            items=items,
+        )
+    except RollupsDisabledError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro ao consultar analytics do histórico: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno ao consultar analytics do histórico")
+
+
+@router.post("/history/analytics/backfill",
+             summary="Recalcula os rollups do histórico a partir dos documentos gravados")
+async def backfill_history_analytics(
+    filters: HistoryFilters = Depends(get_history_filters),
+    history_service: HistoryService = Depends(get_history_service),
+):
+    try:
+        await history_service.backfill_rollups(filters=filters)
+        return {"status": "ok"}
+    except RollupsDisabledError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.error(f"Erro no backfill dos rollups do histórico: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno no backfill dos rollups do histórico")
@@ -1,5 +1,8 @@
-from fastapi import APIRouter, HTTPException
-from app.services.model_service import ModelRegistry
+from fastapi import APIRouter, HTTPException, Query
+from fastapi import Depends
+from fastapi.responses import JSONResponse
+from app.services.model_service import ModelRegistry, get_model_registry
+from app.services.load_jobs import LoadJobManager, JOB_FAILED, get_load_job_manager
 from app.schemas.load import LoadModelRequest
 from app.core.logger import logger
 
@@ -7,22 +10,62 @@ router = APIRouter()
 
 @router.post("/load",
          summary="Carrega um modelo via MLflow",
-         response_description="Status do carregamento"
+         response_description="Job de carregamento (ou o resultado, com wait=true)"
          )
-def load(request: LoadModelRequest):
-    model_registry = ModelRegistry()
+async def load(
+    request: LoadModelRequest,
+    wait: bool = Query(False, description="Aguarda o fim do carregamento antes de responder"),
+    load_jobs: LoadJobManager = Depends(get_load_job_manager),
+):
     try:
         request.validate_choice()
-        logger.info(f"Requisição para carregar modelo: {request.dict()}")
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-        result = model_registry.load_model(
-            model_name=request.model_name,
-            alias=request.alias,
-            version=request.version
+    logger.info(f"Requisição para carregar modelo: {request.dict()}")
+    job = load_jobs.submit(
+        model_name=request.model_name,
+        alias=request.alias,
+        version=request.version,
+        shadow=request.shadow,
+    )
+
+    if not wait:
+        return JSONResponse(
+            status_code=202,
+            content={**job.to_dict(), "status_url": f"/v1/load/{job.job_id}"},
         )
 
-        return result
+    await load_jobs.wait(job)
+    if job.status == JOB_FAILED:
+        logger.error(f"Erro ao tentar carregar modelo: {job.error}")
+        raise HTTPException(status_code=500, detail=job.error)
+    return job.result
+
+
+@router.get("/load/{job_id}",
+            summary="Consulta o status de um job de carregamento",
+            response_description="Status do job")
+async def load_status(job_id: str, load_jobs: LoadJobManager = Depends(get_load_job_manager)):
+    job = load_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job de carregamento '{job_id}' não encontrado.")
+    return job.to_dict()
+
+
+@router.delete("/shadow",
+               summary="Desliga a inferência em sombra",
+               response_description="Modelo que estava em sombra (continua carregado)")
+def clear_shadow(model_registry: ModelRegistry = Depends(get_model_registry)):
+    shadow = model_registry.clear_shadow()
+    if shadow is None:
+        raise HTTPException(status_code=404, detail="Nenhum modelo em sombra.")
+    logger.info(f"Inferência em sombra de {shadow.key} desligada.")
+    return {"shadow": shadow.describe()}
+
 
-    except Exception as e:
-        logger.error(f"Erro ao tentar carregar modelo: {str(e)}")
-        raise HTTPException(status_code=500, detail=str(e))
+@router.get("/models",
+            summary="Lista os modelos carregados em memória",
+            response_description="Modelos carregados, do mais ao menos recentemente usado")
+def list_models(model_registry: ModelRegistry = Depends(get_model_registry)):
+    return {"models": model_registry.list_models()}
@@ -1,34 +1,199 @@
-from fastapi import APIRouter, HTTPException
+from typing import Optional
+from fastapi import APIRouter, Header, HTTPException, Query, Request, Response
 from app.schemas.predict import PredictRequest, PredictResponse
 from fastapi import Depends
 from app.services.model_service import ModelRegistry, get_model_registry
-from app.core.logger import logger
+from app.services.scheduler import QueueFullError, DeadlineExceededError, set_request_deadline
+from app.core.logger import logger, hot_logger
+from app.core.config import settings
+from app.utils import arrow_io, ndjson
+from app.utils.fast_json import FastJSONResponse, parse_predict_inputs
 
 router = APIRouter()
 
+
+class ModelSelector:
+    # Parâmetros opcionais para rotear a predição a um modelo específico do registro
+    def __init__(
+        self,
+        model_name: Optional[str] = Query(None, description="Nome do modelo (padrão: último carregado)"),
+        model_version: Optional[str] = Query(None, description="Versão do modelo"),
+        model_alias: Optional[str] = Query(None, description="Alias usado no carregamento"),
+    ):
+        self.model_name = model_name
+        self.version = model_version
+        self.alias = model_alias
+
+    def as_kwargs(self) -> dict:
+        return {"model_name": self.model_name, "version": self.version, "alias": self.alias}
+
+
+async def request_deadline(
+    x_request_deadline_ms: Optional[float] = Header(None, description="Tempo máximo (ms) que o cliente aguarda a predição"),
+):
+    # Dependência async: o contextvar é definido na mesma task que executa a rota
+    set_request_deadline(x_request_deadline_ms)
+
+
 @router.post("/predict",
              summary="Realiza predição com o modelo carregado",
              response_description="Resultado da predição",
-             response_model=PredictResponse)
+             response_model=PredictResponse,
+             response_class=FastJSONResponse,
+             dependencies=[Depends(request_deadline)],
+             openapi_extra={
+                 "requestBody": {
+                     "required": True,
+                     "content": {"application/json": {"schema": PredictRequest.schema()}},
+                 }
+             })
 async def predict_route(
-    request: PredictRequest,
+    request: Request,
+    selector: ModelSelector = Depends(),
     model_registry: ModelRegistry = Depends(get_model_registry),
 ):
 
-    if not model_registry.is_model_loaded():
-        logger.warning("Requisição de predição sem modelo carregado.")
+    if not model_registry.is_model_loaded(**selector.as_kwargs()):
+        hot_logger.warning("Requisição de predição sem modelo carregado.")
         raise HTTPException(status_code=503, detail="Modelo não carregado. Use /load.")
 
+    # Corpo lido e decodificado uma única vez, sem o modelo pydantic genérico por linha
+    inputs = parse_predict_inputs(await request.body())
+
     try:
-        inputs = request.dict()["inputs"]
-        predictions = await model_registry.predict(inputs)  # Note o await aqui
-        logger.info(f"Predição realizada para {len(inputs)} registros.")
-        return PredictResponse(predictions=predictions)
+        predictions = await model_registry.predict(inputs, **selector.as_kwargs())  # Note o await aqui
+        hot_logger.info("Predição realizada para {} registros.", len(inputs))
+        return FastJSONResponse({"predictions": predictions})
+
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=503, detail=str(e))
 
     except ValueError as ve:
-        logger.warning(f"Erro de validação de dados: {str(ve)}")
+        hot_logger.warning("Erro de validação de dados: {}", ve)
         raise HTTPException(status_code=422, detail=str(ve))
 
     except Exception as e:
         logger.error(f"Erro interno na predição: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Erro interno: {e}")
+
+
+@router.get("/predict/schema",
+            summary="JSON Schema da requisição de predição, gerado a partir da assinatura do modelo",
+            response_description="Schema com os tipos de cada coluna esperada pelo modelo")
+def predict_schema_route(
+    selector: ModelSelector = Depends(),
+    model_registry: ModelRegistry = Depends(get_model_registry),
+):
+    if not model_registry.is_model_loaded(**selector.as_kwargs()):
+        raise HTTPException(status_code=503, detail="Modelo não carregado. Use /load.")
+
+    loaded = model_registry.resolve(**selector.as_kwargs())
+    if loaded.request_model is None:
+        raise HTTPException(status_code=404, detail="Modelo carregado sem assinatura de entrada.")
+    return loaded.request_model.schema()
+
+
+_binary_body = {"schema": {"type": "string", "format": "binary"}}
+
+@router.post("/predict/arrow",
+             summary="Realiza predição a partir de um corpo Arrow IPC (stream) ou Parquet",
+             response_description="Resultado da predição em JSON ou Arrow IPC (via Accept)",
+             response_model=PredictResponse,
+             dependencies=[Depends(request_deadline)],
+             openapi_extra={
+                 "requestBody": {
+                     "required": True,
+                     "content": {media_type: _binary_body for media_type in arrow_io.SUPPORTED_MEDIA_TYPES},
+                 }
+             })
+async def predict_arrow_route(
+    request: Request,
+    selector: ModelSelector = Depends(),
+    model_registry: ModelRegistry = Depends(get_model_registry),
+):
+
+    if not model_registry.is_model_loaded(**selector.as_kwargs()):
+        hot_logger.warning("Requisição de predição sem modelo carregado.")
+        raise HTTPException(status_code=503, detail="Modelo não carregado. Use /load.")
+
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if media_type not in arrow_io.SUPPORTED_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=415,
+            detail=f"Content-Type deve ser um de: {', '.join(arrow_io.SUPPORTED_MEDIA_TYPES)}",
+        )
+
+    try:
+        df = arrow_io.read_frame(await request.body(), media_type)
+    except Exception as e:
+        logger.warning(f"Corpo Arrow/Parquet inválido: {str(e)}")
+        raise HTTPException(status_code=400, detail=f"Corpo Arrow/Parquet inválido: {e}")
+
+    try:
+        predictions = await model_registry.predict_frame(df, **selector.as_kwargs())
+        hot_logger.info("Predição (Arrow) realizada para {} registros.", len(df))
+
+        if arrow_io.ARROW_STREAM_MEDIA_TYPE in request.headers.get("accept", ""):
+            return Response(
+                content=arrow_io.predictions_to_ipc(predictions),
+                media_type=arrow_io.ARROW_STREAM_MEDIA_TYPE,
+            )
+        return FastJSONResponse({"predictions": predictions})
+
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    except ValueError as ve:
+        hot_logger.warning("Erro de validação de dados: {}", ve)
+        raise HTTPException(status_code=422, detail=str(ve))
+
+    except Exception as e:
+        logger.error(f"Erro interno na predição: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro interno: {e}")
+
+
+@router.post("/predict/stream",
+             summary="Predição em massa via NDJSON (uma linha JSON por registro), com resposta em streaming",
+             response_description="Uma linha NDJSON por registro: {\"prediction\": ...}; em caso de falha, uma linha {\"error\": ...}",
+             openapi_extra={
+                 "requestBody": {
+                     "required": True,
+                     "content": {ndjson.NDJSON_MEDIA_TYPE: {"schema": {"type": "string"}}},
+                 }
+             })
+async def predict_stream_route(
+    request: Request,
+    selector: ModelSelector = Depends(),
+    chunk_rows: Optional[int] = Query(None, ge=1, le=100000, description="Registros por lote de inferência"),
+    model_registry: ModelRegistry = Depends(get_model_registry),
+):
+
+    if not model_registry.is_model_loaded(**selector.as_kwargs()):
+        hot_logger.warning("Requisição de predição sem modelo carregado.")
+        raise HTTPException(status_code=503, detail="Modelo não carregado. Use /load.")
+
+    chunk_rows = chunk_rows or settings.PREDICT_STREAM_CHUNK_ROWS
+
+    async def predictions():
+        # Lê, prediz e responde um lote por vez: a memória fica limitada ao tamanho do lote
+        total = 0
+        rows = ndjson.iter_ndjson(request.stream(), max_line_bytes=settings.PREDICT_STREAM_MAX_LINE_BYTES)
+        try:
+            async for chunk in ndjson.iter_chunks(rows, chunk_rows):
+                preds = await model_registry.predict(chunk, **selector.as_kwargs())
+                total += len(chunk)
+                yield b"".join(ndjson.dumps_line({"prediction": p}) for p in preds)
+        except Exception as e:
+            logger.error(f"Erro na predição em streaming após {total} registros: {str(e)}")
+            yield ndjson.dumps_line({"error": str(e), "processed": total})
+            return
+
+        logger.info(f"Predição em streaming concluída para {total} registros.")
+
+    return ndjson.DuplexStreamingResponse(predictions(), media_type=ndjson.NDJSON_MEDIA_TYPE)
@@ -0,0 +1,176 @@
+"""
+Pontuação offline (sem HTTP) de arquivos CSV/Parquet com o modelo do MLflow.
+
+Uso (a partir de fastapi/):
+    python -m app.batch_score ../Notebooks/data/train.csv saida/ --model-name titanic --alias champion \\
+        --chunk-rows 50000 --workers 4 --id-column PassengerId
+
+Cada lote vira um arquivo `part-NNNNNN.parquet` em `saida/`, com as predições
+e a versão do modelo. Rodar de novo com os mesmos parâmetros retoma de onde
+parou: lotes já gravados são pulados.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from time import perf_counter
+from typing import Iterator, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.core.logger import logger
+from app.services.model_service import ModelRegistry
+from app.utils import preprocessor, postprocessor
+
+MANIFEST_FILE = "_manifest.json"
+
+
+def part_path(output_dir: str, index: int) -> str:
+    return os.path.join(output_dir, f"part-{index:06d}.parquet")
+
+
+def read_chunks(path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    if path.endswith(".parquet"):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+def resolve_version(model_name: str, alias: Optional[str], version: Optional[str]) -> str:
+    # Fixa a versão antes de começar: todos os processos usam o mesmo modelo,
+    # mesmo que o alias mude no meio da execução
+    if version:
+        return str(version)
+    return ModelRegistry().get_version_for_alias(model_name, alias)
+
+
+def check_manifest(output_dir: str, manifest: dict):
+    path = os.path.join(output_dir, MANIFEST_FILE)
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            previous = json.load(f)
+        if previous != manifest:
+            raise SystemExit(
+                f"{output_dir} contém uma execução com parâmetros diferentes ({previous}); "
+                "use outro diretório para não misturar resultados."
+            )
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+
+
+def init_worker(model_name: str, version: str):
+    ModelRegistry().load_model(model_name=model_name, version=version)
+
+
+def score_chunk(index: int, start_row: int, df: pd.DataFrame, output_dir: str, id_column: Optional[str]) -> int:
+    loaded = ModelRegistry().resolve()
+    df_pre = preprocessor.preprocess(df)
+    preds = postprocessor.postprocess(loaded.model.predict(df_pre))
+
+    columns = {"row_index": pa.array(range(start_row, start_row + len(df)), pa.int64())}
+    if id_column:
+        columns[id_column] = pa.array(df[id_column])
+    columns["prediction"] = pa.array(preds)
+    columns["model_version"] = pa.array([loaded.model_version] * len(df), pa.string())
+    table = pa.table(columns).replace_schema_metadata({
+        "model_name": loaded.model_name,
+        "model_version": loaded.model_version,
+    })
+
+    # Escreve em arquivo temporário e renomeia: um part existente está sempre completo
+    final_path = part_path(output_dir, index)
+    tmp_path = f"{final_path}.tmp"
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, final_path)
+    return len(df)
+
+
+def run(args) -> dict:
+    version = resolve_version(args.model_name, args.alias, args.version)
+    os.makedirs(args.output_dir, exist_ok=True)
+    check_manifest(args.output_dir, {
+        "input": os.path.abspath(args.input),
+        "chunk_rows": args.chunk_rows,
+        "model_name": args.model_name,
+        "model_version": version,
+    })
+
+    start = perf_counter()
+    scored = skipped = 0
+
+    if args.workers > 1:
+        pool = ProcessPoolExecutor(
+            max_workers=args.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(args.model_name, version),
+        )
+    else:
+        pool = None
+        init_worker(args.model_name, version)
+
+    pending = set()
+    try:
+        start_row = 0
+        for index, df in enumerate(read_chunks(args.input, args.chunk_rows)):
+            chunk_start, start_row = start_row, start_row + len(df)
+            if os.path.exists(part_path(args.output_dir, index)):
+                skipped += len(df)
+                continue
+
+            if pool is None:
+                scored += score_chunk(index, chunk_start, df, args.output_dir, args.id_column)
+                continue
+
+            # Limita lotes em voo para manter a memória constante
+            if len(pending) >= args.workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                scored += sum(f.result() for f in done)
+            pending.add(pool.submit(score_chunk, index, chunk_start, df, args.output_dir, args.id_column))
+
+        scored += sum(f.result() for f in wait(pending).done)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    elapsed = perf_counter() - start
+    report = {
+        "model_name": args.model_name,
+        "model_version": version,
+        "rows_scored": scored,
+        "rows_skipped": skipped,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(scored / elapsed, 1) if elapsed else None,
+    }
+    logger.info(f"Pontuação concluída: {report}")
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Arquivo CSV ou Parquet de entrada")
+    parser.add_argument("output_dir", help="Diretório de saída dos arquivos Parquet")
+    parser.add_argument("--model-name", required=True)
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--alias")
+    group.add_argument("--version")
+    parser.add_argument("--chunk-rows", type=int, default=50000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--id-column", help="Coluna da entrada copiada para a saída (ex.: PassengerId)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    report = run(parse_args(argv))
+    json.dump(report, sys.stdout)
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
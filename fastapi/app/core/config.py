@@ -8,6 +8,116 @@ class Settings(BaseSettings):
     MONGODB_HISTORY_COLLECTION: str
     MLFLOW_MODEL_ALIAS: str = "champion"
 
+    # Logs: escrita assíncrona (enqueue), JSON opcional e amostragem do caminho crítico
+    LOG_FILE: str = "/var/log/fastapi.log"
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = False
+    LOG_ENQUEUE: bool = True
+    LOG_STDOUT: bool = False
+    HOT_PATH_LOG_SAMPLE_RATE: float = 1.0
+    HOT_PATH_LOG_MAX_PER_SECOND: int = 0
+
+    # Registro multi-modelo: orçamento de memória (MB) para os modelos carregados (0 = sem limite)
+    MODEL_MEMORY_BUDGET_MB: int = 2048
+
+    # Cache local dos artefatos de modelo baixados do MLflow
+    MODEL_CACHE_ENABLED: bool = True
+    MODEL_CACHE_DIR: str = "/var/cache/model_artifacts"
+    MODEL_CACHE_MAX_MB: int = 5120
+    MODEL_CACHE_VERIFY_CHECKSUM: bool = False
+
+    # Pré-carregamento do modelo MLFLOW_MODEL_NAME@MLFLOW_MODEL_ALIAS na subida da API
+    MODEL_PRELOAD_ON_STARTUP: bool = True
+    MODEL_PRELOAD_MAX_BACKOFF_SECONDS: float = 60.0
+
+    # Aquecimento (inferência de teste) antes de expor um modelo recém-carregado
+    MODEL_WARMUP_ENABLED: bool = True
+    MODEL_WARMUP_ROWS: int = 1
+    MODEL_WARMUP_RUNS: int = 1
+
+    # Cache de predições por linha (opt-in)
+    PREDICTION_CACHE_ENABLED: bool = False
+    PREDICTION_CACHE_MAX_ENTRIES: int = 100000
+    PREDICTION_CACHE_TTL_SECONDS: float = 300.0
+
+    # Backend de inferência: "thread" (padrão) ou "process" (pool de processos)
+    INFERENCE_BACKEND: str = "thread"
+    INFERENCE_PROCESS_WORKERS: int = 0
+    INFERENCE_PROCESS_MAX_MODELS: int = 2
+    INFERENCE_PROCESS_PRELOAD_TIMEOUT_SECONDS: float = 60.0
+
+    # Controle de admissão da inferência (0 = mesmo padrão do ThreadPoolExecutor)
+    INFERENCE_MAX_CONCURRENCY: int = 0
+    INFERENCE_MAX_QUEUE: int = 64
+    INFERENCE_DEFAULT_DEADLINE_MS: float = 0.0
+
+    # Checagens de saúde em segundo plano (MLflow, MongoDB)
+    HEALTH_PROBE_INTERVAL_SECONDS: float = 10.0
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 2.0
+
+    # Predição em streaming (NDJSON): registros por lote de inferência
+    PREDICT_STREAM_CHUNK_ROWS: int = 1000
+    PREDICT_STREAM_MAX_LINE_BYTES: int = 1024 * 1024
+
+    # Header Server-Timing com a duração de cada etapa da predição
+    SERVER_TIMING_ENABLED: bool = False
+
+    # Drift das features de entrada (perfil de referência em CSV, Parquet ou JSON)
+    DRIFT_ENABLED: bool = False
+    DRIFT_REFERENCE_PATH: str = "app/resources/drift_reference.json"
+    DRIFT_NUMERIC_BINS: int = 10
+    DRIFT_MAX_CATEGORIES: int = 20
+    DRIFT_WINDOW_ROWS: int = 10000
+    DRIFT_MIN_ROWS: int = 100
+    DRIFT_QUEUE_SIZE: int = 256
+
+    # Inferência em sombra do modelo challenger (carregado com shadow=true em /v1/load)
+    SHADOW_SAMPLE_RATE: float = 1.0
+    SHADOW_MAX_CONCURRENCY: int = 1
+    SHADOW_TIMEOUT_SECONDS: float = 5.0
+    SHADOW_HISTORY_COLLECTION: str = ""  # padrão: <MONGODB_HISTORY_COLLECTION>_shadow
+
+    # Micro-batching de inferência (opt-in)
+    PREDICT_BATCHING_ENABLED: bool = False
+    PREDICT_BATCH_MAX_ROWS: int = 256
+    PREDICT_BATCH_WINDOW_MS: float = 5.0
+
+    # Escrita assíncrona do histórico (fila em memória + insert_many)
+    HISTORY_WRITER_ENABLED: bool = True
+    HISTORY_WRITER_MAX_QUEUE: int = 10000
+    HISTORY_WRITER_BATCH_SIZE: int = 500
+    HISTORY_WRITER_FLUSH_INTERVAL_SECONDS: float = 1.0
+    HISTORY_WRITER_BACKPRESSURE: str = "drop"  # drop | block | spill
+    HISTORY_WRITER_SPILL_PATH: str = "/tmp/history_spill.ndjson"
+    HISTORY_WRITER_SHUTDOWN_TIMEOUT_SECONDS: float = 10.0
+
+    # Armazenamento do histórico
+    HISTORY_STORAGE_FORMAT: str = "document"  # document | columnar
+    HISTORY_COMPRESSION: str = "none"  # none | zlib (apenas no formato columnar)
+    HISTORY_COMPRESSION_LEVEL: int = 6
+    HISTORY_TTL_DAYS: float = 0  # 0 = sem expiração
+    HISTORY_TIMESERIES: bool = False  # só vale para collections novas
+
+    # Rollups do histórico (agregados por modelo, versão e janela de tempo)
+    HISTORY_ROLLUPS_ENABLED: bool = True
+    HISTORY_ROLLUP_COLLECTION: str = ""  # padrão: <MONGODB_HISTORY_COLLECTION>_rollups
+    HISTORY_ROLLUP_BUCKET_MINUTES: int = 60
+    HISTORY_ROLLUP_HISTOGRAM_BINS: int = 10
+    HISTORY_ROLLUP_HISTOGRAM_MIN: float = 0.0
+    HISTORY_ROLLUP_HISTOGRAM_MAX: float = 1.0
+    HISTORY_ROLLUP_FLUSH_INTERVAL_SECONDS: float = 5.0
+
+    # Listagem do histórico
+    HISTORY_COUNT_CACHE_TTL_SECONDS: float = 30.0
+    # Buffer em memória com o histórico mais recente (0 = desligado)
+    HISTORY_BUFFER_MAX_ITEMS: int = 1000
+    HISTORY_BUFFER_MAX_ROWS: int = 50000
+    # Busca no MongoDB, a cada N s, o que outros workers gravaram (0 = só este processo grava)
+    HISTORY_BUFFER_REFRESH_SECONDS: float = 1.0
+    HISTORY_BUFFER_REFRESH_LAG_SECONDS: float = 5.0
+    HISTORY_EXPORT_BATCH_SIZE: int = 1000
+    # Parquet: linhas retidas até o tipo de toda coluna ser conhecido
+    HISTORY_EXPORT_PARQUET_MAX_PENDING_ROWS: int = 50000
 
     class Config:
         env_file = ".env"
@@ -1,16 +1,91 @@
+import random
+import sys
+import threading
+from contextvars import ContextVar
+from time import monotonic
+
 from loguru import logger
-import os
 
-LOG_FILE = "/var/log/fastapi.log"  
+from app.core.config import settings
+
+# Id de correlação da requisição atual, preenchido pelo CorrelationIdMiddleware
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+LOG_FORMAT = "{time:YYYY-MM-DD at HH:mm:ss} | {level} | {message} | request_id={extra[request_id]}"
+
+
+def _add_request_id(record):
+    record["extra"].setdefault("request_id", request_id_var.get())
+
 
 # Remove handler padrão
 logger.remove()
+logger.configure(patcher=_add_request_id)
 
-# Adiciona novo handler com rotação
+# Adiciona novo handler com rotação. enqueue=True: a escrita em disco acontece
+# em uma thread própria, fora do event loop; serialize=True grava JSON estruturado
 logger.add(
-    LOG_FILE,
+    settings.LOG_FILE,
     rotation="10 MB",
     retention="7 days",
-    format="{time:YYYY-MM-DD at HH:mm:ss} | {level} | {message}",
-    level="INFO"
-)
\ No newline at end of file
+    format=LOG_FORMAT,
+    level=settings.LOG_LEVEL,
+    enqueue=settings.LOG_ENQUEUE,
+    serialize=settings.LOG_JSON,
+)
+if settings.LOG_STDOUT:
+    logger.add(sys.stdout, format=LOG_FORMAT, level=settings.LOG_LEVEL,
+               enqueue=settings.LOG_ENQUEUE, serialize=settings.LOG_JSON)
+
+
+class HotPathLogger:
+    """
+    Logs do caminho crítico (por requisição), com amostragem e limite por segundo.
+
+    As mensagens usam o formato preguiçoso do loguru (`"... {}", valor`): a
+    string só é montada se o nível estiver habilitado e a mensagem passar pela
+    amostragem. Erros não devem passar por aqui.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, max_per_second: int = 0):
+        self.sample_rate = sample_rate
+        self.max_per_second = max_per_second
+        self.dropped = 0
+        self._window = 0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _allowed(self) -> bool:
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        if not self.max_per_second:
+            return True
+        with self._lock:
+            window = int(monotonic())
+            if window != self._window:
+                if self.dropped:
+                    logger.info("{} logs do caminho crítico suprimidos no último intervalo.", self.dropped)
+                self._window, self._count, self.dropped = window, 0, 0
+            if self._count >= self.max_per_second:
+                self.dropped += 1
+                return False
+            self._count += 1
+            return True
+
+    def debug(self, message: str, *args, **kwargs):
+        if self._allowed():
+            logger.opt(depth=1).debug(message, *args, **kwargs)
+
+    def info(self, message: str, *args, **kwargs):
+        if self._allowed():
+            logger.opt(depth=1).info(message, *args, **kwargs)
+
+    def warning(self, message: str, *args, **kwargs):
+        if self._allowed():
+            logger.opt(depth=1).warning(message, *args, **kwargs)
+
+
+hot_logger = HotPathLogger(
+    sample_rate=settings.HOT_PATH_LOG_SAMPLE_RATE,
+    max_per_second=settings.HOT_PATH_LOG_MAX_PER_SECOND,
+)
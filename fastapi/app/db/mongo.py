@@ -3,4 +3,6 @@ from app.core.config import settings
 
 client = AsyncIOMotorClient(settings.MONGO_URI)
 db = client[settings.MONGO_DB_NAME]
-history_collection = db[settings.MONGODB_HISTORY_COLLECTION]
\ No newline at end of file
+history_collection = db[settings.MONGODB_HISTORY_COLLECTION]
+shadow_history_collection = db[settings.SHADOW_HISTORY_COLLECTION or f"{settings.MONGODB_HISTORY_COLLECTION}_shadow"]
+history_rollup_collection = db[settings.HISTORY_ROLLUP_COLLECTION or f"{settings.MONGODB_HISTORY_COLLECTION}_rollups"]
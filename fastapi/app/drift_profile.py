@@ -0,0 +1,44 @@
+"""
+Gera o perfil de referência usado pelo monitor de drift (DRIFT_REFERENCE_PATH).
+
+Uso (a partir de fastapi/):
+    python -m app.drift_profile ../Notebooks/data/train.csv app/resources/drift_reference.json \\
+        --columns Pclass Sex Age SibSp Parch Fare Embarked
+
+Colunas numéricas viram faixas por quantil; colunas texto, as categorias mais
+frequentes. Colunas texto com mais valores distintos que --max-unique-ratio das
+linhas (nomes, ids) ficam de fora. O JSON gerado pode ser versionado junto com o modelo.
+"""
+import argparse
+import json
+
+import pandas as pd
+
+from app.services.drift import build_reference_profile
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="Arquivo CSV ou Parquet com os dados de treino")
+    parser.add_argument("output", help="Arquivo JSON de saída")
+    parser.add_argument("--columns", nargs="+", help="Colunas monitoradas (padrão: todas)")
+    parser.add_argument("--numeric-bins", type=int, default=10)
+    parser.add_argument("--max-categories", type=int, default=20)
+    parser.add_argument("--max-unique-ratio", type=float, default=0.5,
+                        help="Fração máxima de valores distintos por linha em colunas texto")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    df = pd.read_parquet(args.input) if args.input.endswith(".parquet") else pd.read_csv(args.input)
+    if args.columns:
+        df = df[args.columns]
+    profile = build_reference_profile(df, args.numeric_bins, args.max_categories, args.max_unique_ratio)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=1)
+    print(f"Perfil com {len(profile)} colunas gravado em {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,72 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from app.api.v1.endpoints import predict, load, health, history
+from app.core.config import settings
+from app.core.logger import logger
+from app.core.middleware import CorrelationIdMiddleware, ServerTimingMiddleware
+from app.services.history_service import get_history_service, get_shadow_history_service
+from app.services.inference_backend import get_inference_backend
+from app.services.health_prober import get_health_prober
+from app.services.drift import get_drift_monitor
+from app.services.shadow import get_shadow_runner
+from app.services.startup import preload_champion_model
 from prometheus_fastapi_instrumentator import Instrumentator
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    history_service = get_history_service()
+    await history_service.start()
+    shadow_history_service = get_shadow_history_service()
+    await shadow_history_service.start()
+
+    # Checagens de MLflow/MongoDB em segundo plano; /health lê o último resultado
+    health_prober = get_health_prober()
+    health_prober.start()
+
+    drift_monitor = get_drift_monitor()
+    if drift_monitor is not None:
+        drift_monitor.start()
+
+    # Carrega o modelo em segundo plano: /health/live responde logo,
+    # /health/ready só quando o modelo estiver carregado e aquecido
+    preload_task = None
+    if settings.MODEL_PRELOAD_ON_STARTUP:
+        preload_task = asyncio.create_task(preload_champion_model())
+
+    yield
+
+    if preload_task is not None:
+        preload_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await preload_task
+    await health_prober.close()
+    if drift_monitor is not None:
+        await drift_monitor.close()
+    await get_shadow_runner().close()
+    # Garante que o histórico em fila seja gravado antes de encerrar
+    await history_service.close()
+    await shadow_history_service.close()
+
+    inference_backend = get_inference_backend()
+    if inference_backend is not None:
+        await asyncio.to_thread(inference_backend.shutdown)
+
+    # Esvazia a fila de logs (enqueue=True) antes de encerrar
+    await logger.complete()
+
+
 app = FastAPI(
     title="FastAPI + MLflow Model API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+if settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(CorrelationIdMiddleware)
+
 # Middleware Prometheus
 Instrumentator().instrument(app).expose(
     app, 
@@ -1,16 +1,42 @@
+import datetime
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class HistoryItem(BaseModel):
     input_payload: List[Dict[str, Any]]
     output_payload: List
     model_name: str
-    model_alias: str
+    # Modelos carregados por versão (sem alias) gravam None
+    model_alias: Optional[str] = None
     model_version: str
     timestamp: str
+    latency_ms: Optional[float] = None
+    shadow_of: Optional[Dict[str, Any]] = None
+
+class HistoryFilters(BaseModel):
+    model_name: Optional[str] = None
+    model_version: Optional[str] = None
+    start: Optional[datetime.datetime] = None
+    end: Optional[datetime.datetime] = None
 
 class HistoryResponse(BaseModel):
     total: int
     skip: int
     limit: int
-    items: List[HistoryItem]
\ No newline at end of file
+    items: List[HistoryItem]
+    next_cursor: Optional[str] = None
+
+class HistoryAnalyticsItem(BaseModel):
+    model_name: str
+    model_version: str
+    bucket: datetime.datetime
+    requests: int
+    predictions: int
+    mean_score: Optional[float] = None
+    histogram: List[int]
+    labels: Dict[str, int]
+
+class HistoryAnalyticsResponse(BaseModel):
+    bucket: str
+    histogram_edges: List[float]
+    items: List[HistoryAnalyticsItem]
@@ -5,6 +5,7 @@ class LoadModelRequest(BaseModel):
     model_name: str = Field(..., example="meu_modelo")
     alias: Optional[str] = Field(None, example="champion")
     version: Optional[str] = Field(None, example="3")
+    shadow: bool = Field(False, description="Carrega como challenger em sombra, sem virar o modelo padrão")
 
     def validate_choice(self):
         if not self.alias and not self.version:
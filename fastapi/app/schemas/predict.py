@@ -1,6 +1,5 @@
-from typing import List, Any, Type, Dict
-from pydantic import BaseModel, create_model
-from app.services import model_service
+from typing import List, Any, Type, Dict, Union
+from pydantic import BaseModel, Extra, Field, StrictBool, StrictFloat, StrictInt, StrictStr, create_model
 from mlflow.types.schema import Schema
 
 class PredictRequest(BaseModel):
@@ -8,3 +7,30 @@ class PredictRequest(BaseModel):
 
 class PredictResponse(BaseModel):
     predictions: List[Any]
+
+
+# Tipos da assinatura MLflow -> tipos pydantic, com as mesmas regras do InputValidator
+# (que usa isinstance: bool é aceito em colunas int e float, como no Python)
+_SIGNATURE_TYPES = {
+    "double": Union[StrictFloat, StrictInt, StrictBool],
+    "float": Union[StrictFloat, StrictInt, StrictBool],
+    "integer": Union[StrictInt, StrictBool],
+    "long": Union[StrictInt, StrictBool],
+    "string": StrictStr,
+    "boolean": StrictBool,
+}
+
+
+class _RowConfig:
+    extra = Extra.allow
+    allow_population_by_field_name = True
+
+
+def build_request_model(input_schema: Schema, name: str = "PredictRequest") -> Type[BaseModel]:
+    # Colunas viram campos com alias: nomes da assinatura podem não ser identificadores válidos
+    fields = {
+        f"col_{i}": (_SIGNATURE_TYPES.get(str(col.type), Any), Field(..., alias=str(col.name)))
+        for i, col in enumerate(input_schema)
+    }
+    row_model = create_model(f"{name}Row", __config__=_RowConfig, **fields)
+    return create_model(name, inputs=(List[row_model], ...))
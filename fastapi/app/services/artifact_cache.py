@@ -0,0 +1,219 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+import mlflow
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.metrics import (
+    model_cache_hits_total,
+    model_cache_misses_total,
+    model_cache_evictions_total,
+    model_cache_size_bytes,
+)
+
+INDEX_FILE = "index.json"
+LOCK_FILE = ".lock"
+
+
+def tree_checksum(path: str) -> Tuple[str, int]:
+    # sha256 sobre caminhos relativos + conteúdo de todos os arquivos, em ordem estável
+    digest = hashlib.sha256()
+    total_size = 0
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            file_path = os.path.join(dirpath, filename)
+            digest.update(os.path.relpath(file_path, path).encode())
+            with open(file_path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            total_size += os.path.getsize(file_path)
+    return digest.hexdigest(), total_size
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _pin(entry: dict):
+    pids = [pid for pid in entry.get("pinned_by", []) if _process_alive(pid)]
+    if os.getpid() not in pids:
+        pids.append(os.getpid())
+    entry["pinned_by"] = pids
+
+
+def _is_pinned(entry: dict) -> bool:
+    # Pins de processos que já morreram (ex.: crash sem unpin) não contam
+    return any(_process_alive(pid) for pid in entry.get("pinned_by", []))
+
+
+class ArtifactCache:
+    """
+    Cache local e persistente dos artefatos de modelo baixados do MLflow.
+
+    Cada versão de modelo é baixada uma única vez para um diretório nomeado
+    pelo checksum do conteúdo; o índice mapeia nome/versão -> checksum.
+    O tamanho total é limitado por `max_bytes`, removendo as versões usadas
+    há mais tempo. Um lock de arquivo mantém o índice consistente entre
+    workers que compartilham o mesmo diretório.
+
+    Com `pin=True`, o processo marca a versão como em uso (ex.: carregada no
+    registro e nos processos de inferência) e ela não é removida até o
+    `unpin`, ainda que o cache passe do limite.
+    """
+
+    def __init__(self, root: str, max_bytes: int, verify_checksum: bool = False):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.verify_checksum = verify_checksum
+        self._thread_lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_name: str, version: str) -> str:
+        return f"{model_name}/{version}"
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(self.root, exist_ok=True)
+        with self._thread_lock, open(os.path.join(self.root, LOCK_FILE), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read_index(self) -> dict:
+        try:
+            with open(os.path.join(self.root, INDEX_FILE), encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _write_index(self, index: dict):
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".index-")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp_path, os.path.join(self.root, INDEX_FILE))
+        model_cache_size_bytes.set(self._total_size(index))
+
+    @staticmethod
+    def _total_size(index: dict) -> int:
+        sizes = {entry["checksum"]: entry["size_bytes"] for entry in index.values()}
+        return sum(sizes.values())
+
+    def _lookup(self, key: str, pin: bool = False) -> Optional[str]:
+        with self._locked():
+            index = self._read_index()
+            entry = index.get(key)
+            if entry is None:
+                return None
+
+            path = os.path.join(self.root, entry["checksum"])
+            valid = os.path.isfile(os.path.join(path, "MLmodel"))
+            if valid and self.verify_checksum:
+                valid = tree_checksum(path)[0] == entry["checksum"]
+            if not valid:
+                logger.warning(f"Artefato em cache inválido para {key}; será baixado novamente.")
+                index.pop(key)
+                self._write_index(index)
+                return None
+
+            entry["last_access"] = time.time()
+            if pin:
+                _pin(entry)
+            self._write_index(index)
+            return path
+
+    def fetch(self, model_name: str, version: str, pin: bool = False) -> str:
+        key = self._key(model_name, version)
+        cached_path = self._lookup(key, pin=pin)
+        if cached_path is not None:
+            model_cache_hits_total.inc()
+            logger.info(f"Artefatos do modelo {key} servidos do cache local: {cached_path}")
+            return cached_path
+
+        model_cache_misses_total.inc()
+        os.makedirs(self.root, exist_ok=True)
+        download_dir = tempfile.mkdtemp(dir=self.root, prefix=".download-")
+        try:
+            local_path = mlflow.artifacts.download_artifacts(
+                artifact_uri=f"models:/{model_name}/{version}",
+                dst_path=download_dir,
+            )
+            checksum, size_bytes = tree_checksum(local_path)
+            final_path = os.path.join(self.root, checksum)
+
+            with self._locked():
+                # Conteúdo idêntico já presente (ex.: outra versão ou outro worker): reaproveita
+                if not os.path.isdir(final_path):
+                    os.replace(local_path, final_path)
+
+                index = self._read_index()
+                index[key] = {
+                    "model_name": model_name,
+                    "version": str(version),
+                    "checksum": checksum,
+                    "size_bytes": size_bytes,
+                    "last_access": time.time(),
+                }
+                if pin:
+                    _pin(index[key])
+                self._evict(index, protected=key)
+                self._write_index(index)
+
+            logger.info(f"Artefatos do modelo {key} baixados para o cache ({size_bytes / 1024 / 1024:.1f} MB).")
+            return final_path
+        finally:
+            shutil.rmtree(download_dir, ignore_errors=True)
+
+    def unpin(self, model_name: str, version: str):
+        key = self._key(model_name, version)
+        with self._locked():
+            index = self._read_index()
+            entry = index.get(key)
+            if entry is not None and os.getpid() in entry.get("pinned_by", []):
+                entry["pinned_by"].remove(os.getpid())
+                self._write_index(index)
+
+    def _evict(self, index: dict, protected: str):
+        # Conteúdo em uso não sai do disco, mesmo que referenciado por outra versão
+        protected_checksums = {index[protected]["checksum"]}
+        protected_checksums.update(entry["checksum"] for entry in index.values() if _is_pinned(entry))
+        by_age = sorted(index.items(), key=lambda item: item[1]["last_access"])
+        for key, entry in by_age:
+            if self._total_size(index) <= self.max_bytes:
+                break
+            if key == protected or entry["checksum"] in protected_checksums:
+                continue
+
+            index.pop(key)
+            # Remove o diretório apenas se nenhuma outra versão aponta para o mesmo conteúdo
+            if not any(other["checksum"] == entry["checksum"] for other in index.values()):
+                shutil.rmtree(os.path.join(self.root, entry["checksum"]), ignore_errors=True)
+            model_cache_evictions_total.inc()
+            logger.info(f"Artefatos do modelo {key} removidos do cache local (LRU).")
+
+
+artifact_cache = ArtifactCache(
+    root=settings.MODEL_CACHE_DIR,
+    max_bytes=settings.MODEL_CACHE_MAX_MB * 1024 * 1024,
+    verify_checksum=settings.MODEL_CACHE_VERIFY_CHECKSUM,
+) if settings.MODEL_CACHE_ENABLED else None
+
+def get_artifact_cache() -> Optional[ArtifactCache]:
+    return artifact_cache
@@ -0,0 +1,117 @@
+import asyncio
+import contextvars
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import pandas as pd
+
+from app.core.logger import logger
+from app.services.metrics import (
+    predict_batch_size_rows,
+    predict_batch_queue_wait_seconds,
+)
+
+Runner = Callable[[Any, pd.DataFrame], Awaitable[Any]]
+
+
+@dataclass
+class _PendingRequest:
+    df: pd.DataFrame
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=perf_counter)
+
+
+@dataclass
+class _Batch:
+    model: Any
+    items: List[_PendingRequest] = field(default_factory=list)
+    rows: int = 0
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+def _slice(preds, start: int, end: int):
+    if isinstance(preds, (pd.Series, pd.DataFrame)):
+        return preds.iloc[start:end]
+    return preds[start:end]
+
+
+class PredictBatcher:
+    """
+    Agrupa requisições de predição concorrentes em um único `model.predict`.
+
+    Cada requisição espera no máximo `window_ms` (ou até o lote somar
+    `max_rows` linhas) e recebe de volta apenas a sua fatia do resultado.
+    Os lotes são separados por modelo e por layout de colunas/dtypes, para que
+    a concatenação nunca altere os dados de entrada de um chamador.
+    """
+
+    def __init__(self, runner: Runner, max_rows: int = 256, window_ms: float = 5.0):
+        self._runner = runner
+        self.max_rows = max_rows
+        self.window = window_ms / 1000
+        self._batches: Dict[Hashable, _Batch] = {}
+        self._tasks = set()
+
+    @staticmethod
+    def _batch_key(model, df: pd.DataFrame) -> Hashable:
+        return (id(model), tuple(zip(df.columns, df.dtypes)))
+
+    async def submit(self, model, df: pd.DataFrame):
+        loop = asyncio.get_running_loop()
+        key = self._batch_key(model, df)
+
+        batch = self._batches.get(key)
+        if batch is None:
+            batch = self._batches[key] = _Batch(model=model)
+            batch.timer = loop.call_later(self.window, self._flush, key)
+
+        pending = _PendingRequest(df=df, future=loop.create_future())
+        batch.items.append(pending)
+        batch.rows += len(df)
+
+        if batch.rows >= self.max_rows:
+            self._flush(key)
+
+        return await pending.future
+
+    def _flush(self, key: Hashable):
+        batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+
+        # Contexto limpo: o lote não pertence à requisição que disparou o flush
+        task = asyncio.get_running_loop().create_task(self._run(batch), context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: _Batch):
+        now = perf_counter()
+        for item in batch.items:
+            predict_batch_queue_wait_seconds.observe(now - item.enqueued_at)
+        predict_batch_size_rows.observe(batch.rows)
+
+        frames = [item.df for item in batch.items]
+        combined = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+        try:
+            preds = await self._runner(batch.model, combined)
+            if len(preds) != batch.rows:
+                raise RuntimeError(
+                    f"Modelo retornou {len(preds)} predições para um lote de {batch.rows} linhas"
+                )
+        except Exception as e:
+            logger.error(f"Erro ao executar lote de {batch.rows} linhas: {str(e)}")
+            for item in batch.items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        offset = 0
+        for item in batch.items:
+            size = len(item.df)
+            if not item.future.done():
+                item.future.set_result(_slice(preds, offset, offset + size))
+            offset += size
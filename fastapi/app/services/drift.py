@@ -0,0 +1,252 @@
+import asyncio
+import json
+from math import inf
+from pathlib import Path
+from time import monotonic
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.metrics import (
+    feature_drift_psi,
+    feature_drift_window_rows,
+    drift_batches_dropped_total,
+)
+
+NUMERIC = "numeric"
+CATEGORICAL = "categorical"
+_NUMERIC_SIGNATURE_TYPES = {"double", "float", "integer", "long"}
+# Suavização do PSI para faixas vazias (evita log(0) e divisão por zero)
+_PSI_EPSILON = 1e-4
+
+
+def _numeric_counts(spec: dict, series: pd.Series) -> np.ndarray:
+    # Faixas [-inf, e0), [e0, e1), ..., [en, inf) e, por último, os nulos
+    edges = spec["_edges"]
+    if not is_numeric_dtype(series) or is_bool_dtype(series):
+        series = pd.to_numeric(series, errors="coerce")
+    values = series.to_numpy(dtype=float, na_value=np.nan)
+    index = np.searchsorted(edges, values, side="right")
+    index[np.isnan(values)] = len(edges) + 1
+    return np.bincount(index, minlength=len(edges) + 2)
+
+
+def _categorical_counts(spec: dict, series: pd.Series) -> np.ndarray:
+    # Categorias de referência, depois "outras" e, por último, os nulos
+    categories = spec["categories"]
+    values = series.to_numpy(dtype=object)
+    nulls = pd.isna(values)
+    codes = spec["_index"].get_indexer(values)
+    codes[codes < 0] = len(categories)
+    codes[nulls] = len(categories) + 1
+    return np.bincount(codes, minlength=len(categories) + 2)
+
+
+def _counts(spec: dict, series: pd.Series) -> np.ndarray:
+    return _numeric_counts(spec, series) if spec["type"] == NUMERIC else _categorical_counts(spec, series)
+
+
+def _compile(spec: dict) -> dict:
+    spec = dict(spec)
+    if spec["type"] == NUMERIC:
+        spec["_edges"] = np.asarray(spec["edges"], dtype=float)
+    else:
+        spec["_index"] = pd.Index(spec["categories"], dtype=object)
+    spec["_expected"] = np.asarray(spec["expected"], dtype=float)
+    return spec
+
+
+def build_reference_profile(df: pd.DataFrame, numeric_bins: int = 10, max_categories: int = 20,
+                            max_unique_ratio: float = 0.5) -> dict:
+    # Perfil de referência (dados de treino): faixas por quantil para colunas
+    # numéricas e as categorias mais frequentes para colunas texto. Colunas texto
+    # quase únicas por linha (nomes, ids) ficam de fora: o tráfego cairia todo em
+    # "outras" e o PSI indicaria drift permanente
+    profile = {}
+    for column in df.columns:
+        series = df[column]
+        if is_numeric_dtype(series) and not is_bool_dtype(series):
+            values = series.dropna().to_numpy(dtype=float)
+            if len(values) == 0:
+                continue
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, numeric_bins + 1)[1:-1]))
+            spec = {"type": NUMERIC, "edges": edges.tolist()}
+        else:
+            series = series.where(series.isna(), series.astype(str))
+            top = series.dropna().value_counts()
+            if len(top) > max(max_categories, max_unique_ratio * top.sum()):
+                logger.warning(f"Coluna '{column}' ignorada no perfil de drift: {len(top)} valores distintos "
+                               f"em {top.sum()} linhas.")
+                continue
+            spec = {"type": CATEGORICAL, "categories": top.index[:max_categories].tolist()}
+        counts = _counts(_compile({**spec, "expected": []}), series)
+        spec["expected"] = (counts / counts.sum()).tolist()
+        profile[str(column)] = spec
+    return profile
+
+
+def load_reference_profile(path: str, numeric_bins: int = 10, max_categories: int = 20,
+                           max_unique_ratio: float = 0.5) -> dict:
+    # JSON já calculado (python -m app.drift_profile) ou CSV/Parquet de treino
+    suffix = Path(path).suffix.lower()
+    if suffix == ".json":
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    df = pd.read_parquet(path) if suffix == ".parquet" else pd.read_csv(path)
+    return build_reference_profile(df, numeric_bins, max_categories, max_unique_ratio)
+
+
+def psi(expected: np.ndarray, observed_counts: np.ndarray) -> float:
+    observed = observed_counts / observed_counts.sum()
+    expected = np.clip(expected, _PSI_EPSILON, None)
+    observed = np.clip(observed, _PSI_EPSILON, None)
+    return float(np.sum((observed - expected) * np.log(observed / expected)))
+
+
+class ModelDriftSketch:
+    # Contagens por faixa/categoria de cada feature monitorada: memória fixa por modelo
+    def __init__(self, specs: Dict[str, dict]):
+        self.specs = specs
+        self.counts = {name: np.zeros(len(spec["_expected"])) for name, spec in specs.items()}
+        self.rows = 0.0
+
+    def update(self, df: pd.DataFrame, window_rows: int):
+        for name, spec in self.specs.items():
+            if name in df.columns:
+                self.counts[name] += _counts(spec, df[name])
+        self.rows += len(df)
+        if self.rows > window_rows:
+            # Decaimento: a janela acompanha o tráfego recente com memória constante
+            for counts in self.counts.values():
+                counts *= 0.5
+            self.rows *= 0.5
+
+    def scores(self) -> Dict[str, float]:
+        return {
+            name: psi(self.specs[name]["_expected"], counts)
+            for name, counts in self.counts.items()
+            if counts.sum() > 0
+        }
+
+
+class DriftMonitor:
+    """
+    Drift das features de entrada em relação a um perfil de referência.
+
+    `submit` só enfileira o DataFrame validado (sem cópia nem cálculo no
+    caminho da requisição); uma task em segundo plano atualiza as contagens
+    de forma vetorizada, em thread, e publica o PSI de cada feature no
+    Prometheus (`feature_drift_psi`) no máximo a cada `publish_interval`
+    segundos. Com a fila cheia, o lote é ignorado pelo monitor.
+    """
+
+    def __init__(self, profile: Dict[str, dict], window_rows: int = 10000, min_rows: int = 100,
+                 max_queue: int = 256, publish_interval: float = 1.0):
+        self.profile = {name: _compile(spec) for name, spec in profile.items()}
+        self.window_rows = window_rows
+        self.min_rows = min_rows
+        self.max_queue = max_queue
+        self.publish_interval = publish_interval
+        self._published_at: Dict[Tuple[str, str], float] = {}
+        self._sketches: Dict[Tuple[str, str], ModelDriftSketch] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def submit(self, loaded, df: pd.DataFrame):
+        self.start()
+        try:
+            self._queue.put_nowait((loaded.model_name, loaded.model_version, loaded.input_schema, df))
+        except asyncio.QueueFull:
+            drift_batches_dropped_total.inc()
+
+    async def _run(self):
+        while True:
+            model_name, model_version, input_schema, df = await self._queue.get()
+            try:
+                # Em thread: o cálculo (numpy/pandas) não ocupa o event loop das requisições
+                await asyncio.to_thread(self.update, model_name, model_version, df, input_schema)
+            except Exception as e:
+                logger.error(f"Erro ao atualizar drift de {model_name}/{model_version}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def _features(self, df: pd.DataFrame, input_schema) -> Dict[str, dict]:
+        if input_schema is None:
+            return {name: spec for name, spec in self.profile.items() if name in df.columns}
+        # Com assinatura: colunas numéricas e texto da assinatura que existem no perfil
+        features = {}
+        for col in input_schema:
+            spec = self.profile.get(col.name)
+            # DataType do MLflow (str() inclui o prefixo "DataType.") ou texto
+            col_type = getattr(col.type, "name", str(col.type))
+            if spec is None:
+                continue
+            if (spec["type"] == NUMERIC and col_type in _NUMERIC_SIGNATURE_TYPES) or \
+                    (spec["type"] == CATEGORICAL and col_type == "string"):
+                features[col.name] = spec
+        return features
+
+    def update(self, model_name: str, model_version: str, df: pd.DataFrame, input_schema=None) -> Dict[str, float]:
+        key = (model_name, model_version)
+        sketch = self._sketches.get(key)
+        if sketch is None:
+            sketch = self._sketches[key] = ModelDriftSketch(self._features(df, input_schema))
+        sketch.update(df, self.window_rows)
+
+        now = monotonic()
+        if sketch.rows < self.min_rows or now - self._published_at.get(key, -inf) < self.publish_interval:
+            return {}
+        self._published_at[key] = now
+        feature_drift_window_rows.labels(model_name, model_version).set(sketch.rows)
+        scores = sketch.scores()
+        for feature, score in scores.items():
+            feature_drift_psi.labels(model_name, model_version, feature).set(score)
+        return scores
+
+    def scores(self, model_name: str, model_version: str) -> Dict[str, float]:
+        sketch = self._sketches.get((model_name, model_version))
+        return sketch.scores() if sketch is not None else {}
+
+
+def _build_drift_monitor() -> Optional[DriftMonitor]:
+    if not settings.DRIFT_ENABLED:
+        return None
+    try:
+        profile = load_reference_profile(
+            settings.DRIFT_REFERENCE_PATH, settings.DRIFT_NUMERIC_BINS, settings.DRIFT_MAX_CATEGORIES
+        )
+    except Exception as e:
+        logger.error(f"Erro ao carregar perfil de referência de drift ({settings.DRIFT_REFERENCE_PATH}): {str(e)}")
+        return None
+    logger.info(f"Monitor de drift ativo para {len(profile)} features de referência.")
+    return DriftMonitor(
+        profile,
+        window_rows=settings.DRIFT_WINDOW_ROWS,
+        min_rows=settings.DRIFT_MIN_ROWS,
+        max_queue=settings.DRIFT_QUEUE_SIZE,
+    )
+
+
+drift_monitor = _build_drift_monitor()
+
+def get_drift_monitor() -> Optional[DriftMonitor]:
+    return drift_monitor
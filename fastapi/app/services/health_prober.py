@@ -0,0 +1,99 @@
+import asyncio
+import time
+from contextlib import suppress
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.metrics import health_check_up, health_check_latency_seconds
+
+
+@dataclass
+class ProbeResult:
+    ok: bool = False
+    latency_ms: Optional[float] = None
+    checked_at: Optional[float] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "ok": self.ok,
+            "latency_ms": self.latency_ms,
+            "age_seconds": round(time.time() - self.checked_at, 3) if self.checked_at else None,
+            "error": self.error,
+        }
+
+
+class HealthProber:
+    """
+    Executa as checagens de dependências (MLflow, MongoDB) em segundo plano,
+    a cada `interval` segundos, e guarda o último resultado de cada uma.
+
+    As rotas de health leem apenas esse snapshot, sem bloquear o event loop
+    nem esperar por rede a cada probe do orquestrador.
+    """
+
+    def __init__(self, interval: float, timeout: float):
+        self.interval = interval
+        self.timeout = timeout
+        self._checks: Dict[str, Callable[[], Awaitable[bool]]] = {}
+        self._results: Dict[str, ProbeResult] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, check: Callable[[], Awaitable[bool]]):
+        self._checks[name] = check
+        self._results.setdefault(name, ProbeResult())
+
+    def result(self, name: str) -> ProbeResult:
+        return self._results.get(name, ProbeResult())
+
+    def snapshot(self) -> dict:
+        return {name: result.to_dict() for name, result in self._results.items()}
+
+    async def probe_once(self):
+        await asyncio.gather(*(self._probe(name, check) for name, check in self._checks.items()))
+
+    async def _probe(self, name: str, check: Callable[[], Awaitable[bool]]):
+        start = perf_counter()
+        error = None
+        try:
+            ok = bool(await asyncio.wait_for(check(), self.timeout))
+        except asyncio.TimeoutError:
+            ok, error = False, f"timeout após {self.timeout}s"
+        except Exception as e:
+            ok, error = False, str(e)
+        latency = perf_counter() - start
+
+        self._results[name] = ProbeResult(ok=ok, latency_ms=round(latency * 1000, 2), checked_at=time.time(), error=error)
+        health_check_up.labels(name).set(1 if ok else 0)
+        health_check_latency_seconds.labels(name).set(latency)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.probe_once()
+            except Exception as e:
+                logger.error(f"Erro inesperado nas checagens de saúde: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+health_prober = HealthProber(
+    interval=settings.HEALTH_PROBE_INTERVAL_SECONDS,
+    timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+)
+
+def get_health_prober() -> HealthProber:
+    return health_prober
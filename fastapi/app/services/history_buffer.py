@@ -0,0 +1,165 @@
+import bisect
+import datetime
+from typing import List, NamedTuple, Optional, Tuple
+
+from app.schemas.history import HistoryFilters
+from app.services.metrics import history_buffer_items
+
+# Mesma ordenação do /history: (timestamp, _id)
+SortKey = Tuple[datetime.datetime, object]
+
+
+class _Entry(NamedTuple):
+    key: SortKey
+    item: dict
+    rows: int
+
+
+class HistoryPage(NamedTuple):
+    items: List[dict]
+    next_key: Optional[SortKey]
+    # Total exato quando o buffer contém todo o histórico; senão None (conta no MongoDB)
+    total: Optional[int]
+
+
+def _naive_utc(value: Optional[datetime.datetime]) -> Optional[datetime.datetime]:
+    # O histórico grava timestamps UTC sem fuso; filtros podem chegar com fuso
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class RecentHistoryBuffer:
+    """
+    Buffer circular em memória com os itens mais recentes do histórico, já
+    serializados, em ordem de (timestamp, _id).
+
+    O buffer guarda sempre um sufixo contínuo do histórico: todo documento
+    mais novo que o item mais antigo em memória está no buffer. Por isso uma
+    página é respondida daqui quando se encontram itens suficientes (ou
+    quando o buffer contém o histórico inteiro, `exhaustive`); do contrário
+    `page` devolve None e a consulta vai ao MongoDB. O tamanho é limitado em
+    itens (`max_items`) e em linhas de entrada (`max_rows`).
+
+    O buffer recebe só gravações confirmadas pelo MongoDB. Com vários workers,
+    `refresh_interval` > 0 faz o HistoryService trazer do MongoDB,
+    periodicamente, o que os outros workers gravaram (janela de `refresh_lag`
+    segundos para gravações em lote atrasadas): a defasagem fica limitada a
+    `refresh_interval`. Com 0, supõe-se um único processo gravando.
+    """
+
+    def __init__(self, max_items: int = 1000, max_rows: int = 50000, refresh_interval: float = 1.0,
+                 refresh_lag: float = 5.0):
+        self.max_items = max_items
+        self.max_rows = max_rows
+        self.refresh_interval = refresh_interval
+        self.refresh_lag = refresh_lag
+        self._entries: List[_Entry] = []
+        self._keys: List[SortKey] = []
+        # _id -> item serializado
+        self._ids = {}
+        self._rows = 0
+        self.exhaustive = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, doc_id) -> bool:
+        return doc_id in self._ids
+
+    def get(self, doc_id) -> Optional[dict]:
+        return self._ids.get(doc_id)
+
+    @property
+    def newest_timestamp(self) -> Optional[datetime.datetime]:
+        return self._keys[-1][0] if self._keys else None
+
+    def add(self, timestamp: datetime.datetime, doc_id, item: dict):
+        if doc_id in self._ids:
+            return
+        key = (timestamp, doc_id)
+        entry = _Entry(key, item, len(item["input_payload"]))
+        if not self._keys or key > self._keys[-1]:
+            # Caso comum: o item é o mais novo
+            self._keys.append(key)
+            self._entries.append(entry)
+        else:
+            index = bisect.bisect(self._keys, key)
+            if index == 0 and not self.exhaustive:
+                # Mais antigo que o buffer: entre ele e o item mais antigo pode haver lacunas
+                return
+            self._keys.insert(index, key)
+            self._entries.insert(index, entry)
+        self._ids[doc_id] = item
+        self._rows += entry.rows
+        self._evict()
+
+    def replace(self, entries: List[Tuple[datetime.datetime, object, dict]], exhaustive: bool):
+        # Recarga completa (subida da API ou refresh que não cobre o intervalo)
+        self._entries, self._keys, self._ids, self._rows = [], [], {}, 0
+        self.exhaustive = exhaustive
+        for timestamp, doc_id, item in sorted(entries, key=lambda entry: (entry[0], entry[1])):
+            self.add(timestamp, doc_id, item)
+        history_buffer_items.set(len(self._entries))
+
+    def _evict(self):
+        overflow = 0
+        rows = self._rows
+        while len(self._entries) - overflow > self.max_items or (rows > self.max_rows and len(self._entries) - overflow > 1):
+            rows -= self._entries[overflow].rows
+            overflow += 1
+        if overflow:
+            for entry in self._entries[:overflow]:
+                self._ids.pop(entry.key[1], None)
+            del self._entries[:overflow]
+            del self._keys[:overflow]
+            self._rows = rows
+            self.exhaustive = False
+        history_buffer_items.set(len(self._entries))
+
+    def page(self, filters: Optional[HistoryFilters], skip: int, limit: int,
+             after: Optional[SortKey] = None) -> Optional[HistoryPage]:
+        if not self._entries and not self.exhaustive:
+            return None
+        model_name = filters.model_name if filters else None
+        model_version = filters.model_version if filters else None
+        start = _naive_utc(filters.start) if filters else None
+        end = _naive_utc(filters.end) if filters else None
+        after = (_naive_utc(after[0]), after[1]) if after is not None else None
+
+        needed = skip + limit + 1
+        matched, selected = 0, []
+        for entry in reversed(self._entries):
+            timestamp = entry.key[0]
+            if after is not None and not entry.key < after:
+                continue
+            if start is not None and timestamp < start:
+                # Ordem decrescente: daqui para trás nada mais passa no filtro
+                break
+            if end is not None and timestamp >= end:
+                continue
+            item = entry.item
+            if (model_name and item["model_name"] != model_name) or \
+                    (model_version and item["model_version"] != model_version):
+                continue
+            matched += 1
+            if matched > skip and len(selected) <= limit:
+                selected.append(entry)
+            if matched >= needed and not self.exhaustive:
+                break
+
+        oldest = self._keys[0][0] if self._keys else None
+        covered = (
+            matched >= needed
+            or self.exhaustive
+            or (start is not None and oldest is not None and start > oldest)
+        )
+        if not covered:
+            return None
+
+        next_key = selected[limit - 1].key if len(selected) > limit else None
+        return HistoryPage(
+            items=[entry.item for entry in selected[:limit]],
+            next_key=next_key,
+            total=matched if self.exhaustive else None,
+        )
@@ -0,0 +1,283 @@
+import asyncio
+import datetime
+import math
+from collections import Counter
+from numbers import Number
+from time import perf_counter
+from typing import Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, IndexModel, UpdateOne
+
+from app.core.logger import logger
+from app.services.metrics import history_rollup_flush_duration_seconds, history_rollup_pending_buckets
+
+ROLLUP_KEY = ("model_name", "model_version", "bucket")
+ROLLUP_INDEXES = [
+    IndexModel([(field, ASCENDING) for field in ROLLUP_KEY], name="model_name_version_bucket", unique=True),
+    IndexModel([("bucket", ASCENDING)], name="bucket"),
+]
+BUCKET_UNITS = ("minute", "hour", "day", "week", "month")
+
+# Referência usada pelo $dateTrunc do MongoDB para alinhar os buckets com binSize
+_BUCKET_REFERENCE = datetime.datetime(2000, 1, 1)
+
+
+# Mesmo critério de `record`: números finitos (NaN fica abaixo de -Infinity na ordem do BSON)
+_FINITE_NUMBER = {"$and": [
+    {"$isNumber": "$$this"},
+    {"$ne": ["$$this", float("nan")]},
+    {"$gt": ["$$this", float("-inf")]},
+    {"$lt": ["$$this", float("inf")]},
+]}
+
+
+def _is_score(value) -> bool:
+    return isinstance(value, Number) and not isinstance(value, bool)
+
+
+def _label_key(value) -> str:
+    # Mesma conversão do pipeline de backfill ($toString + troca de '.' e '$')
+    text = ("true" if value else "false") if isinstance(value, bool) else value
+    return text.replace(".", "_").replace("$", "_")
+
+
+class HistoryRollups:
+    """
+    Agregados do histórico por modelo, versão e janela de tempo.
+
+    Cada documento de rollup guarda, para um bucket de `bucket_minutes`:
+    requisições, predições, soma/contagem dos scores numéricos, histograma
+    dos scores (`histogram_bins` faixas entre `histogram_min` e
+    `histogram_max`, com os extremos somados à primeira/última faixa) e a
+    contagem de rótulos (saídas texto/booleanas).
+
+    Os incrementos são acumulados em memória a cada gravação confirmada e
+    enviados a cada `flush_interval` segundos, com um `$inc` (upsert) por
+    bucket. O backfill recalcula os rollups a partir do histórico bruto.
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        bucket_minutes: int = 60,
+        histogram_bins: int = 10,
+        histogram_min: float = 0.0,
+        histogram_max: float = 1.0,
+        flush_interval: float = 5.0,
+    ):
+        if histogram_max <= histogram_min:
+            raise ValueError("histogram_max deve ser maior que histogram_min.")
+        self.collection = collection
+        self.bucket_minutes = bucket_minutes
+        self.histogram_bins = histogram_bins
+        self.histogram_min = histogram_min
+        self.histogram_max = histogram_max
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, str, datetime.datetime], Counter] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def histogram_edges(self) -> List[float]:
+        width = (self.histogram_max - self.histogram_min) / self.histogram_bins
+        return [self.histogram_min + i * width for i in range(self.histogram_bins + 1)]
+
+    def bucket_of(self, timestamp: datetime.datetime) -> datetime.datetime:
+        size = self.bucket_minutes * 60
+        offset = (timestamp - _BUCKET_REFERENCE).total_seconds()
+        return _BUCKET_REFERENCE + datetime.timedelta(seconds=math.floor(offset / size) * size)
+
+    def _bin_of(self, score: float) -> int:
+        position = (score - self.histogram_min) / (self.histogram_max - self.histogram_min)
+        return min(self.histogram_bins - 1, max(0, math.floor(position * self.histogram_bins)))
+
+    def record(self, timestamp: datetime.datetime, model_name: str, model_version: str, outputs):
+        # Síncrono e em memória: roda no callback de gravação confirmada, sem I/O
+        increments = self._pending.setdefault((model_name, model_version, self.bucket_of(timestamp)), Counter())
+        increments["requests"] += 1
+        if not isinstance(outputs, list):
+            return
+        increments["predictions"] += len(outputs)
+        for value in outputs:
+            if _is_score(value):
+                if not math.isfinite(value):
+                    continue
+                increments["score_sum"] += float(value)
+                increments["score_count"] += 1
+                increments[f"hist.{self._bin_of(value)}"] += 1
+            elif isinstance(value, (str, bool)) and value != "":
+                increments[f"labels.{_label_key(value)}"] += 1
+        history_rollup_pending_buckets.set(len(self._pending))
+
+    async def ensure_indexes(self):
+        try:
+            await self.collection.create_indexes(ROLLUP_INDEXES)
+        except Exception as e:
+            logger.error(f"Erro ao criar índices dos rollups do histórico: {str(e)}")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        operations = [
+            UpdateOne(dict(zip(ROLLUP_KEY, key)), {"$inc": dict(increments)}, upsert=True)
+            for key, increments in pending.items()
+        ]
+        start_time = perf_counter()
+        try:
+            await self.collection.bulk_write(operations, ordered=False)
+            logger.debug("{} buckets de rollup do histórico atualizados.", len(operations))
+        except Exception as e:
+            # Devolve os incrementos: entram na próxima tentativa
+            logger.error(f"Erro ao gravar rollups do histórico: {str(e)}")
+            for key, increments in pending.items():
+                self._pending.setdefault(key, Counter()).update(increments)
+        finally:
+            history_rollup_flush_duration_seconds.observe(perf_counter() - start_time)
+            history_rollup_pending_buckets.set(len(self._pending))
+
+    async def summary(self, match: dict, unit: str = "hour") -> List[dict]:
+        pipeline = [
+            {"$match": match},
+            {"$group": {
+                "_id": {
+                    "model_name": "$model_name",
+                    "model_version": "$model_version",
+                    "bucket": {"$dateTrunc": {"date": "$bucket", "unit": unit}},
+                },
+                "requests": {"$sum": "$requests"},
+                "predictions": {"$sum": "$predictions"},
+                "score_sum": {"$sum": "$score_sum"},
+                "score_count": {"$sum": "$score_count"},
+                **{f"hist_{i}": {"$sum": f"$hist.{i}"} for i in range(self.histogram_bins)},
+                "labels": {"$push": {"$objectToArray": {"$ifNull": ["$labels", {}]}}},
+            }},
+            {"$project": {
+                "_id": 0,
+                "model_name": "$_id.model_name",
+                "model_version": "$_id.model_version",
+                "bucket": "$_id.bucket",
+                "requests": 1,
+                "predictions": 1,
+                "mean_score": {"$cond": [
+                    {"$gt": ["$score_count", 0]}, {"$divide": ["$score_sum", "$score_count"]}, None,
+                ]},
+                "histogram": [f"$hist_{i}" for i in range(self.histogram_bins)],
+                "labels": _sum_label_pairs("$labels"),
+            }},
+            {"$sort": {"bucket": 1, "model_name": 1, "model_version": 1}},
+        ]
+        return await self.collection.aggregate(pipeline).to_list(length=None)
+
+    def backfill_pipeline(self, match: dict) -> List[dict]:
+        outputs = {"$ifNull": ["$output_payload", {"$ifNull": ["$payload.output", []]}]}
+        width = self.histogram_max - self.histogram_min
+        bin_of = {"$min": [self.histogram_bins - 1, {"$max": [0, {"$floor": {"$multiply": [
+            {"$divide": [{"$subtract": ["$$this", self.histogram_min]}, width]}, self.histogram_bins,
+        ]}}]}]}
+        label_key = {"$replaceAll": {
+            "input": {"$replaceAll": {"input": {"$toString": "$$this"}, "find": ".", "replacement": "_"}},
+            "find": {"$literal": "$"},
+            "replacement": "_",
+        }}
+        return [
+            {"$match": match},
+            {"$project": {
+                "model_name": {"$ifNull": ["$model_name", "$meta.model_name"]},
+                "model_version": {"$ifNull": ["$model_version", "$meta.model_version"]},
+                "bucket": {"$dateTrunc": {"date": "$timestamp", "unit": "minute", "binSize": self.bucket_minutes}},
+                "outputs": {"$cond": [{"$isArray": outputs}, outputs, []]},
+            }},
+            {"$project": {
+                "model_name": 1,
+                "model_version": 1,
+                "bucket": 1,
+                "predictions": {"$size": "$outputs"},
+                "scores": {"$filter": {"input": "$outputs", "cond": _FINITE_NUMBER}},
+                "labels": {"$map": {
+                    "input": {"$filter": {"input": "$outputs", "cond": {"$and": [
+                        {"$in": [{"$type": "$$this"}, ["string", "bool"]]}, {"$ne": ["$$this", ""]},
+                    ]}}},
+                    "in": label_key,
+                }},
+            }},
+            {"$group": {
+                "_id": {"model_name": "$model_name", "model_version": "$model_version", "bucket": "$bucket"},
+                "requests": {"$sum": 1},
+                "predictions": {"$sum": "$predictions"},
+                "score_sum": {"$sum": {"$sum": "$scores"}},
+                "score_count": {"$sum": {"$size": "$scores"}},
+                **{f"hist_{i}": {"$sum": {"$size": {"$filter": {"input": "$scores", "cond": {"$eq": [bin_of, i]}}}}}
+                   for i in range(self.histogram_bins)},
+                "labels": {"$push": "$labels"},
+            }},
+            {"$project": {
+                "_id": 0,
+                "model_name": "$_id.model_name",
+                "model_version": "$_id.model_version",
+                "bucket": "$_id.bucket",
+                "requests": 1,
+                "predictions": 1,
+                "score_sum": 1,
+                "score_count": 1,
+                "hist": {str(i): f"$hist_{i}" for i in range(self.histogram_bins)},
+                "labels": _count_labels("$labels"),
+            }},
+            {"$merge": {
+                "into": self.collection.name,
+                "on": list(ROLLUP_KEY),
+                "whenMatched": "replace",
+                "whenNotMatched": "insert",
+            }},
+        ]
+
+    async def backfill(self, history_collection: AsyncIOMotorCollection, match: dict):
+        # Os buckets cobertos são recalculados e substituídos; rode para intervalos já fechados
+        await self.flush()
+        await history_collection.aggregate(self.backfill_pipeline(match)).to_list(length=None)
+
+
+def _flatten(arrays: str) -> dict:
+    return {"$reduce": {"input": arrays, "initialValue": [], "in": {"$concatArrays": ["$$value", "$$this"]}}}
+
+
+def _sum_label_pairs(pair_lists: str) -> dict:
+    # [[{k, v}, ...], ...] -> {k: soma de v}
+    return {"$let": {"vars": {"pairs": _flatten(pair_lists)}, "in": {"$arrayToObject": {"$map": {
+        "input": {"$setUnion": ["$$pairs.k"]},
+        "as": "label",
+        "in": {"k": "$$label", "v": {"$sum": {"$map": {
+            "input": {"$filter": {"input": "$$pairs", "cond": {"$eq": ["$$this.k", "$$label"]}}},
+            "in": "$$this.v",
+        }}}},
+    }}}}}
+
+
+def _count_labels(label_lists: str) -> dict:
+    # [[rótulo, ...], ...] -> {rótulo: ocorrências}
+    return {"$let": {"vars": {"labels": _flatten(label_lists)}, "in": {"$arrayToObject": {"$map": {
+        "input": {"$setUnion": ["$$labels"]},
+        "as": "label",
+        "in": {"k": "$$label", "v": {"$size": {"$filter": {
+            "input": "$$labels", "cond": {"$eq": ["$$this", "$$label"]},
+        }}}},
+    }}}}}
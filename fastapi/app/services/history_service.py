@@ -1,47 +1,530 @@
+import asyncio
+import base64
 import datetime
-from typing import List, Tuple
+import json
+from time import monotonic
+from typing import AsyncIterator, List, Optional, Tuple
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection
-from app.core.logger import logger
-from app.db.mongo import history_collection
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from app.core.config import settings
+from app.core.logger import logger, hot_logger
+from app.db.mongo import history_collection, history_rollup_collection, shadow_history_collection
+from app.schemas.history import HistoryFilters
+from app.services.history_writer import HistoryWriter
+from app.services.history_rollups import HistoryRollups
+from app.services.history_buffer import RecentHistoryBuffer
+from app.services.metrics import history_buffer_hits_total, history_buffer_misses_total
+from app.utils.history_codec import COMPRESSIONS, decode_payload, encode_payload, is_columnar_encodable
+
+HISTORY_SORT = [("timestamp", DESCENDING), ("_id", DESCENDING)]
+
+# Exportação em ordem cronológica (percorre o índice timestamp_id no sentido inverso)
+EXPORT_SORT = [("timestamp", ASCENDING), ("_id", ASCENDING)]
+
+HISTORY_INDEXES = [
+    IndexModel(HISTORY_SORT, name="timestamp_id"),
+    IndexModel([("model_name", ASCENDING)] + HISTORY_SORT, name="model_name_timestamp_id"),
+    IndexModel([("model_name", ASCENDING), ("model_version", ASCENDING)] + HISTORY_SORT,
+               name="model_name_version_timestamp_id"),
+]
+
+# Em collections time-series os metadados do modelo ficam em `meta` (metaField)
+TIMESERIES_INDEXES = [
+    IndexModel([("meta.model_name", ASCENDING), ("timestamp", DESCENDING)], name="meta_model_name_timestamp"),
+    IndexModel([("meta.model_name", ASCENDING), ("meta.model_version", ASCENDING), ("timestamp", DESCENDING)],
+               name="meta_model_name_version_timestamp"),
+]
+
+TTL_INDEX_NAME = "timestamp_ttl"
+INDEX_OPTIONS_CONFLICT = 85
+
+STORAGE_FORMATS = ("document", "columnar")
+
+COUNT_CACHE_MAX_ENTRIES = 256
+
+# Chaves lidas por consulta (e _ids por $in) no refresh do buffer
+BUFFER_REFRESH_PAGE_SIZE = 200
+
+
+class InvalidCursorError(ValueError):
+    pass
+
+
+class RollupsDisabledError(RuntimeError):
+    pass
+
+
+def encode_cursor(doc: dict) -> str:
+    payload = {"ts": doc["timestamp"].isoformat(), "id": str(doc["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime.datetime, object]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        timestamp = datetime.datetime.fromisoformat(payload["ts"])
+        doc_id = ObjectId(payload["id"]) if ObjectId.is_valid(payload["id"]) else payload["id"]
+        return timestamp, doc_id
+    except Exception:
+        raise InvalidCursorError("Cursor de paginação inválido.")
+
+
+def history_export_rows(items: List[dict]) -> List[dict]:
+    # Uma linha por registro predito: colunas de entrada + metadados + predição
+    rows = []
+    for item in items:
+        timestamp = datetime.datetime.fromisoformat(item["timestamp"])
+        outputs = item["output_payload"]
+        for i, inputs in enumerate(item["input_payload"]):
+            rows.append({
+                **inputs,
+                "timestamp": timestamp,
+                "model_name": item["model_name"],
+                "model_version": item["model_version"],
+                "model_alias": item["model_alias"],
+                "row_index": i,
+                "prediction": outputs[i] if i < len(outputs) else None,
+            })
+    return rows
+
+
+def keyset_query(query: dict, after: Optional[Tuple[datetime.datetime, object]]) -> dict:
+    # Keyset: tudo o que vem depois de (timestamp, _id) na ordenação decrescente
+    if after is None:
+        return query
+    timestamp, doc_id = after
+    keyset = {"$or": [
+        {"timestamp": {"$lt": timestamp}},
+        {"timestamp": timestamp, "_id": {"$lt": doc_id}},
+    ]}
+    return {"$and": [query, keyset]} if query else keyset
+
+
+def build_history_query(filters: Optional[HistoryFilters], meta_prefix: str = "") -> dict:
+    query = {}
+    if filters is None:
+        return query
+    if filters.model_name:
+        query[f"{meta_prefix}model_name"] = filters.model_name
+    if filters.model_version:
+        query[f"{meta_prefix}model_version"] = filters.model_version
+    time_range = {}
+    if filters.start:
+        time_range["$gte"] = filters.start
+    if filters.end:
+        time_range["$lt"] = filters.end
+    if time_range:
+        query["timestamp"] = time_range
+    return query
+
 
 class HistoryService:
-    def __init__(self, collection: AsyncIOMotorCollection):
+    """
+    Gravação e leitura do histórico de predições.
+
+    `storage_format="columnar"` grava o payload de entrada por colunas (nomes
+    das colunas uma única vez por documento), opcionalmente comprimido com
+    zlib. Com `timeseries=True` o histórico fica em uma collection time-series
+    (timeField `timestamp`, metaField `meta` com os dados do modelo), e
+    `ttl_seconds` define a retenção. A leitura entende todos os formatos.
+    Com `rollups`, cada gravação confirmada também atualiza os agregados do /history/analytics.
+    Com `buffer`, as páginas mais recentes do /history saem da memória.
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        writer: Optional[HistoryWriter] = None,
+        storage_format: str = "document",
+        compression: str = "none",
+        compression_level: int = 6,
+        ttl_seconds: float = 0,
+        timeseries: bool = False,
+        rollups: Optional[HistoryRollups] = None,
+        buffer: Optional[RecentHistoryBuffer] = None,
+    ):
+        if storage_format not in STORAGE_FORMATS:
+            raise ValueError(f"Formato de armazenamento do histórico inválido: {storage_format}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Compressão do histórico inválida: {compression}")
+
         self.collection = collection
+        self.writer = writer
+        self.storage_format = storage_format
+        self.compression = compression
+        self.compression_level = compression_level
+        self.ttl_seconds = int(ttl_seconds)
+        self.timeseries = timeseries
+        self.meta_prefix = "meta." if timeseries else ""
+        self.rollups = rollups
+        self.buffer = buffer
+        if writer is not None and (buffer is not None or rollups is not None):
+            # Com o writer, buffer e rollups só recebem o que o MongoDB confirmou
+            writer.on_stored = self._on_stored
+        self._count_cache = {}
+        self._buffer_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self.timeseries:
+            await self.ensure_timeseries_collection()
+        await self.ensure_indexes()
+        if self.rollups is not None:
+            await self.rollups.ensure_indexes()
+            self.rollups.start()
+        if self.writer is not None:
+            self.writer.start()
+        if self.buffer is not None:
+            await self.load_buffer()
+            if self.buffer.refresh_interval > 0 and (self._buffer_task is None or self._buffer_task.done()):
+                self._buffer_task = asyncio.create_task(self._run_buffer_refresh())
+
+    async def ensure_timeseries_collection(self):
+        db, name = self.collection.database, self.collection.name
+        try:
+            result = await db.command("listCollections", filter={"name": name})
+            existing = result["cursor"]["firstBatch"]
+            if not existing:
+                options = {"timeseries": {"timeField": "timestamp", "metaField": "meta", "granularity": "seconds"}}
+                if self.ttl_seconds:
+                    options["expireAfterSeconds"] = self.ttl_seconds
+                await db.create_collection(name, **options)
+                logger.info(f"Collection time-series '{name}' criada para o histórico.")
+            elif existing[0].get("type") != "timeseries":
+                logger.warning(f"Collection '{name}' já existe e não é time-series; use outra collection ou migre os dados.")
+            elif self.ttl_seconds:
+                await db.command("collMod", name, expireAfterSeconds=self.ttl_seconds)
+        except Exception as e:
+            logger.error(f"Erro ao preparar collection time-series do histórico: {str(e)}")
+
+    async def ensure_indexes(self):
+        try:
+            await self.collection.create_indexes(TIMESERIES_INDEXES if self.timeseries else HISTORY_INDEXES)
+            if self.ttl_seconds and not self.timeseries:
+                await self._ensure_ttl_index()
+            logger.info("Índices do histórico verificados no MongoDB.")
+        except Exception as e:
+            logger.error(f"Erro ao criar índices do histórico no MongoDB: {str(e)}")
+
+    async def _ensure_ttl_index(self):
+        ttl_index = IndexModel([("timestamp", ASCENDING)], name=TTL_INDEX_NAME, expireAfterSeconds=self.ttl_seconds)
+        try:
+            await self.collection.create_indexes([ttl_index])
+        except OperationFailure as e:
+            if e.code != INDEX_OPTIONS_CONFLICT:
+                raise
+            # Retenção alterada: atualiza o índice existente em vez de recriá-lo
+            await self.collection.database.command(
+                "collMod", self.collection.name,
+                index={"name": TTL_INDEX_NAME, "expireAfterSeconds": self.ttl_seconds},
+            )
+
+    async def close(self):
+        if self.writer is not None:
+            await self.writer.close(timeout=settings.HISTORY_WRITER_SHUTDOWN_TIMEOUT_SECONDS)
+        if self.rollups is not None:
+            await self.rollups.close()
+        if self._buffer_task is not None:
+            self._buffer_task.cancel()
+            try:
+                await self._buffer_task
+            except asyncio.CancelledError:
+                pass
+            self._buffer_task = None
+
+    def _build_record(self, input_payload, output_payload, model_name, model_version, model_alias=None,
+                      latency_ms=None, shadow_of=None) -> dict:
+        # _id gerado aqui (como o pymongo faria) e timestamp em milissegundos, a precisão
+        # do MongoDB: itens do buffer e documentos gravados têm a mesma chave de paginação
+        now = datetime.datetime.utcnow()
+        record = {"_id": ObjectId(), "timestamp": now.replace(microsecond=now.microsecond // 1000 * 1000)}
+        # Uma linha só não compensa: o documento colunar ficaria maior que o original
+        if (self.storage_format == "columnar" and is_columnar_encodable(input_payload)
+                and len(input_payload) > 1):
+            record["payload_format"], record["payload"] = encode_payload(
+                input_payload, output_payload, self.compression, self.compression_level
+            )
+        else:
+            record["input_payload"] = input_payload
+            record["output_payload"] = output_payload
+
+        if latency_ms is not None:
+            record["latency_ms"] = latency_ms
+        if shadow_of is not None:
+            # Predição em sombra: saída e latência do modelo principal para o mesmo lote
+            record["shadow_of"] = shadow_of
+
+        meta = {"model_name": model_name, "model_version": model_version, "model_alias": model_alias}
+        if self.timeseries:
+            record["meta"] = meta
+        else:
+            record.update(meta)
+        return record
+
+    async def add(self, input_payload, output_payload, model_name, model_version, model_alias=None,
+                  latency_ms=None, shadow_of=None):
+        record = self._build_record(
+            input_payload, output_payload, model_name, model_version, model_alias, latency_ms, shadow_of
+        )
+        if self.writer is not None:
+            # Fora do caminho crítico: o registro é gravado em lote pelo HistoryWriter,
+            # que entrega a rollups e buffer (on_stored) só o que o MongoDB confirmou
+            await self.writer.enqueue(record)
+            return
 
-    async def add(self, input_payload, output_payload, model_name, model_version, model_alias=None):
-        record = {
-            "timestamp": datetime.datetime.utcnow(),
-            "input_payload": input_payload,
-            "output_payload": output_payload,
-            "model_name": model_name,
-            "model_version": model_version,
-            "model_alias": model_alias
-        }
         try:
             await self.collection.insert_one(record)
-            logger.info("Histórico de predição salvo com sucesso no MongoDB.")
+            hot_logger.info("Histórico de predição salvo com sucesso no MongoDB.")
         except Exception as e:
             logger.error(f"Erro ao salvar histórico no MongoDB: {str(e)}")
+            return
+
+        if self.rollups is not None and shadow_of is None:
+            # Predições em sombra não foram servidas: ficam fora dos agregados
+            self.rollups.record(record["timestamp"], model_name, model_version, output_payload)
+        if self.buffer is not None:
+            # Serializado a partir do payload original: sem decodificar o formato compacto
+            item = self._serialize_history_item(
+                {**record, "payload_format": None, "input_payload": input_payload, "output_payload": output_payload}
+            )
+            self.buffer.add(record["timestamp"], record["_id"], item)
+
+    def _on_stored(self, records: List[dict]):
+        for record in records:
+            item = self._serialize_history_item(record) if self.buffer is not None else None
+            if self.rollups is not None and record.get("shadow_of") is None:
+                meta = record.get("meta") or record
+                outputs = item["output_payload"] if item is not None else decode_payload(record)[1]
+                self.rollups.record(record["timestamp"], meta["model_name"], meta["model_version"], outputs)
+            if item is not None:
+                self.buffer.add(record["timestamp"], record["_id"], item)
+
+    async def list(
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        filters: Optional[HistoryFilters] = None,
+        exact_count: bool = False,
+    ) -> Tuple[List[dict], int, Optional[str]]:
+        query = build_history_query(filters, self.meta_prefix)
+        after = decode_cursor(cursor) if cursor else None
+        if self.buffer is not None:
+            page = self.buffer.page(filters, skip, limit, after)
+            if page is not None:
+                history_buffer_hits_total.inc()
+                total = page.total
+                if total is None or exact_count:
+                    total = max(await self._count(query, exact=exact_count, cache_estimate=True), skip + len(page.items))
+                next_cursor = None
+                if page.next_key is not None:
+                    next_cursor = encode_cursor({"timestamp": page.next_key[0], "_id": page.next_key[1]})
+                return page.items, total, next_cursor
+            history_buffer_misses_total.inc()
+
+        total = await self._count(query, exact=exact_count)
+
+        page_query = keyset_query(query, after)
+
+        # Busca um item a mais para saber se existe próxima página
+        db_cursor = self.collection.find(page_query).sort(HISTORY_SORT)
+        if skip:
+            db_cursor = db_cursor.skip(skip)
+        db_cursor = db_cursor.limit(limit + 1)
+
+        docs = []
+        async for doc in db_cursor:
+            docs.append(doc)
+
+        next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+        items = [self._serialize_history_item(doc) for doc in docs[:limit]]
+        return items, total, next_cursor
+
+    async def export(
+        self,
+        filters: Optional[HistoryFilters] = None,
+        batch_size: int = 1000,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[List[dict]]:
+        # Percorre o cursor em lotes de `batch_size`: só um lote fica em memória por vez
+        query = build_history_query(filters, self.meta_prefix)
+        db_cursor = self.collection.find(query).sort(EXPORT_SORT).batch_size(batch_size)
+        if limit:
+            db_cursor = db_cursor.limit(limit)
+
+        batch = []
+        async for doc in db_cursor:
+            batch.append(self._serialize_history_item(doc))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _require_rollups(self) -> HistoryRollups:
+        if self.rollups is None:
+            raise RollupsDisabledError("Rollups do histórico desabilitados (HISTORY_ROLLUPS_ENABLED).")
+        return self.rollups
 
-    async def list(self, skip: int = 0, limit: int = 10) -> Tuple[List[dict], int]:
-        total = await self.collection.count_documents({})
-        cursor = self.collection.find({}).skip(skip).limit(limit).sort("timestamp", -1)
-        items = []
-        async for doc in cursor:
-            doc.pop("_id", None)
-            items.append(self._serialize_history_item(doc))
-        return items, total
+    async def analytics(self, filters: Optional[HistoryFilters] = None, unit: str = "hour") -> List[dict]:
+        rollups = self._require_rollups()
+        # Rollups guardam os metadados no topo e o início do bucket em `bucket`
+        match = build_history_query(filters)
+        if "timestamp" in match:
+            match["bucket"] = match.pop("timestamp")
+        return await rollups.summary(match, unit)
+
+    async def backfill_rollups(self, filters: Optional[HistoryFilters] = None):
+        rollups = self._require_rollups()
+        await rollups.backfill(self.collection, build_history_query(filters, self.meta_prefix))
+        logger.info(f"Rollups do histórico recalculados (filtros: {filters.dict() if filters else {}}).")
+
+    async def _count(self, query: dict, exact: bool = False, cache_estimate: bool = False) -> int:
+        if exact:
+            return await self.collection.count_documents(query)
+        if not query and not cache_estimate:
+            # Usa os metadados da collection: O(1), sem varrer documentos
+            return await self.collection.estimated_document_count()
+
+        key = json.dumps(query, sort_keys=True, default=str)
+        cached = self._count_cache.get(key)
+        if cached and cached[1] > monotonic():
+            return cached[0]
+
+        if query:
+            total = await self.collection.count_documents(query)
+        else:
+            # Página vinda do buffer: nem a contagem estimada precisa ir ao MongoDB toda vez
+            total = await self.collection.estimated_document_count()
+        if len(self._count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+            self._count_cache.pop(next(iter(self._count_cache)))
+        self._count_cache[key] = (total, monotonic() + settings.HISTORY_COUNT_CACHE_TTL_SECONDS)
+        return total
+
+    async def load_buffer(self):
+        # Carga completa com os documentos mais recentes (subida da API ou buffer defasado)
+        try:
+            docs = await self.collection.find({}).sort(HISTORY_SORT).limit(self.buffer.max_items).to_list(length=None)
+        except Exception as e:
+            logger.error(f"Erro ao carregar o buffer do histórico: {str(e)}")
+            return
+        self.buffer.replace(
+            [(doc["timestamp"], doc["_id"], self._serialize_history_item(doc)) for doc in docs],
+            exhaustive=len(docs) < self.buffer.max_items,
+        )
+        logger.info(f"Buffer do histórico carregado com {len(self.buffer)} itens.")
+
+    async def refresh_buffer(self):
+        # Traz o que outros workers gravaram desde o item mais novo do buffer (menos a folga
+        # para gravações em lote atrasadas): as chaves em páginas (keyset), do mais novo para
+        # o mais antigo, e depois só os documentos que faltam no buffer
+        newest = self.buffer.newest_timestamp
+        if newest is None:
+            await self.load_buffer()
+            return
+        window = {"timestamp": {"$gte": newest - datetime.timedelta(seconds=self.buffer.refresh_lag)}}
+        keys, after = [], None
+        while len(keys) < self.buffer.max_items:
+            page_size = min(BUFFER_REFRESH_PAGE_SIZE, self.buffer.max_items - len(keys))
+            page = await self.collection.find(keyset_query(window, after), {"_id": 1, "timestamp": 1}) \
+                .sort(HISTORY_SORT).limit(page_size).to_list(length=None)
+            keys.extend(page)
+            if len(page) < page_size:
+                break
+            after = (page[-1]["timestamp"], page[-1]["_id"])
+
+        missing = [key["_id"] for key in keys if key["_id"] not in self.buffer]
+        docs = {}
+        for start in range(0, len(missing), BUFFER_REFRESH_PAGE_SIZE):
+            async for doc in self.collection.find({"_id": {"$in": missing[start:start + BUFFER_REFRESH_PAGE_SIZE]}}):
+                docs[doc["_id"]] = doc
+
+        if len(keys) < self.buffer.max_items:
+            for doc in docs.values():
+                self.buffer.add(doc["timestamp"], doc["_id"], self._serialize_history_item(doc))
+            return
+        # Mais gravações na janela do que o buffer comporta: o buffer passa a ser exatamente
+        # as chaves mais novas, reaproveitando os itens já serializados (sem recarga completa)
+        entries = []
+        for key in keys:
+            item = self.buffer.get(key["_id"])
+            if item is None and key["_id"] in docs:
+                item = self._serialize_history_item(docs[key["_id"]])
+            if item is not None:
+                entries.append((key["timestamp"], key["_id"], item))
+        self.buffer.replace(entries, exhaustive=False)
+
+    async def _run_buffer_refresh(self):
+        while True:
+            await asyncio.sleep(self.buffer.refresh_interval)
+            try:
+                await self.refresh_buffer()
+            except Exception as e:
+                logger.error(f"Erro ao atualizar o buffer do histórico: {str(e)}")
 
     def _serialize_history_item(self, doc: dict) -> dict:
+        # Aceita documentos antigos (payload por linha) e compactos (colunar/zlib, time-series)
+        input_payload, output_payload = decode_payload(doc)
+        meta = doc.get("meta") or doc
         return {
-            "input_payload": doc.get("input_payload", [{}]),
-            "output_payload": doc.get("output_payload", []),
-            "model_name": doc.get("model_name", ""),
-            "model_alias": doc.get("model_alias", ""),
-            "model_version": doc.get("model_version", ""),
+            "input_payload": input_payload,
+            "output_payload": output_payload,
+            "model_name": meta.get("model_name", ""),
+            "model_alias": meta.get("model_alias", ""),
+            "model_version": meta.get("model_version", ""),
             "timestamp": doc["timestamp"].isoformat() if isinstance(doc.get("timestamp"), datetime.datetime) else str(doc.get("timestamp")),
+            "latency_ms": doc.get("latency_ms"),
+            "shadow_of": doc.get("shadow_of"),
         }
-history_service = HistoryService(collection=history_collection)
+
+history_writer = HistoryWriter(
+    collection=history_collection,
+    max_queue=settings.HISTORY_WRITER_MAX_QUEUE,
+    batch_size=settings.HISTORY_WRITER_BATCH_SIZE,
+    flush_interval=settings.HISTORY_WRITER_FLUSH_INTERVAL_SECONDS,
+    backpressure=settings.HISTORY_WRITER_BACKPRESSURE,
+    spill_path=settings.HISTORY_WRITER_SPILL_PATH,
+) if settings.HISTORY_WRITER_ENABLED else None
+
+history_service = HistoryService(
+    collection=history_collection,
+    writer=history_writer,
+    storage_format=settings.HISTORY_STORAGE_FORMAT,
+    compression=settings.HISTORY_COMPRESSION,
+    compression_level=settings.HISTORY_COMPRESSION_LEVEL,
+    ttl_seconds=settings.HISTORY_TTL_DAYS * 86400,
+    timeseries=settings.HISTORY_TIMESERIES,
+    rollups=HistoryRollups(
+        collection=history_rollup_collection,
+        bucket_minutes=settings.HISTORY_ROLLUP_BUCKET_MINUTES,
+        histogram_bins=settings.HISTORY_ROLLUP_HISTOGRAM_BINS,
+        histogram_min=settings.HISTORY_ROLLUP_HISTOGRAM_MIN,
+        histogram_max=settings.HISTORY_ROLLUP_HISTOGRAM_MAX,
+        flush_interval=settings.HISTORY_ROLLUP_FLUSH_INTERVAL_SECONDS,
+    ) if settings.HISTORY_ROLLUPS_ENABLED else None,
+    buffer=RecentHistoryBuffer(
+        max_items=settings.HISTORY_BUFFER_MAX_ITEMS,
+        max_rows=settings.HISTORY_BUFFER_MAX_ROWS,
+        refresh_interval=settings.HISTORY_BUFFER_REFRESH_SECONDS,
+        refresh_lag=settings.HISTORY_BUFFER_REFRESH_LAG_SECONDS,
+    ) if settings.HISTORY_BUFFER_MAX_ITEMS > 0 else None,
+)
+
+# Predições em sombra ficam em collection própria: /history, buffer, contagens e
+# rollups refletem só o tráfego servido. O armazenamento (formato, retenção,
+# time-series) segue o do histórico principal
+shadow_history_service = HistoryService(
+    collection=shadow_history_collection,
+    storage_format=settings.HISTORY_STORAGE_FORMAT,
+    compression=settings.HISTORY_COMPRESSION,
+    compression_level=settings.HISTORY_COMPRESSION_LEVEL,
+    ttl_seconds=settings.HISTORY_TTL_DAYS * 86400,
+    timeseries=settings.HISTORY_TIMESERIES,
+)
 
 def get_history_service() -> HistoryService:
-    return history_service
\ No newline at end of file
+    return history_service
+
+def get_shadow_history_service() -> HistoryService:
+    return shadow_history_service
\ No newline at end of file
@@ -0,0 +1,245 @@
+import asyncio
+import os
+from itertools import islice
+from time import perf_counter
+from typing import Callable, List, Optional
+
+from bson import ObjectId, json_util
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError
+
+from app.core.logger import logger, hot_logger
+from app.services.metrics import (
+    history_queue_depth,
+    history_flush_duration_seconds,
+    history_dropped_total,
+    history_spilled_total,
+)
+
+BACKPRESSURE_POLICIES = ("drop", "block", "spill")
+DUPLICATE_KEY_ERROR = 11000
+
+
+def _only_duplicates(error: Exception) -> bool:
+    # Reenvios (spill) podem conter documentos já gravados: chave duplicada não é falha
+    if not isinstance(error, BulkWriteError):
+        return False
+    details = error.details or {}
+    return not details.get("writeConcernErrors") and all(
+        err.get("code") == DUPLICATE_KEY_ERROR for err in details.get("writeErrors", [])
+    )
+
+
+class HistoryWriter:
+    """
+    Fila limitada em memória que grava o histórico em lote com `insert_many`.
+
+    O flush acontece ao atingir `batch_size` registros ou após `flush_interval`
+    segundos. Com a fila cheia, `backpressure` define o comportamento:
+    descartar (drop), aguardar espaço (block) ou gravar em arquivo NDJSON
+    local (spill), que é reenviado ao MongoDB em lotes quando a fila esvazia.
+    `on_stored`, se definido, recebe cada lote depois de confirmado pelo MongoDB.
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        max_queue: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        backpressure: str = "drop",
+        spill_path: Optional[str] = None,
+        on_stored: Optional[Callable[[List[dict]], None]] = None,
+    ):
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Política de backpressure inválida: {backpressure}")
+        if backpressure == "spill" and not spill_path:
+            raise ValueError("A política 'spill' exige um spill_path.")
+
+        self.collection = collection
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.backpressure = backpressure
+        self.spill_path = spill_path
+        self.on_stored = on_stored
+        self._replay_path = f"{spill_path}.replay" if spill_path else None
+        self._replay_offset = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def enqueue(self, record: dict) -> bool:
+        # False quando o registro é descartado (fila cheia com a política "drop")
+        self.start()
+        accepted = True
+
+        if self.backpressure == "block":
+            await self._queue.put(record)
+        else:
+            try:
+                self._queue.put_nowait(record)
+            except asyncio.QueueFull:
+                if self.backpressure == "spill":
+                    self._spill([record])
+                else:
+                    accepted = False
+                    history_dropped_total.inc()
+                    hot_logger.warning("Fila de histórico cheia, registro descartado.")
+
+        history_queue_depth.set(self._queue.qsize())
+        return accepted
+
+    async def close(self, timeout: float = 10.0):
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout ao drenar fila de histórico; {self._queue.qsize()} registros pendentes.")
+        finally:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        # Registros não gravados a tempo vão para o spill (se configurado)
+        pending = []
+        while not self._queue.empty():
+            pending.append(self._queue.get_nowait())
+            self._queue.task_done()
+        if pending:
+            if self.spill_path:
+                self._spill(pending)
+            else:
+                history_dropped_total.inc(len(pending))
+        history_queue_depth.set(0)
+        logger.info("Escritor de histórico finalizado.")
+
+    async def _run(self):
+        while True:
+            if self._queue.empty() and self._has_spill():
+                await self._replay_spill()
+
+            batch = await self._next_batch()
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                history_queue_depth.set(self._queue.qsize())
+
+    def _has_spill(self) -> bool:
+        return bool(self.spill_path) and (os.path.exists(self._replay_path) or os.path.exists(self.spill_path))
+
+    async def _next_batch(self) -> List[dict]:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            # Drena sem esperar o que já está disponível
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            if len(batch) >= self.batch_size:
+                break
+
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush(self, batch: List[dict]):
+        start_time = perf_counter()
+        try:
+            await self._insert_many(batch)
+            logger.debug("{} registros de histórico gravados no MongoDB.", len(batch))
+        except Exception as e:
+            logger.error(f"Erro ao gravar lote de histórico no MongoDB: {str(e)}")
+            if self.backpressure == "spill":
+                self._spill(batch)
+            else:
+                history_dropped_total.inc(len(batch))
+        finally:
+            history_flush_duration_seconds.observe(perf_counter() - start_time)
+
+    async def _insert_many(self, records: List[dict]):
+        try:
+            await self.collection.insert_many(records, ordered=False)
+        except BulkWriteError as e:
+            if not _only_duplicates(e):
+                raise
+        if self.on_stored is not None:
+            try:
+                self.on_stored(records)
+            except Exception as e:
+                logger.error(f"Erro no callback de histórico gravado: {str(e)}")
+
+    def _spill(self, records: List[dict]):
+        try:
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                for record in records:
+                    # _id fixo no arquivo: um lote reenviado após falha parcial não duplica
+                    # o que já foi gravado (o insert_many trata chave duplicada como sucesso)
+                    if "_id" not in record:
+                        record["_id"] = ObjectId()
+                    f.write(json_util.dumps(record) + "\n")
+            history_spilled_total.inc(len(records))
+        except Exception as e:
+            history_dropped_total.inc(len(records))
+            logger.error(f"Erro ao gravar spill de histórico: {str(e)}")
+
+    async def _replay_spill(self):
+        # Renomeia antes de ler: novos spills durante o replay vão para outro arquivo.
+        # O arquivo de replay é consumido em lotes a partir de um offset em bytes;
+        # numa falha ele fica onde está e a próxima tentativa continua do offset,
+        # sem reler nem regravar o que já foi enviado
+        sent = 0
+        try:
+            if not os.path.exists(self._replay_path):
+                os.replace(self.spill_path, self._replay_path)
+                self._replay_offset = 0
+            with open(self._replay_path, "rb") as f:
+                f.seek(self._replay_offset)
+                while True:
+                    lines = list(islice(f, self.batch_size))
+                    if not lines:
+                        break
+                    records = self._parse_spill(lines)
+                    if records:
+                        await self._insert_many(records)
+                    self._replay_offset = f.tell()
+                    sent += len(records)
+        except Exception as e:
+            logger.error(f"Erro ao reenviar spill de histórico: {str(e)}")
+            if sent:
+                logger.info(f"{sent} registros de histórico reenviados a partir do spill.")
+            return
+
+        os.remove(self._replay_path)
+        self._replay_offset = 0
+        logger.info(f"{sent} registros de histórico reenviados a partir do spill.")
+
+    def _parse_spill(self, lines: List[bytes]) -> List[dict]:
+        records = []
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                records.append(json_util.loads(line))
+            except Exception as e:
+                # Linha truncada (ex.: queda no meio da escrita): não trava o replay
+                history_dropped_total.inc()
+                logger.error(f"Linha inválida no spill de histórico: {str(e)}")
+        return records
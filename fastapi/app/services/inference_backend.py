@@ -0,0 +1,163 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services import inference_worker
+from app.services.metrics import inference_worker_restarts_total
+
+BACKEND_THREAD = "thread"
+BACKEND_PROCESS = "process"
+
+
+def _write_ipc(table: pa.Table, sink):
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def frame_to_shared_memory(df: pd.DataFrame) -> Tuple[shared_memory.SharedMemory, int]:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Mede o stream antes, para escrevê-lo direto no bloco compartilhado sem cópia intermediária
+    mock = pa.MockOutputStream()
+    _write_ipc(table, mock)
+    size = mock.size()
+
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    try:
+        _write_ipc(table, pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf)))
+    except BaseException:
+        shm.close()
+        shm.unlink()
+        raise
+    return shm, size
+
+
+class ProcessInferenceBackend:
+    """
+    Executa `model.predict` em um pool de processos, fora do GIL do worker HTTP.
+
+    Cada processo carrega cada modelo uma única vez (a partir dos artefatos
+    locais ou de models:/nome/versão) e o mantém em memória. O DataFrame de
+    entrada é serializado como Arrow IPC em um bloco de memória compartilhada,
+    de modo que apenas o nome do bloco trafega pelo pipe. Se um processo
+    morrer, o pool é recriado e a predição é repetida uma vez.
+
+    `preload` carrega um modelo em todos os processos quando ele é registrado,
+    para que a primeira requisição de cada processo não pague a carga; um pool
+    recriado já sobe com os modelos pré-carregados mais recentes.
+    """
+
+    def __init__(self, max_workers: int = None, max_models_per_worker: int = 2, tracking_uri: str = None,
+                 preload_timeout: float = 60.0):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_models_per_worker = max_models_per_worker
+        self.tracking_uri = tracking_uri
+        self.preload_timeout = preload_timeout
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._barrier = None
+        self._sources: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._preload_lock = threading.Lock()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn: o processo pai tem threads (loop, executores), fork não é seguro
+                context = multiprocessing.get_context("spawn")
+                self._barrier = context.Barrier(self.max_workers)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=context,
+                    initializer=inference_worker.init_worker,
+                    initargs=(self.tracking_uri, self.max_models_per_worker, self._barrier, tuple(self._sources)),
+                )
+            return self._pool
+
+    def preload(self, source: str) -> set:
+        # Uma tarefa por processo: a barreira impede que um processo pegue duas
+        with self._preload_lock:
+            self._sources[source] = None
+            self._sources.move_to_end(source)
+            while len(self._sources) > self.max_models_per_worker:
+                self._sources.popitem(last=False)
+
+            for attempt in range(2):
+                pool = self._get_pool()
+                barrier = self._barrier
+                futures = [
+                    pool.submit(inference_worker.preload, source, self.preload_timeout)
+                    for _ in range(self.max_workers)
+                ]
+                try:
+                    return {future.result(timeout=self.preload_timeout) for future in futures}
+                except FutureTimeoutError:
+                    # Processos ocupados: os que faltam carregam o modelo na primeira predição
+                    logger.warning(f"Pré-carga de {source} nos processos de inferência excedeu {self.preload_timeout}s.")
+                    return set()
+                except BrokenProcessPool:
+                    self._replace_pool(pool)
+                    if attempt:
+                        raise
+                finally:
+                    barrier.reset()
+
+    def _replace_pool(self, broken: ProcessPoolExecutor):
+        with self._lock:
+            # Outra requisição pode já ter recriado o pool
+            if self._pool is broken:
+                self._pool = None
+                broken.shutdown(wait=False, cancel_futures=True)
+                inference_worker_restarts_total.inc()
+                logger.warning("Processo de inferência encerrado inesperadamente; recriando o pool.")
+
+    async def predict(self, source: str, df: pd.DataFrame):
+        try:
+            shm, size = frame_to_shared_memory(df)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            # Tipos sem representação Arrow: envia o DataFrame serializado pelo pipe
+            logger.warning(f"DataFrame sem conversão para Arrow ({str(e)}); usando pickle.")
+            return await self._submit(inference_worker.predict_pickled, source, df)
+
+        try:
+            return await self._submit(inference_worker.predict_shared, source, shm.name, size)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    async def _submit(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = self._get_pool()
+            try:
+                return await asyncio.wrap_future(pool.submit(fn, *args), loop=loop)
+            except BrokenProcessPool:
+                self._replace_pool(pool)
+                if attempt:
+                    raise
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+
+inference_backend = ProcessInferenceBackend(
+    max_workers=settings.INFERENCE_PROCESS_WORKERS,
+    max_models_per_worker=settings.INFERENCE_PROCESS_MAX_MODELS,
+    tracking_uri=settings.MLFLOW_TRACKING_URI,
+    preload_timeout=settings.INFERENCE_PROCESS_PRELOAD_TIMEOUT_SECONDS,
+) if settings.INFERENCE_BACKEND == BACKEND_PROCESS else None
+
+def get_inference_backend() -> Optional[ProcessInferenceBackend]:
+    return inference_backend
@@ -0,0 +1,74 @@
+# Código executado dentro dos processos do pool de inferência.
+# Mantido sem dependências de app.core (settings, métricas) para que o
+# processo filho suba rápido e não abra conexões desnecessárias.
+import os
+import threading
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import mlflow
+import pyarrow as pa
+
+# Modelos já carregados neste processo, por origem (caminho local ou models:/nome/versão)
+_models: "OrderedDict[str, object]" = OrderedDict()
+_max_models = 2
+# Barreira compartilhada pelos processos do pool: garante que cada processo
+# receba exatamente uma tarefa de pré-carga
+_barrier = None
+
+
+def init_worker(tracking_uri: str, max_models: int, barrier=None, sources=()):
+    global _max_models, _barrier
+    _max_models = max_models
+    _barrier = barrier
+    if tracking_uri:
+        mlflow.set_tracking_uri(tracking_uri)
+    # Processo novo (pool recriado): já sobe com os modelos em uso
+    for source in sources:
+        try:
+            _get_model(source)
+        except Exception:
+            pass
+
+
+def _get_model(source: str):
+    model = _models.get(source)
+    if model is None:
+        model = mlflow.pyfunc.load_model(source)
+        _models[source] = model
+        while len(_models) > _max_models:
+            _models.popitem(last=False)
+    _models.move_to_end(source)
+    return model
+
+
+def preload(source: str, timeout: float) -> int:
+    _get_model(source)
+    if _barrier is not None:
+        try:
+            _barrier.wait(timeout)
+        except threading.BrokenBarrierError:
+            pass
+    return os.getpid()
+
+
+def _read_shared_frame(shm_name: str, size: int):
+    # O bloco pertence ao processo pai, que faz o unlink (com spawn, o
+    # resource_tracker é compartilhado com o pai)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        buffer = pa.py_buffer(shm.buf[:size])
+        table = pa.ipc.open_stream(buffer).read_all()
+        df = table.to_pandas()
+        del buffer, table
+        return df
+    finally:
+        shm.close()
+
+
+def predict_shared(source: str, shm_name: str, size: int):
+    return _get_model(source).predict(_read_shared_frame(shm_name, size))
+
+
+def predict_pickled(source: str, df):
+    return _get_model(source).predict(df)
@@ -0,0 +1,119 @@
+import asyncio
+import datetime
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from app.core.logger import logger
+from app.services.model_service import ModelRegistry, get_model_registry
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+@dataclass
+class LoadJob:
+    model_name: str
+    alias: Optional[str] = None
+    version: Optional[str] = None
+    shadow: bool = False
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = JOB_PENDING
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    created_at: datetime.datetime = field(default_factory=datetime.datetime.utcnow)
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+    future: Optional[asyncio.Future] = field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in (JOB_SUCCEEDED, JOB_FAILED)
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "model_name": self.model_name,
+            "alias": self.alias,
+            "version": self.version,
+            "shadow": self.shadow,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class LoadJobManager:
+    """
+    Executa carregamentos de modelo em uma thread dedicada, fora do event loop
+    e do executor de inferência, e guarda o status dos jobs mais recentes.
+    """
+
+    def __init__(self, registry_factory: Callable[[], ModelRegistry], max_jobs: int = 100):
+        self.registry_factory = registry_factory
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, LoadJob]" = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model-loader")
+
+    def submit(self, model_name: str, alias: str = None, version: str = None, shadow: bool = False) -> LoadJob:
+        # Reaproveita um job idêntico ainda em andamento
+        for job in self._jobs.values():
+            if not job.done and (job.model_name, job.alias, job.version, job.shadow) == (model_name, alias, version, shadow):
+                return job
+
+        job = LoadJob(model_name=model_name, alias=alias, version=version, shadow=shadow)
+        self._jobs[job.job_id] = job
+        self._evict_finished()
+
+        loop = asyncio.get_running_loop()
+        job.future = loop.run_in_executor(self._executor, self._run, job)
+        logger.info(f"Job de carregamento {job.job_id} criado para o modelo {model_name}.")
+        return job
+
+    def _evict_finished(self):
+        # Só jobs concluídos saem do histórico: o status de um job em andamento
+        # precisa continuar consultável (pode exceder max_jobs temporariamente)
+        overflow = len(self._jobs) - self.max_jobs
+        if overflow <= 0:
+            return
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done][:overflow]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[LoadJob]:
+        return self._jobs.get(job_id)
+
+    async def wait(self, job: LoadJob) -> LoadJob:
+        if job.future is not None:
+            await asyncio.shield(job.future)
+        return job
+
+    def _run(self, job: LoadJob):
+        job.status = JOB_RUNNING
+        job.started_at = datetime.datetime.utcnow()
+        try:
+            job.result = self.registry_factory().load_model(
+                model_name=job.model_name,
+                alias=job.alias,
+                version=job.version,
+                shadow=job.shadow,
+            )
+            job.status = JOB_SUCCEEDED
+        except Exception as e:
+            job.error = str(e)
+            job.status = JOB_FAILED
+            logger.error(f"Job de carregamento {job.job_id} falhou: {str(e)}")
+        finally:
+            job.finished_at = datetime.datetime.utcnow()
+
+
+load_job_manager = LoadJobManager(registry_factory=get_model_registry)
+
+def get_load_job_manager() -> LoadJobManager:
+    return load_job_manager
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Histogram
+from prometheus_client import Counter, Gauge, Histogram
 
 # Predições
 predictions_total = Counter(
@@ -31,4 +31,241 @@ model_load_duration_seconds = Histogram(
 inference_duration_seconds = Histogram(
     "inference_duration_seconds", 
     "Duração da inferência (s)"
-)
\ No newline at end of file
+)
+
+# Micro-batching
+predict_batch_size_rows = Histogram(
+    "predict_batch_size_rows",
+    "Número de linhas por lote agregado de inferência",
+    buckets=[1, 2, 5, 10, 25, 50, 100, 250, 500, 1000]
+)
+
+predict_batch_queue_wait_seconds = Histogram(
+    "predict_batch_queue_wait_seconds",
+    "Tempo (s) que uma requisição aguarda na fila de micro-batching",
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25]
+)
+
+
+# Escrita assíncrona do histórico
+history_queue_depth = Gauge(
+    "history_queue_depth",
+    "Registros de histórico aguardando gravação no MongoDB"
+)
+
+history_flush_duration_seconds = Histogram(
+    "history_flush_duration_seconds",
+    "Duração (s) de cada insert_many do histórico",
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5]
+)
+
+history_dropped_total = Counter(
+    "history_dropped_total",
+    "Registros de histórico descartados (fila cheia ou falha de gravação)"
+)
+
+history_spilled_total = Counter(
+    "history_spilled_total",
+    "Registros de histórico desviados para o arquivo de spill"
+)
+
+history_rollup_flush_duration_seconds = Histogram(
+    "history_rollup_flush_duration_seconds",
+    "Duração (s) de cada gravação em lote dos rollups do histórico",
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5]
+)
+
+history_rollup_pending_buckets = Gauge(
+    "history_rollup_pending_buckets",
+    "Buckets de rollup com incrementos ainda não gravados no MongoDB"
+)
+
+history_buffer_hits_total = Counter(
+    "history_buffer_hits_total",
+    "Páginas do /history respondidas pelo buffer em memória"
+)
+
+history_buffer_misses_total = Counter(
+    "history_buffer_misses_total",
+    "Páginas do /history que precisaram consultar o MongoDB"
+)
+
+history_buffer_items = Gauge(
+    "history_buffer_items",
+    "Itens do histórico no buffer em memória"
+)
+
+
+# Registro multi-modelo
+registry_model_loads_total = Counter(
+    "registry_model_loads_total",
+    "Carregamentos de modelo por nome/versão",
+    ["model_name", "model_version"]
+)
+
+registry_model_hits_total = Counter(
+    "registry_model_hits_total",
+    "Requisições de predição roteadas para cada modelo carregado",
+    ["model_name", "model_version"]
+)
+
+registry_model_evictions_total = Counter(
+    "registry_model_evictions_total",
+    "Modelos removidos da memória por LRU ao exceder o orçamento",
+    ["model_name", "model_version"]
+)
+
+registry_models_loaded = Gauge(
+    "registry_models_loaded",
+    "Quantidade de modelos carregados em memória"
+)
+
+registry_model_memory_bytes = Gauge(
+    "registry_model_memory_bytes",
+    "Memória estimada (RSS, bytes) ocupada por cada modelo carregado",
+    ["model_name", "model_version"]
+)
+
+
+# Cache local de artefatos de modelo
+model_cache_hits_total = Counter(
+    "model_cache_hits_total",
+    "Carregamentos de modelo servidos pelo cache local de artefatos"
+)
+
+model_cache_misses_total = Counter(
+    "model_cache_misses_total",
+    "Carregamentos de modelo que precisaram baixar os artefatos do MLflow"
+)
+
+model_cache_evictions_total = Counter(
+    "model_cache_evictions_total",
+    "Versões de modelo removidas do cache local por limite de tamanho"
+)
+
+model_cache_size_bytes = Gauge(
+    "model_cache_size_bytes",
+    "Tamanho total (bytes) do cache local de artefatos"
+)
+
+
+# Cache de predições por linha
+prediction_cache_hits_total = Counter(
+    "prediction_cache_hits_total",
+    "Linhas de predição servidas pelo cache"
+)
+
+prediction_cache_misses_total = Counter(
+    "prediction_cache_misses_total",
+    "Linhas de predição que precisaram ir ao modelo"
+)
+
+prediction_cache_hit_ratio = Gauge(
+    "prediction_cache_hit_ratio",
+    "Proporção acumulada de linhas servidas pelo cache"
+)
+
+prediction_cache_entries = Gauge(
+    "prediction_cache_entries",
+    "Entradas atualmente no cache de predições"
+)
+
+
+inference_worker_restarts_total = Counter(
+    "inference_worker_restarts_total",
+    "Total de vezes que o pool de processos de inferência foi recriado"
+)
+
+
+# Controle de admissão da inferência
+inference_queue_depth = Gauge(
+    "inference_queue_depth",
+    "Inferências aguardando vaga no scheduler"
+)
+
+inference_in_flight = Gauge(
+    "inference_in_flight",
+    "Inferências em execução"
+)
+
+inference_rejections_total = Counter(
+    "inference_rejections_total",
+    "Inferências recusadas pelo controle de admissão",
+    ["reason"]
+)
+
+
+# Checagens de saúde em segundo plano
+health_check_up = Gauge(
+    "health_check_up",
+    "Resultado da última checagem de saúde (1 = ok)",
+    ["component"]
+)
+
+health_check_latency_seconds = Gauge(
+    "health_check_latency_seconds",
+    "Latência da última checagem de saúde",
+    ["component"]
+)
+
+
+# Latência por etapa do pipeline de predição
+predict_stage_duration_seconds = Histogram(
+    "predict_stage_duration_seconds",
+    "Duração de cada etapa da predição (frame, validate, cache, preprocess, queue, model, postprocess, history)",
+    ["stage", "model_name", "model_version"],
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+)
+
+predict_rows_per_request = Histogram(
+    "predict_rows_per_request",
+    "Quantidade de linhas por requisição de predição",
+    ["model_name", "model_version"],
+    buckets=[1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+)
+
+
+# Drift das features de entrada
+feature_drift_psi = Gauge(
+    "feature_drift_psi",
+    "PSI da distribuição recente de cada feature em relação ao perfil de referência",
+    ["model_name", "model_version", "feature"]
+)
+
+feature_drift_window_rows = Gauge(
+    "feature_drift_window_rows",
+    "Linhas (com decaimento) na janela de drift de cada modelo",
+    ["model_name", "model_version"]
+)
+
+drift_batches_dropped_total = Counter(
+    "drift_batches_dropped_total",
+    "Lotes ignorados pelo monitor de drift por fila cheia"
+)
+
+
+# Inferência em sombra (modelo challenger)
+shadow_predictions_total = Counter(
+    "shadow_predictions_total",
+    "Lotes enviados ao modelo em sombra, por resultado (success, error, timeout, dropped)",
+    ["model_name", "model_version", "outcome"]
+)
+
+shadow_inference_duration_seconds = Histogram(
+    "shadow_inference_duration_seconds",
+    "Duração da inferência do modelo em sombra (validação, pré/pós-processamento e modelo)",
+    ["model_name", "model_version"],
+    buckets=[0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+)
+
+shadow_rows_total = Counter(
+    "shadow_rows_total",
+    "Linhas preditas pelo modelo em sombra",
+    ["model_name", "model_version"]
+)
+
+shadow_rows_mismatched_total = Counter(
+    "shadow_rows_mismatched_total",
+    "Linhas em que a predição em sombra difere da do modelo principal",
+    ["model_name", "model_version"]
+)
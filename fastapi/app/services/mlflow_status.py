@@ -1,8 +1,9 @@
 
 from app.core.config import settings
 from app.core.logger import logger
+import asyncio
 import requests
-from app.core.config import settings
+from app.services.health_prober import health_prober
 
 def check_mlflow_connection(timeout=1.5):
     try:
@@ -20,5 +21,12 @@ def check_mlflow_connection(timeout=1.5):
         logger.error(f"Erro ao checar o MLflow: {str(e)}")
         return False
     
+async def check_mlflow_connection_async():
+    # requests é síncrono: roda em thread para não bloquear o event loop
+    return await asyncio.to_thread(check_mlflow_connection)
+
+health_prober.register("mlflow", check_mlflow_connection_async)
+
 def get_mlflow_status():
-    return check_mlflow_connection()
\ No newline at end of file
+    # Último resultado da checagem em segundo plano
+    return health_prober.result("mlflow").ok
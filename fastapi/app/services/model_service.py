@@ -1,7 +1,14 @@
+import gc
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional, Type
+
 import mlflow
 import pandas as pd
+import psutil
+from pydantic import BaseModel
 from mlflow.pyfunc import PyFuncModel
-from mlflow.models import Model
 from mlflow.models.signature import ModelSignature
 from mlflow.tracking import MlflowClient  # IMPORTAÇÃO ADICIONADA
 from app.services.metrics import (
@@ -11,52 +18,266 @@ from app.services.metrics import (
     model_load_errors_total,
     model_load_duration_seconds,
     inference_duration_seconds,
+    registry_model_loads_total,
+    registry_model_hits_total,
+    registry_model_evictions_total,
+    registry_models_loaded,
+    registry_model_memory_bytes,
+    predict_stage_duration_seconds,
+    predict_rows_per_request,
 )
-from app.core.logger import logger
+from app.core.logger import logger, hot_logger
 from app.core.config import settings
 from app.utils import preprocessor, postprocessor
+from app.utils.validator import InputValidator, compile_validator
+from app.schemas.predict import build_request_model
+from app.utils.warmup import warmup_model
+from app.utils.timing import current_timer, stage_timer
 
 from time import perf_counter
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
 from app.services.history_service import get_history_service
+from app.services.batcher import PredictBatcher
+from app.services.artifact_cache import get_artifact_cache
+from app.services.prediction_cache import MISS, get_prediction_cache
+from app.services.drift import get_drift_monitor
+from app.services.shadow import get_shadow_runner
+from app.services.inference_backend import get_inference_backend
+from app.services.scheduler import (
+    AdmissionError,
+    check_deadline,
+    default_concurrency,
+    get_inference_scheduler,
+    request_deadline,
+)
 
-executor = ThreadPoolExecutor()
+# Dimensionado pelo limite de concorrência do scheduler: a fila fica no scheduler, não no executor
+executor = ThreadPoolExecutor(max_workers=default_concurrency())
 
 async def run_predict_sync(model, df_pre):
     loop = asyncio.get_running_loop()
     return await loop.run_in_executor(executor, model.predict, df_pre)
 
+async def _run_backend(loaded: "LoadedModel", df_pre):
+    backend = get_inference_backend()
+    if backend is not None:
+        return await backend.predict(loaded.source, df_pre)
+    return await run_predict_sync(loaded.model, df_pre)
+
+async def run_predict(loaded: "LoadedModel", df_pre, deadline: Optional[float] = None):
+    return await get_inference_scheduler().run(_run_backend, loaded, df_pre, deadline=deadline)
+
+# O lambda resolve run_predict em tempo de chamada (permite patch nos testes)
+batcher = PredictBatcher(
+    runner=lambda loaded, df_pre: run_predict(loaded, df_pre),
+    max_rows=settings.PREDICT_BATCH_MAX_ROWS,
+    window_ms=settings.PREDICT_BATCH_WINDOW_MS,
+)
+
 history_service = get_history_service()
 
+
+class ModelNotLoadedError(RuntimeError):
+    pass
+
+
+def model_key(model_name: str, model_version: str) -> str:
+    return f"{model_name}/{model_version}"
+
+
+@dataclass(frozen=True)
+class LoadedModel:
+    model: Any
+    model_name: str
+    model_version: str
+    model_uri: str
+    model_alias: Optional[str] = None
+    signature: Optional[ModelSignature] = None
+    input_schema: Any = None
+    memory_bytes: int = 0
+    # Caminho dos artefatos locais, usado pelos processos de inferência para carregar o modelo
+    artifact_path: Optional[str] = None
+    validator: Optional[InputValidator] = field(default=None, init=False, compare=False)
+    request_model: Optional[Type[BaseModel]] = field(default=None, init=False, compare=False)
+
+    def __post_init__(self):
+        # Validador e modelo de requisição compilados uma única vez por modelo carregado
+        object.__setattr__(self, "validator", compile_validator(self.input_schema))
+        if self.input_schema is not None:
+            object.__setattr__(
+                self, "request_model",
+                build_request_model(self.input_schema, name=f"PredictRequest_{self.model_name}_{self.model_version}"),
+            )
+
+    @property
+    def key(self) -> str:
+        return model_key(self.model_name, self.model_version)
+
+    @property
+    def source(self) -> str:
+        # Versão fixa: o alias pode passar a apontar para outra versão depois do carregamento
+        return self.artifact_path or f"models:/{self.model_name}/{self.model_version}"
+
+    def matches(self, model_name: str = None, version: str = None, alias: str = None) -> bool:
+        return (
+            (model_name is None or self.model_name == model_name)
+            and (version is None or self.model_version == str(version))
+            and (alias is None or self.model_alias == alias)
+        )
+
+    def describe(self) -> dict:
+        return {
+            "model_name": self.model_name,
+            "model_version": self.model_version,
+            "model_alias": self.model_alias,
+            "model_uri": self.model_uri,
+            "memory_bytes": self.memory_bytes,
+        }
+
+
+def _current_rss() -> int:
+    return psutil.Process().memory_info().rss
+
+
 class ModelRegistry:
     _instance = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(ModelRegistry, cls).__new__(cls)
-            cls._instance._model = None
-            cls._instance._signature = None
-            cls._instance._model_uri = None
-            cls._instance._input_schema = None
-            cls._instance._model_version = None
-            cls._instance._model_alias = None
+            # Modelos carregados em ordem LRU (o mais recente no fim)
+            cls._instance._models = OrderedDict()
+            cls._instance._default_key = None
+            # Challenger em sombra: recebe cópias do tráfego do modelo padrão, nunca responde
+            cls._instance._shadow_key = None
+            cls._instance._lock = threading.RLock()
+            # Serializa as cargas: a memória de cada modelo é medida pelo delta de RSS
+            # do processo, que misturaria cargas concorrentes
+            cls._instance._load_lock = threading.Lock()
         return cls._instance
 
-    def is_model_loaded(self) -> bool:
-        return self._model is not None
+    def _find(self, model_name: str = None, version: str = None, alias: str = None) -> Optional[LoadedModel]:
+        with self._lock:
+            default = self._models.get(self._default_key) if self._default_key else None
+            if model_name is None and version is None and alias is None:
+                return default
+            if default is not None and default.matches(model_name, version, alias):
+                return default
+            for loaded in reversed(self._models.values()):
+                if loaded.matches(model_name, version, alias):
+                    return loaded
+            return None
+
+    def resolve(self, model_name: str = None, version: str = None, alias: str = None) -> LoadedModel:
+        loaded = self._find(model_name, version, alias)
+        if loaded is None:
+            if model_name is None and version is None and alias is None:
+                raise ModelNotLoadedError("Modelo ainda não foi carregado.")
+            raise ModelNotLoadedError(
+                f"Modelo não carregado: nome={model_name}, versão={version}, alias={alias}"
+            )
+
+        with self._lock:
+            if loaded.key in self._models:
+                self._models.move_to_end(loaded.key)
+        registry_model_hits_total.labels(loaded.model_name, loaded.model_version).inc()
+        return loaded
+
+    def register(self, loaded: LoadedModel, make_default: bool = True, shadow: bool = False):
+        with self._lock:
+            self._models[loaded.key] = loaded
+            self._models.move_to_end(loaded.key)
+            if shadow:
+                self._shadow_key = loaded.key
+            elif make_default or self._default_key is None:
+                self._default_key = loaded.key
+                if self._shadow_key == loaded.key:
+                    # Challenger promovido a modelo padrão: deixa de rodar em sombra
+                    self._shadow_key = None
+            evicted = self._evict_over_budget(protected=loaded.key)
+            registry_models_loaded.set(len(self._models))
+
+        registry_model_memory_bytes.labels(loaded.model_name, loaded.model_version).set(loaded.memory_bytes)
+        for model in evicted:
+            if model.artifact_path:
+                self._unpin_artifacts(model.model_name, model.model_version)
+        if evicted:
+            gc.collect()
+
+        # Predições em cache da versão recarregada não são mais confiáveis; as das
+        # demais versões (ex.: o modelo padrão ao carregar uma sombra) continuam válidas
+        prediction_cache = get_prediction_cache()
+        if prediction_cache is not None:
+            prediction_cache.invalidate(loaded.model_name, loaded.model_version)
+
+    def _evict_over_budget(self, protected: str) -> list:
+        budget = settings.MODEL_MEMORY_BUDGET_MB * 1024 * 1024
+        if budget <= 0:
+            return []
+
+        evicted = []
+        used = sum(m.memory_bytes for m in self._models.values())
+        for key in list(self._models.keys()):
+            if used <= budget:
+                break
+            if key in (protected, self._default_key, self._shadow_key):
+                continue
+            loaded = self._models.pop(key)
+            used -= loaded.memory_bytes
+            evicted.append(loaded)
+            registry_model_evictions_total.labels(loaded.model_name, loaded.model_version).inc()
+            try:
+                registry_model_memory_bytes.remove(loaded.model_name, loaded.model_version)
+            except KeyError:
+                pass
+            logger.info(f"Modelo {loaded.key} removido da memória (LRU, orçamento {settings.MODEL_MEMORY_BUDGET_MB} MB).")
+
+        if used > budget:
+            logger.warning(f"Modelos carregados ocupam ~{used / 1024 / 1024:.0f} MB, acima do orçamento configurado.")
+        return evicted
+
+    def list_models(self) -> list:
+        with self._lock:
+            return [
+                {**loaded.describe(), "default": key == self._default_key, "shadow": key == self._shadow_key}
+                for key, loaded in reversed(self._models.items())
+            ]
+
+    def input_schemas(self, model_name: str = None, version: str = None) -> list:
+        # Input schemas (assinatura MLflow) dos modelos carregados que atendem ao filtro
+        with self._lock:
+            return [
+                loaded.input_schema for loaded in self._models.values()
+                if loaded.input_schema is not None and loaded.matches(model_name, version)
+            ]
+
+    def shadow_model(self) -> Optional[LoadedModel]:
+        with self._lock:
+            return self._models.get(self._shadow_key) if self._shadow_key else None
+
+    def clear_shadow(self) -> Optional[LoadedModel]:
+        with self._lock:
+            shadow, self._shadow_key = self.shadow_model(), None
+        return shadow
+
+    def is_model_loaded(self, model_name: str = None, version: str = None, alias: str = None) -> bool:
+        return self._find(model_name, version, alias) is not None
 
     def get_model_uri(self) -> str:
-        return self._model_uri
+        loaded = self._find()
+        return loaded.model_uri if loaded else None
 
     def get_model_version(self) -> str:
-        return self._model_version
-    
+        loaded = self._find()
+        return loaded.model_version if loaded else None
+
     def get_model_alias(self) -> str:
-        return self._model_alias
+        loaded = self._find()
+        return loaded.model_alias if loaded else None
 
-    def load_model(self, model_name: str, alias: str = None, version: str = None):
+    def load_model(self, model_name: str, alias: str = None, version: str = None, shadow: bool = False):
         mlflow.set_tracking_uri(settings.MLFLOW_TRACKING_URI)
         client = MlflowClient(tracking_uri=settings.MLFLOW_TRACKING_URI)
 
@@ -73,111 +294,237 @@ class ModelRegistry:
 
         logger.info(f"Iniciando carregamento do modelo: {model_uri}")
         start_time = perf_counter()
+        artifact_path = None
 
         try:
-            loaded_model = mlflow.pyfunc.load_model(model_uri)
-            model_meta = Model.load(model_uri)
-            loaded_signature = model_meta.signature
-            loaded_input_schema = loaded_signature.inputs if loaded_signature else None
-
-            self._model = loaded_model
-            self._signature = loaded_signature
-            self._model_uri = model_uri
-            self._input_schema = loaded_input_schema
-            self._model_version = version
-            self._model_alias = alias
+            with self._load_lock:
+                rss_before = _current_rss()
+                artifact_path = self._local_artifacts(model_name, version)
+                loaded_model = mlflow.pyfunc.load_model(artifact_path or model_uri)
+                memory_bytes = max(_current_rss() - rss_before, 0)
+            # O MLmodel já vem junto do pyfunc: não é preciso buscá-lo de novo com Model.load
+            loaded_signature = loaded_model.metadata.signature
+
+            loaded = LoadedModel(
+                model=loaded_model,
+                model_name=model_name,
+                model_version=str(version),
+                model_uri=model_uri,
+                model_alias=alias,
+                signature=loaded_signature,
+                input_schema=loaded_signature.inputs if loaded_signature else None,
+                memory_bytes=memory_bytes,
+                artifact_path=artifact_path,
+            )
+
+            if settings.MODEL_WARMUP_ENABLED:
+                warmup_model(
+                    loaded.model,
+                    loaded.input_schema,
+                    n_rows=settings.MODEL_WARMUP_ROWS,
+                    runs=settings.MODEL_WARMUP_RUNS,
+                )
+
+            backend = get_inference_backend()
+            if backend is not None:
+                # Os processos de inferência carregam o modelo antes de ele receber tráfego
+                backend.preload(loaded.source)
+
+            # Troca atômica: todo o estado do modelo entra no registro de uma só vez
+            self.register(loaded, shadow=shadow)
 
             duration = perf_counter() - start_time
             model_loads_total.inc()
             model_load_duration_seconds.observe(duration)
+            registry_model_loads_total.labels(loaded.model_name, loaded.model_version).inc()
 
-            logger.info(f"Modelo carregado com sucesso em {duration:.2f}s: {model_uri} (versão: {self._model_version})")
-            return {"status": "modelo carregado com sucesso", "model_uri": model_uri, "model_version": self._model_version}
+            logger.info(
+                f"Modelo carregado com sucesso em {duration:.2f}s: {model_uri} (versão: {loaded.model_version})"
+                + (" em sombra" if shadow else "")
+            )
+            return {
+                "status": "modelo carregado com sucesso",
+                "model_uri": model_uri,
+                "model_version": loaded.model_version,
+                "shadow": shadow,
+            }
 
         except Exception as e:
             model_load_errors_total.inc()
+            if artifact_path and not self.is_model_loaded(model_name, version=str(version)):
+                self._unpin_artifacts(model_name, str(version))
             logger.error(f"Erro ao carregar o modelo {model_uri}: {str(e)}")
             raise RuntimeError(f"Falha ao carregar modelo {model_uri}: {str(e)}")
 
-    async def predict(self, data: list[dict]):
-        if self._model is None:
+    def _local_artifacts(self, model_name: str, version: str) -> Optional[str]:
+        cache = get_artifact_cache()
+        if cache is None:
+            return None
+        try:
+            # Fixado enquanto o modelo estiver carregado: a limpeza LRU não o apaga do disco
+            return cache.fetch(model_name, version, pin=True)
+        except Exception as e:
+            logger.warning(f"Cache de artefatos indisponível ({str(e)}); carregando direto do MLflow.")
+            return None
+
+    def _unpin_artifacts(self, model_name: str, version: str):
+        cache = get_artifact_cache()
+        if cache is None:
+            return
+        try:
+            cache.unpin(model_name, version)
+        except Exception as e:
+            logger.warning(f"Erro ao liberar artefatos de {model_name}/{version} no cache: {str(e)}")
+
+    async def predict(self, data: list[dict], model_name: str = None, version: str = None, alias: str = None):
+        return await self._predict(data=data, model_name=model_name, version=version, alias=alias)
+
+    async def predict_frame(self, df: pd.DataFrame, model_name: str = None, version: str = None, alias: str = None):
+        # Entrada já colunar (ex.: Arrow/Parquet): evita o caminho via lista de dicts
+        return await self._predict(df=df, model_name=model_name, version=version, alias=alias)
+
+    async def _predict(self, data: list[dict] = None, df: pd.DataFrame = None,
+                       model_name: str = None, version: str = None, alias: str = None):
+        try:
+            # Captura uma única vez o modelo usado em toda a requisição
+            loaded = self.resolve(model_name, version, alias)
+        except ModelNotLoadedError:
             logger.error("Tentativa de predição sem modelo carregado.")
-            raise RuntimeError("Modelo ainda não foi carregado.")
+            raise
 
         start_time = perf_counter()
 
-        try:
-            self._validate_input(data)
+        with stage_timer() as timer:
+            try:
+                return await self._run_stages(timer, loaded, data, df)
 
-            df = pd.DataFrame(data)
-            logger.info(f"Input de predição recebido com shape {df.shape}")
+            except AdmissionError as e:
+                # Recusa por sobrecarga/prazo: a rota responde 429/503 sem embrulhar o erro
+                hot_logger.warning("Predição recusada pelo controle de admissão: {}", e)
+                raise
 
-            df_pre = preprocessor.preprocess(df)
+            except Exception as e:
+                prediction_errors_total.inc()
+                logger.error(f"Erro durante predição: {str(e)}")
+                raise RuntimeError(f"Erro na predição: {str(e)}")
 
-            # Executa a predição síncrona em executor
-            preds = await run_predict_sync(self._model, df_pre)
+            finally:
+                duration = perf_counter() - start_time
+                inference_duration_seconds.observe(duration)
+                for stage, seconds in timer.stages.items():
+                    predict_stage_duration_seconds.labels(stage, loaded.model_name, loaded.model_version).observe(seconds)
 
-            post_preds = postprocessor.postprocess(preds)
+    async def _run_stages(self, timer, loaded: LoadedModel, data: list[dict], df: pd.DataFrame) -> list:
+        start_time = perf_counter()
+        with timer.stage("frame"):
+            if df is None:
+                df = pd.DataFrame(data)
+        with timer.stage("validate"):
+            self._validate_input(loaded, data, df)
+
+        predict_rows_per_request.labels(loaded.model_name, loaded.model_version).observe(len(df))
+        drift_monitor = get_drift_monitor()
+        if drift_monitor is not None:
+            # Só enfileira: as contagens de drift são atualizadas fora da requisição
+            drift_monitor.submit(loaded, df)
+        hot_logger.info("Input de predição recebido com shape {}", df.shape)
+
+        prediction_cache = get_prediction_cache()
+        if prediction_cache is None:
+            post_preds = await self._infer(loaded, df)
+        else:
+            post_preds = await self._infer_cached(prediction_cache, loaded, data, df)
 
-            predictions_total.inc()
-            logger.info(f"Predição realizada com sucesso. Total: {len(post_preds)}")
+        predictions_total.inc()
+        hot_logger.info("Predição realizada com sucesso. Total: {}", len(post_preds))
+        primary_seconds = perf_counter() - start_time
 
-            # Grava histórico no MongoDB (await pois é async)
+        # Grava histórico no MongoDB (await pois é async)
+        with timer.stage("history"):
             await history_service.add(
-                input_payload=data,
+                input_payload=data if data is not None else df.to_dict(orient="records"),
                 output_payload=post_preds,
-                model_name=self._model_uri.split("/")[-1].split("@")[0],
-                model_version=self._model_version,
-                model_alias=self._model_alias
+                model_name=loaded.model_name,
+                model_version=loaded.model_version,
+                model_alias=loaded.model_alias,
+                latency_ms=primary_seconds * 1000,
             )
 
-            return post_preds
+        self._submit_shadow(loaded, data, df, post_preds, primary_seconds)
+        return post_preds
 
+    def _submit_shadow(self, loaded: LoadedModel, data: list[dict], df: pd.DataFrame, post_preds: list,
+                       primary_seconds: float):
+        shadow = self.shadow_model()
+        # Só o tráfego do mesmo modelo (outra versão) faz sentido comparar
+        if shadow is None or shadow.key == loaded.key or shadow.model_name != loaded.model_name:
+            return
+        try:
+            get_shadow_runner().submit(loaded, shadow, data, df, post_preds, primary_seconds)
         except Exception as e:
-            prediction_errors_total.inc()
-            logger.error(f"Erro durante predição: {str(e)}")
-            raise RuntimeError(f"Erro na predição: {str(e)}")
+            logger.error(f"Erro ao agendar predição em sombra: {str(e)}")
 
-        finally:
-            duration = perf_counter() - start_time
-            inference_duration_seconds.observe(duration)
+    async def _infer(self, loaded: LoadedModel, df: pd.DataFrame) -> list:
+        timer = current_timer()
+        with timer.stage("preprocess"):
+            df_pre = preprocessor.preprocess(df)
+
+        # Executa a predição síncrona em executor (agrupada em lotes se habilitado)
+        deadline = request_deadline.get()
+        start, queued = perf_counter(), timer.get("queue")
+        if settings.PREDICT_BATCHING_ENABLED:
+            # O lote reúne várias requisições: o prazo é conferido só na entrada
+            check_deadline(deadline)
+            preds = await batcher.submit(loaded, df_pre)
+        else:
+            preds = await run_predict(loaded, df_pre, deadline=deadline)
+        # A espera na fila do scheduler é registrada à parte, como "queue"
+        timer.add("model", perf_counter() - start - (timer.get("queue") - queued))
+
+        with timer.stage("postprocess"):
+            return postprocessor.postprocess(preds)
+
+    async def _infer_cached(self, prediction_cache, loaded: LoadedModel, data: list[dict], df: pd.DataFrame) -> list:
+        timer = current_timer()
+        with timer.stage("cache"):
+            rows = data if data is not None else df.to_dict(orient="records")
+            keys = [
+                prediction_cache.key(loaded.model_name, loaded.model_version, loaded.model_uri, row)
+                for row in rows
+            ]
+            post_preds = prediction_cache.get_many(keys)
+            miss_idx = [i for i, value in enumerate(post_preds) if value is MISS]
+        if not miss_idx:
+            return post_preds
 
-    def _validate_input(self, data: list[dict]):
-        if self._input_schema is None:
-            logger.warning("Input schema não definido, pulando validação.")
+        # Apenas as linhas ausentes do cache vão para o modelo
+        df_miss = df if len(miss_idx) == len(df) else df.iloc[miss_idx].reset_index(drop=True)
+        miss_preds = list(await self._infer(loaded, df_miss))
+        with timer.stage("cache"):
+            prediction_cache.put_many([keys[i] for i in miss_idx], miss_preds)
+
+        for i, value in zip(miss_idx, miss_preds):
+            post_preds[i] = value
+        return post_preds
+
+    def _validate_input(self, loaded: LoadedModel, data: list[dict] = None, df: pd.DataFrame = None):
+        if loaded.validator is None:
+            hot_logger.warning("Input schema não definido, pulando validação.")
             return
 
-        expected_cols = [col.name for col in self._input_schema]
-
-        for i, item in enumerate(data):
-            missing_cols = set(expected_cols) - set(item.keys())
-            if missing_cols:
-                raise ValueError(f"Item {i}: faltando colunas obrigatórias: {missing_cols}")
-
-            for col in self._input_schema:
-                col_name = col.name
-                expected_type = str(col.type)
-                value = item[col_name]
-
-                if expected_type in ("double", "float"):
-                    if not isinstance(value, (float, int)):
-                        raise ValueError(f"Item {i}: coluna '{col_name}' deve ser float")
-                elif expected_type in ("integer", "long"):
-                    if not isinstance(value, int):
-                        raise ValueError(f"Item {i}: coluna '{col_name}' deve ser int")
-                elif expected_type == "string":
-                    if not isinstance(value, str):
-                        raise ValueError(f"Item {i}: coluna '{col_name}' deve ser string")
-                elif expected_type == "boolean":
-                    if not isinstance(value, bool):
-                        raise ValueError(f"Item {i}: coluna '{col_name}' deve ser booleano")
-                else:
-                    logger.debug(f"Tipo '{expected_type}' da coluna '{col_name}' não tratado na validação.")
-
-        logger.info("Validação de input concluída com sucesso.")
+        if df is None:
+            df = pd.DataFrame(data)
+        loaded.validator.validate(df, records=data)
+
+        hot_logger.info("Validação de input concluída com sucesso.")
+
+    def get_version_for_alias(self, model_name: str, alias: str) -> str:
+        # Resolve o alias sem carregar o modelo (ex.: para fixar a versão de um job offline)
+        return str(self._get_model_version_from_alias(model_name, alias))
 
     def _get_model_version_from_alias(self, model_name: str, alias: str):
-        client = MlflowClient()
+        # URI explícita: não depende de um load_model anterior ter chamado set_tracking_uri
+        client = MlflowClient(tracking_uri=settings.MLFLOW_TRACKING_URI)
 
         versions = client.get_latest_versions(name=model_name, stages=[])
 
@@ -1,5 +1,6 @@
 # app/services/mongo_status.py
 from app.db.mongo import history_collection
+from app.services.health_prober import health_prober
 
 async def check_mongo_connection() -> bool:
     try:
@@ -8,5 +9,8 @@ async def check_mongo_connection() -> bool:
     except Exception:
         return False
 
-async def get_mongo_status():
-    return await check_mongo_connection()
+health_prober.register("mongodb", check_mongo_connection)
+
+def get_mongo_status():
+    # Último resultado da checagem em segundo plano (não faz ping a cada requisição)
+    return health_prober.result("mongodb").ok
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable, List, Optional
+
+from app.core.config import settings
+from app.services.metrics import (
+    prediction_cache_hits_total,
+    prediction_cache_misses_total,
+    prediction_cache_hit_ratio,
+    prediction_cache_entries,
+)
+
+MISS = object()
+
+
+def row_digest(row: dict) -> str:
+    # Forma canônica da linha: chaves ordenadas e separadores fixos
+    payload = json.dumps(row, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+class PredictionCache:
+    """
+    Cache em memória de predições por linha, com TTL e remoção LRU.
+
+    A chave combina o hash canônico da linha com nome, versão e URI do
+    modelo, de forma que versões diferentes nunca compartilham resultados.
+    """
+
+    def __init__(self, max_entries: int = 100000, ttl_seconds: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def key(model_name: str, model_version: str, model_uri: str, row: dict) -> Hashable:
+        return (model_name, model_version, model_uri, row_digest(row))
+
+    def get_many(self, keys: List[Hashable]) -> List[Any]:
+        now = monotonic()
+        values = []
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or entry[1] < now:
+                    if entry is not None:
+                        del self._entries[key]
+                    values.append(MISS)
+                    continue
+                self._entries.move_to_end(key)
+                values.append(entry[0])
+
+            hits = sum(1 for v in values if v is not MISS)
+            self._record(hits, len(values) - hits)
+        return values
+
+    def put_many(self, keys: List[Hashable], values: List[Any]):
+        expires_at = monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            prediction_cache_entries.set(len(self._entries))
+
+    def invalidate(self, model_name: Optional[str] = None, model_version: Optional[str] = None):
+        # Sem versão, descarta todas as versões do modelo; sem nome, o cache inteiro
+        with self._lock:
+            if model_name is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries
+                            if k[0] == model_name and (model_version is None or k[1] == model_version)]:
+                    del self._entries[key]
+            prediction_cache_entries.set(len(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _record(self, hits: int, misses: int):
+        # Chamado com o lock: os contadores são compartilhados entre threads
+        prediction_cache_hits_total.inc(hits)
+        prediction_cache_misses_total.inc(misses)
+        self._hits += hits
+        self._misses += misses
+        if self._hits + self._misses:
+            prediction_cache_hit_ratio.set(self._hits / (self._hits + self._misses))
+
+
+prediction_cache = PredictionCache(
+    max_entries=settings.PREDICTION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PREDICTION_CACHE_TTL_SECONDS,
+) if settings.PREDICTION_CACHE_ENABLED else None
+
+def get_prediction_cache() -> Optional[PredictionCache]:
+    return prediction_cache
@@ -0,0 +1,99 @@
+import asyncio
+import os
+from contextvars import ContextVar
+from time import monotonic, perf_counter
+from typing import Optional
+
+from app.core.config import settings
+from app.utils.timing import record_stage
+from app.services.metrics import (
+    inference_queue_depth,
+    inference_in_flight,
+    inference_rejections_total,
+)
+
+# Prazo absoluto (time.monotonic) da requisição atual, definido pela rota
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class AdmissionError(RuntimeError):
+    pass
+
+
+class QueueFullError(AdmissionError):
+    pass
+
+
+class DeadlineExceededError(AdmissionError):
+    pass
+
+
+def set_request_deadline(budget_ms: Optional[float]):
+    # Orçamento relativo (ms) do header ou, na ausência, o padrão configurado
+    if budget_ms is None and settings.INFERENCE_DEFAULT_DEADLINE_MS > 0:
+        budget_ms = settings.INFERENCE_DEFAULT_DEADLINE_MS
+    request_deadline.set(monotonic() + budget_ms / 1000 if budget_ms is not None else None)
+
+
+def check_deadline(deadline: Optional[float]):
+    if deadline is not None and monotonic() >= deadline:
+        inference_rejections_total.labels("deadline").inc()
+        raise DeadlineExceededError("Prazo da requisição expirou antes da inferência.")
+
+
+class InferenceScheduler:
+    """
+    Controle de admissão das inferências.
+
+    No máximo `max_concurrency` inferências executam ao mesmo tempo e até
+    `max_queue` aguardam na fila; além disso a requisição é recusada na hora.
+    Trabalho na fila cujo prazo expira é descartado sem chegar ao modelo.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._waiting = 0
+
+    async def run(self, fn, *args, deadline: Optional[float] = None):
+        check_deadline(deadline)
+        if self._semaphore.locked() and self._waiting >= self.max_queue:
+            inference_rejections_total.labels("queue_full").inc()
+            raise QueueFullError("Fila de inferência cheia.")
+
+        self._waiting += 1
+        inference_queue_depth.set(self._waiting)
+        queued_at = perf_counter()
+        try:
+            timeout = deadline - monotonic() if deadline is not None else None
+            await asyncio.wait_for(self._semaphore.acquire(), timeout)
+        except asyncio.TimeoutError:
+            inference_rejections_total.labels("deadline").inc()
+            raise DeadlineExceededError("Prazo da requisição expirou na fila de inferência.")
+        finally:
+            self._waiting -= 1
+            inference_queue_depth.set(self._waiting)
+            record_stage("queue", perf_counter() - queued_at)
+
+        inference_in_flight.inc()
+        try:
+            check_deadline(deadline)
+            return await fn(*args)
+        finally:
+            inference_in_flight.dec()
+            self._semaphore.release()
+
+
+def default_concurrency() -> int:
+    # Mesmo dimensionamento padrão do ThreadPoolExecutor
+    return settings.INFERENCE_MAX_CONCURRENCY or min(32, (os.cpu_count() or 1) + 4)
+
+
+inference_scheduler = InferenceScheduler(
+    max_concurrency=default_concurrency(),
+    max_queue=settings.INFERENCE_MAX_QUEUE,
+)
+
+def get_inference_scheduler() -> InferenceScheduler:
+    return inference_scheduler
@@ -0,0 +1,137 @@
+import asyncio
+import random
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Optional, Set
+
+import pandas as pd
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.history_service import get_shadow_history_service
+from app.services.metrics import (
+    shadow_predictions_total,
+    shadow_inference_duration_seconds,
+    shadow_rows_total,
+    shadow_rows_mismatched_total,
+)
+from app.utils import preprocessor, postprocessor
+
+
+def _shadow_predict(shadow, df: pd.DataFrame) -> list:
+    # Todo o trabalho do challenger roda na thread de sombra, inclusive a validação
+    if shadow.validator is not None:
+        shadow.validator.validate(df)
+    return list(postprocessor.postprocess(shadow.model.predict(preprocessor.preprocess(df))))
+
+
+class ShadowRunner:
+    """
+    Inferência em sombra de um modelo challenger, fora do caminho da requisição.
+
+    Uma fração `sample_rate` dos lotes atendidos pelo modelo principal é
+    reenviada ao challenger depois que a predição principal termina, em um
+    executor próprio de `max_concurrency` threads. Sem vaga livre, o lote é
+    descartado (sem fila); lotes acima de `timeout` segundos contam como
+    timeout, mas a vaga só é liberada quando a thread termina. O resultado vai
+    para o histórico de sombra (collection própria, fora do /history e dos
+    rollups), ao lado da saída e da latência do modelo principal (`shadow_of`),
+    e para as métricas `shadow_*`. Erros do challenger nunca chegam à requisição.
+
+    `submit` deve ser chamado na thread do event loop: o contador de vagas não
+    tem lock.
+    """
+
+    def __init__(self, sample_rate: float = 1.0, max_concurrency: int = 1, timeout: float = 5.0):
+        self.sample_rate = sample_rate
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max(max_concurrency, 1), thread_name_prefix="shadow")
+        self._inflight = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def submit(self, primary, shadow, data: Optional[list], df: pd.DataFrame, primary_preds: list,
+               primary_seconds: float) -> bool:
+        # Falha (RuntimeError) fora da thread do event loop, antes de tocar no contador
+        loop = asyncio.get_running_loop()
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return False
+        if self._inflight >= self.max_concurrency:
+            shadow_predictions_total.labels(shadow.model_name, shadow.model_version, "dropped").inc()
+            return False
+
+        self._inflight += 1
+        task = loop.create_task(self._run(primary, shadow, data, df, primary_preds, primary_seconds))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _run(self, primary, shadow, data, df, primary_preds, primary_seconds):
+        start_time = perf_counter()
+        future = asyncio.get_running_loop().run_in_executor(self._executor, _shadow_predict, shadow, df)
+        try:
+            try:
+                preds = await asyncio.wait_for(asyncio.shield(future), self.timeout)
+            except asyncio.TimeoutError:
+                shadow_predictions_total.labels(shadow.model_name, shadow.model_version, "timeout").inc()
+                logger.warning(f"Predição em sombra de {shadow.key} excedeu {self.timeout}s.")
+                return
+            except Exception as e:
+                shadow_predictions_total.labels(shadow.model_name, shadow.model_version, "error").inc()
+                logger.warning(f"Erro na predição em sombra de {shadow.key}: {str(e)}")
+                return
+
+            duration = perf_counter() - start_time
+            shadow_predictions_total.labels(shadow.model_name, shadow.model_version, "success").inc()
+            shadow_inference_duration_seconds.labels(shadow.model_name, shadow.model_version).observe(duration)
+            shadow_rows_total.labels(shadow.model_name, shadow.model_version).inc(len(preds))
+            mismatched = sum(1 for a, b in zip(preds, primary_preds) if a != b)
+            if mismatched:
+                shadow_rows_mismatched_total.labels(shadow.model_name, shadow.model_version).inc(mismatched)
+
+            await get_shadow_history_service().add(
+                input_payload=data if data is not None else df.to_dict(orient="records"),
+                output_payload=preds,
+                model_name=shadow.model_name,
+                model_version=shadow.model_version,
+                model_alias=shadow.model_alias,
+                latency_ms=duration * 1000,
+                shadow_of={
+                    "model_name": primary.model_name,
+                    "model_version": primary.model_version,
+                    "model_alias": primary.model_alias,
+                    "output_payload": primary_preds,
+                    "latency_ms": primary_seconds * 1000,
+                },
+            )
+        except Exception as e:
+            logger.error(f"Erro ao registrar predição em sombra de {shadow.key}: {str(e)}")
+        finally:
+            try:
+                # Após um timeout, a vaga continua ocupada até a thread do challenger terminar
+                if not future.done():
+                    await asyncio.wait([future])
+            finally:
+                self._inflight -= 1
+
+    async def close(self):
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            # Não segura o desligamento por um challenger travado
+            await asyncio.wait(tasks, timeout=self.timeout)
+
+
+shadow_runner = ShadowRunner(
+    sample_rate=settings.SHADOW_SAMPLE_RATE,
+    max_concurrency=settings.SHADOW_MAX_CONCURRENCY,
+    timeout=settings.SHADOW_TIMEOUT_SECONDS,
+)
+
+def get_shadow_runner() -> ShadowRunner:
+    return shadow_runner
@@ -0,0 +1,79 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Optional
+
+from app.core.config import settings
+from app.core.logger import logger
+from app.services.load_jobs import LoadJobManager, JOB_SUCCEEDED, get_load_job_manager
+from app.services.model_service import get_model_registry
+
+PRELOAD_DISABLED = "disabled"
+PRELOAD_LOADING = "loading"
+PRELOAD_READY = "ready"
+PRELOAD_RETRYING = "retrying"
+
+
+@dataclass
+class PreloadState:
+    status: str = PRELOAD_DISABLED
+    attempts: int = 0
+    last_error: Optional[str] = None
+    job_id: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "status": self.status,
+            "attempts": self.attempts,
+            "last_error": self.last_error,
+            "job_id": self.job_id,
+        }
+
+
+preload_state = PreloadState()
+
+
+async def preload_champion_model(
+    load_jobs: LoadJobManager = None,
+    state: PreloadState = preload_state,
+    max_backoff: float = None,
+):
+    # Carrega (e aquece) o modelo configurado em Settings; tenta de novo com backoff
+    # exponencial, pois o MLflow pode ainda não estar no ar quando a API sobe.
+    load_jobs = load_jobs or get_load_job_manager()
+    max_backoff = max_backoff if max_backoff is not None else settings.MODEL_PRELOAD_MAX_BACKOFF_SECONDS
+    model_name, alias = settings.MLFLOW_MODEL_NAME, settings.MLFLOW_MODEL_ALIAS
+    if not model_name:
+        logger.warning("MLFLOW_MODEL_NAME não configurado: pré-carregamento desativado.")
+        state.status = PRELOAD_DISABLED
+        return
+
+    backoff = 1.0
+    while True:
+        if get_model_registry().is_model_loaded():
+            # Um modelo já foi carregado manualmente via /load enquanto aguardávamos
+            state.status = PRELOAD_READY
+            return
+
+        state.status = PRELOAD_LOADING
+        state.attempts += 1
+        logger.info(f"Pré-carregando modelo {model_name}@{alias} (tentativa {state.attempts}).")
+
+        job = load_jobs.submit(model_name=model_name, alias=alias)
+        state.job_id = job.job_id
+        await load_jobs.wait(job)
+
+        if job.status == JOB_SUCCEEDED:
+            state.status = PRELOAD_READY
+            state.last_error = None
+            logger.info(f"Modelo {model_name}@{alias} pronto para receber tráfego.")
+            return
+
+        state.status = PRELOAD_RETRYING
+        state.last_error = job.error
+        logger.warning(f"Falha no pré-carregamento de {model_name}@{alias}; nova tentativa em {backoff:.0f}s.")
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, max_backoff)
+
+
+def get_preload_state() -> PreloadState:
+    return preload_state
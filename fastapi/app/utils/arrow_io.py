@@ -0,0 +1,219 @@
+from typing import List, Optional
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPES = (
+    "application/vnd.apache.parquet",
+    "application/x-parquet",
+    "application/parquet",
+)
+SUPPORTED_MEDIA_TYPES = (ARROW_STREAM_MEDIA_TYPE,) + PARQUET_MEDIA_TYPES
+
+_NULLABLE_INTEGERS = {
+    pa.int8(): pd.Int8Dtype(),
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+    pa.uint8(): pd.UInt8Dtype(),
+    pa.uint16(): pd.UInt16Dtype(),
+    pa.uint32(): pd.UInt32Dtype(),
+    pa.uint64(): pd.UInt64Dtype(),
+}
+
+
+def read_table(body: bytes, media_type: str) -> pa.Table:
+    # py_buffer não copia o corpo: os buffers Arrow apontam para os bytes recebidos
+    buffer = pa.py_buffer(body)
+    if media_type == ARROW_STREAM_MEDIA_TYPE:
+        with pa.ipc.open_stream(buffer) as reader:
+            return reader.read_all()
+    if media_type in PARQUET_MEDIA_TYPES:
+        return pq.read_table(pa.BufferReader(buffer))
+    raise ValueError(f"Content-Type não suportado: {media_type}")
+
+
+def read_frame(body: bytes, media_type: str) -> pd.DataFrame:
+    table = read_table(body, media_type)
+    # split_blocks evita a consolidação (cópia) das colunas em blocos 2D
+    df = table.to_pandas(split_blocks=True)
+    for name, column in zip(table.column_names, table.columns):
+        # Inteiros com nulos viriam como float64 (rejeitados como "deve ser int"):
+        # mantém como inteiro anulável, sem passar por float
+        if pa.types.is_integer(column.type) and column.null_count:
+            df[name] = column.to_pandas(types_mapper=_NULLABLE_INTEGERS.get)
+    return df
+
+
+def predictions_to_ipc(predictions) -> bytes:
+    table = pa.table({"predictions": pa.array(predictions)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+class _DrainableSink:
+    # Destino do ParquetWriter que entrega os bytes já escritos e os descarta,
+    # mantendo a posição (o rodapé do Parquet guarda offsets absolutos)
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+# Tipos da assinatura MLflow -> Arrow; o validador aceita qualquer inteiro em integer/long
+_SIGNATURE_TYPES = {
+    "double": pa.float64(),
+    "float": pa.float64(),
+    "integer": pa.int64(),
+    "long": pa.int64(),
+    "string": pa.string(),
+    "boolean": pa.bool_(),
+}
+
+
+def schema_from_signatures(input_schemas) -> pa.Schema:
+    """
+    Schema Arrow das colunas de entrada dos modelos (input schema da assinatura
+    MLflow). Uma coluna numérica com tipos diferentes entre versões vira float;
+    outros conflitos e tipos não mapeados ficam de fora (tipo vem dos dados).
+    """
+    types, conflicts = {}, set()
+    for input_schema in input_schemas:
+        for col in input_schema or ():
+            arrow_type = _SIGNATURE_TYPES.get(getattr(col.type, "name", str(col.type)))
+            name = getattr(col, "name", None)
+            if arrow_type is None or name is None:
+                continue
+            previous = types.setdefault(name, arrow_type)
+            if previous == arrow_type:
+                continue
+            if _is_numeric(previous) and _is_numeric(arrow_type):
+                types[name] = pa.float64()
+            else:
+                conflicts.add(name)
+    return pa.schema([pa.field(name, arrow_type) for name, arrow_type in types.items() if name not in conflicts])
+
+
+def _is_numeric(arrow_type: pa.DataType) -> bool:
+    return pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type)
+
+
+def _column_array(name: str, values: list, arrow_type: Optional[pa.DataType] = None) -> pa.Array:
+    if arrow_type is not None and _is_numeric(arrow_type):
+        # Booleanos são aceitos em colunas numéricas pelo validador
+        values = [int(v) if isinstance(v, bool) else v for v in values]
+    try:
+        array = pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise ValueError(f"Coluna '{name}' com tipos mistos durante a escrita do Parquet ({e}).")
+    if arrow_type is None or array.type == arrow_type:
+        return array
+    if pa.types.is_null(array.type):
+        return pa.nulls(len(array), arrow_type)
+    if pa.types.is_floating(arrow_type) and pa.types.is_integer(array.type):
+        try:
+            # Inteiros em coluna float: safe=True falha se a conversão perder precisão
+            return array.cast(arrow_type, safe=True)
+        except pa.ArrowInvalid as e:
+            raise ValueError(f"Coluna '{name}' com inteiro sem representação exata em float ({e}).")
+    raise ValueError(
+        f"Coluna '{name}' mudou de tipo durante a escrita do Parquet ({arrow_type} -> {array.type})."
+    )
+
+
+class ParquetStreamWriter:
+    """
+    Escreve um único arquivo Parquet em partes: cada `write` vira um row group
+    e devolve os bytes produzidos até ali, então a memória fica limitada ao
+    lote atual.
+
+    O tipo de cada coluna vem de `schema` (ex.: a assinatura do modelo) quando
+    ela está lá; senão, dos dados. Como o schema do arquivo é fixo, os lotes
+    ficam retidos até toda coluna ter um valor não nulo (ou até `max_pending_rows`
+    linhas; colunas ainda só com nulos viram texto), e inteiros e floats
+    misturados nesse trecho viram float. Depois disso, colunas novas ou com
+    outro tipo geram ValueError em vez de serem convertidas ou descartadas; a
+    única conversão aceita é de inteiros para float, sem perda.
+    """
+
+    def __init__(self, schema: Optional[pa.Schema] = None, max_pending_rows: int = 50000):
+        self._sink = _DrainableSink()
+        self._writer = None
+        self._hint = schema or pa.schema([])
+        self.max_pending_rows = max_pending_rows
+        self._pending: List[List[dict]] = []
+        self._pending_rows = 0
+        self.schema = None
+
+    def write(self, rows: List[dict]) -> bytes:
+        if self._writer is None:
+            self._pending.append(rows)
+            self._pending_rows += len(rows)
+            schema = self._resolve_schema(final=self._pending_rows >= self.max_pending_rows)
+            if schema is None:
+                return b""
+            self._open(schema)
+        else:
+            self._writer.write_table(self._conform(rows))
+        return self._sink.drain()
+
+    def _resolve_schema(self, final: bool) -> Optional[pa.Schema]:
+        names = list(dict.fromkeys(key for batch in self._pending for row in batch for key in row))
+        fields = []
+        for name in names:
+            if name in self._hint.names:
+                fields.append(self._hint.field(name))
+                continue
+            # int + float no mesmo trecho viram double na inferência do Arrow
+            array = _column_array(name, [row.get(name) for batch in self._pending for row in batch])
+            if pa.types.is_null(array.type):
+                if not final:
+                    return None
+                fields.append(pa.field(name, pa.string()))
+            else:
+                fields.append(pa.field(name, array.type))
+        return pa.schema(fields)
+
+    def _open(self, schema: pa.Schema):
+        self.schema = schema
+        self._writer = pq.ParquetWriter(pa.PythonFile(self._sink, mode="w"), self.schema)
+        pending, self._pending, self._pending_rows = self._pending, [], 0
+        for batch in pending:
+            self._writer.write_table(self._conform(batch))
+
+    def _conform(self, rows: List[dict]) -> pa.Table:
+        new_columns = {key for row in rows for key in row}.difference(self.schema.names)
+        if new_columns:
+            raise ValueError(f"Colunas novas durante a escrita do Parquet: {sorted(new_columns)}.")
+        columns = [_column_array(field.name, [row.get(field.name) for row in rows], field.type) for field in self.schema]
+        return pa.Table.from_arrays(columns, schema=self.schema)
+
+    def close(self) -> bytes:
+        if self._writer is None:
+            # Sem lotes, um arquivo válido sem colunas; com lotes retidos, fixa o schema agora
+            self._open(self._resolve_schema(final=True))
+        self._writer.close()
+        return self._sink.drain()
@@ -0,0 +1,52 @@
+import json
+from typing import Any, List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+from starlette.responses import Response
+
+from app.schemas.predict import PredictRequest
+
+
+class FastJSONResponse(Response):
+    # Serializa direto com json.dumps: não revalida o response_model nem percorre
+    # o payload com jsonable_encoder (as predições já chegam como tipos nativos)
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        try:
+            return _dumps(content)
+        except TypeError:
+            # Tipos não nativos (numpy, datetime...): caminho genérico
+            return _dumps(jsonable_encoder(content))
+
+
+def _dumps(content: Any) -> bytes:
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def parse_predict_inputs(body: bytes) -> List[dict]:
+    # Checagem estrutural mínima; os tipos das colunas ficam com o validador
+    # compilado do modelo, que valida o lote inteiro de uma vez
+    try:
+        payload = json.loads(body)
+    except ValueError as e:
+        # Mesmo formato de erro que o FastAPI gera para JSON inválido
+        raise RequestValidationError(
+            [{"type": "json_invalid", "loc": ("body", getattr(e, "pos", 0)), "msg": "JSON decode error",
+              "input": {}, "ctx": {"error": getattr(e, "msg", str(e))}}],
+            body=body,
+        )
+
+    inputs = payload.get("inputs") if isinstance(payload, dict) else None
+    if isinstance(inputs, list) and all(isinstance(row, dict) for row in inputs):
+        return inputs
+
+    # Estrutura inválida: o modelo genérico gera os mesmos erros 422 do FastAPI
+    try:
+        return PredictRequest.parse_obj(payload).dict()["inputs"]
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors()], body=payload
+        )
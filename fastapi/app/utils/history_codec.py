@@ -0,0 +1,65 @@
+import json
+import zlib
+from typing import Any, List, Tuple
+
+from bson import Binary
+
+# Valores de `payload_format` nos documentos do histórico. Documentos sem o
+# campo estão no formato original (`input_payload`/`output_payload`).
+COLUMNAR = "columnar"
+COLUMNAR_ZLIB = "columnar+zlib"
+
+COMPRESSIONS = ("none", "zlib")
+
+
+def to_columns(rows: List[dict]) -> dict:
+    # Nomes das colunas gravados uma única vez, na ordem em que aparecem
+    names = list(dict.fromkeys(key for row in rows for key in row))
+    block = {"n": len(rows), "columns": names, "data": [[row.get(name) for row in rows] for name in names]}
+
+    # Colunas ausentes em algumas linhas (raro): [índice da coluna, [linhas]]
+    absent = [
+        [j, [i for i, row in enumerate(rows) if name not in row]]
+        for j, name in enumerate(names)
+        if any(name not in row for row in rows)
+    ]
+    if absent:
+        block["absent"] = absent
+    return block
+
+
+def from_columns(block: dict) -> List[dict]:
+    names = block["columns"]
+    if not names:
+        return [{} for _ in range(block["n"])]
+    rows = [dict(zip(names, values)) for values in zip(*block["data"])]
+    for j, row_indexes in block.get("absent", []):
+        for i in row_indexes:
+            del rows[i][names[j]]
+    return rows
+
+
+def is_columnar_encodable(input_payload: Any) -> bool:
+    return isinstance(input_payload, list) and all(isinstance(row, dict) for row in input_payload)
+
+
+def encode_payload(input_payload: List[dict], output_payload: list, compression: str = "none",
+                   level: int = 6) -> Tuple[str, Any]:
+    block = {"input": to_columns(input_payload), "output": output_payload}
+    if compression == "zlib":
+        raw = json.dumps(block, separators=(",", ":"), default=str).encode("utf-8")
+        return COLUMNAR_ZLIB, Binary(zlib.compress(raw, level))
+    return COLUMNAR, block
+
+
+def decode_payload(doc: dict) -> Tuple[List[dict], list]:
+    payload_format = doc.get("payload_format")
+    if payload_format is None:
+        return doc.get("input_payload", [{}]), doc.get("output_payload", [])
+    if payload_format == COLUMNAR_ZLIB:
+        block = json.loads(zlib.decompress(bytes(doc["payload"])))
+    elif payload_format == COLUMNAR:
+        block = doc["payload"]
+    else:
+        raise ValueError(f"Formato de histórico desconhecido: {payload_format}")
+    return from_columns(block["input"]), block["output"]
@@ -0,0 +1,83 @@
+import json
+from typing import AsyncIterable, AsyncIterator, List
+
+from starlette.responses import StreamingResponse
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+class NDJSONDecodeError(ValueError):
+    pass
+
+
+async def iter_ndjson(chunks: AsyncIterable[bytes], max_line_bytes: int = 1024 * 1024) -> AsyncIterator[dict]:
+    # Decodifica linha a linha conforme os bytes chegam; só a linha incompleta fica em buffer,
+    # limitada a max_line_bytes (uma linha sem fim não cresce a memória sem limite)
+    buffer = bytearray()
+    line_number = 0
+    async for chunk in chunks:
+        scan_from = len(buffer)
+        buffer += chunk
+        start = 0
+        end = buffer.find(b"\n", scan_from)
+        while end != -1:
+            line_number += 1
+            if end - start > max_line_bytes:
+                raise _line_too_long(line_number, max_line_bytes)
+            row = _parse_line(buffer[start:end], line_number)
+            if row is not None:
+                yield row
+            start = end + 1
+            end = buffer.find(b"\n", start)
+        if start:
+            del buffer[:start]
+        if len(buffer) > max_line_bytes:
+            raise _line_too_long(line_number + 1, max_line_bytes)
+
+    line_number += 1
+    row = _parse_line(buffer, line_number)
+    if row is not None:
+        yield row
+
+
+def _line_too_long(line_number: int, max_line_bytes: int) -> NDJSONDecodeError:
+    return NDJSONDecodeError(f"Linha {line_number}: excede o limite de {max_line_bytes} bytes")
+
+
+def _parse_line(line: bytes, line_number: int):
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        raise NDJSONDecodeError(f"Linha {line_number}: JSON inválido ({e})")
+    if not isinstance(row, dict):
+        raise NDJSONDecodeError(f"Linha {line_number}: cada linha deve ser um objeto JSON")
+    return row
+
+
+async def iter_chunks(rows: AsyncIterable[dict], size: int) -> AsyncIterator[List[dict]]:
+    chunk = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def dumps_line(obj) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    # O StreamingResponse padrão escuta `receive` em paralelo para detectar
+    # desconexão, consumindo as mensagens do corpo da requisição. Aqui o corpo
+    # é lido pelo próprio gerador da resposta, então apenas enviamos o stream;
+    # uma desconexão aparece como ClientDisconnect ao ler o corpo.
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,63 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, Optional
+
+# Cronômetro da predição em andamento (uma chamada a ModelRegistry._predict)
+_current_timer: ContextVar[Optional["StageTimer"]] = ContextVar("stage_timer", default=None)
+# Tempos acumulados da requisição HTTP, para o header Server-Timing
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+class StageTimer:
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def get(self, stage: str) -> float:
+        return self.stages.get(stage, 0.0)
+
+    @contextmanager
+    def stage(self, stage: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, perf_counter() - start)
+
+
+@contextmanager
+def stage_timer():
+    timer = StageTimer()
+    token = _current_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        _current_timer.reset(token)
+        request_timings = _request_timings.get()
+        if request_timings is not None:
+            for stage, seconds in timer.stages.items():
+                request_timings[stage] = request_timings.get(stage, 0.0) + seconds
+
+
+def current_timer() -> StageTimer:
+    # Fora de uma predição, devolve um cronômetro descartável
+    return _current_timer.get() or StageTimer()
+
+
+def record_stage(stage: str, seconds: float):
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.add(stage, seconds)
+
+
+def start_request_timings() -> Dict[str, float]:
+    timings: Dict[str, float] = {}
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    return ", ".join(f"{stage};dur={seconds * 1000:.2f}" for stage, seconds in timings.items())
@@ -0,0 +1,136 @@
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import (
+    infer_dtype,
+    is_bool_dtype,
+    is_float_dtype,
+    is_integer_dtype,
+)
+
+from app.core.logger import logger
+
+
+@dataclass(frozen=True)
+class _TypeCheck:
+    label: str
+    check: Callable[[object], bool]
+    # Retorna True quando o dtype da coluna garante que todo valor não nulo é válido
+    fast: Callable[[pd.Series], bool]
+
+
+_FLOAT = _TypeCheck(
+    label="float",
+    check=lambda v: isinstance(v, (float, int)),
+    fast=lambda s: is_float_dtype(s.dtype) or is_integer_dtype(s.dtype) or is_bool_dtype(s.dtype),
+)
+_INT = _TypeCheck(
+    label="int",
+    check=lambda v: isinstance(v, int),
+    fast=lambda s: is_integer_dtype(s.dtype) or is_bool_dtype(s.dtype),
+)
+_STRING = _TypeCheck(
+    label="string",
+    check=lambda v: isinstance(v, str),
+    fast=lambda s: infer_dtype(s, skipna=False) == "string",
+)
+_BOOL = _TypeCheck(
+    label="booleano",
+    check=lambda v: isinstance(v, bool),
+    fast=lambda s: is_bool_dtype(s.dtype),
+)
+
+_TYPE_CHECKS = {
+    "double": _FLOAT,
+    "float": _FLOAT,
+    "integer": _INT,
+    "long": _INT,
+    "string": _STRING,
+    "boolean": _BOOL,
+}
+
+
+class InputValidator:
+    """
+    Validador compilado uma única vez a partir do input schema da assinatura MLflow.
+
+    A checagem é feita coluna a coluna sobre o DataFrame já construído: colunas
+    com dtype homogêneo são aceitas sem iterar valores, e só as células suspeitas
+    (nulas ou de dtype misto) são conferidas contra os registros originais.
+    As mensagens de erro são as mesmas da validação linha a linha.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.expected_cols: List = [col.name for col in schema]
+        self._checks = []
+        for col in schema:
+            expected_type = str(col.type)
+            type_check = _TYPE_CHECKS.get(expected_type)
+            if type_check is None:
+                logger.debug("Tipo '{}' da coluna '{}' não tratado na validação.", expected_type, col.name)
+            self._checks.append((col.name, type_check))
+
+    def validate(self, df: pd.DataFrame, records: Optional[List[dict]] = None):
+        n_rows = len(records) if records is not None else len(df)
+        if n_rows == 0:
+            return
+
+        # Primeira linha com erro por coluna (None = coluna válida)
+        first_errors = {}
+        for col_name, type_check in self._checks:
+            first_errors[col_name] = self._first_error(col_name, type_check, df, records)
+
+        failing = [row for row in first_errors.values() if row is not None]
+        if not failing:
+            return
+
+        row = min(failing)
+        if records is not None:
+            missing_cols = set(self.expected_cols) - set(records[row].keys())
+        else:
+            missing_cols = set(self.expected_cols) - set(df.columns)
+        if missing_cols:
+            raise ValueError(f"Item {row}: faltando colunas obrigatórias: {missing_cols}")
+
+        for col_name, type_check in self._checks:
+            if first_errors[col_name] == row:
+                raise ValueError(f"Item {row}: coluna '{col_name}' deve ser {type_check.label}")
+
+    def _first_error(self, col_name, type_check: Optional[_TypeCheck], df: pd.DataFrame, records) -> Optional[int]:
+        if col_name not in df.columns:
+            return 0
+        if type_check is None:
+            if records is None:
+                return None
+            # Tipo não tratado: só a presença da coluna é verificada
+            suspects = np.flatnonzero(df[col_name].isna().to_numpy())
+            return next((int(i) for i in suspects if col_name not in records[i]), None)
+
+        series = df[col_name]
+        null_mask = series.isna().to_numpy()
+        if type_check.fast(series):
+            suspects = np.flatnonzero(null_mask)
+        else:
+            valid = series.map(type_check.check).to_numpy(dtype=bool)
+            suspects = np.flatnonzero(~valid | null_mask)
+
+        for i in suspects:
+            if records is not None:
+                item = records[i]
+                if col_name not in item:
+                    return int(i)
+                value = item[col_name]
+            else:
+                value = series.iat[i]
+            if not type_check.check(value):
+                return int(i)
+        return None
+
+
+def compile_validator(schema) -> Optional[InputValidator]:
+    if schema is None:
+        return None
+    return InputValidator(schema)
@@ -0,0 +1,45 @@
+from time import perf_counter
+from typing import List
+
+import pandas as pd
+
+from app.core.logger import logger
+from app.utils import preprocessor
+
+
+def _synthetic_value(col_type: str, i: int):
+    if col_type in ("double", "float"):
+        return float(i)
+    if col_type in ("integer", "long"):
+        return i
+    if col_type == "boolean":
+        return bool(i % 2)
+    if col_type == "string":
+        return f"warmup_{i}"
+    if col_type == "datetime":
+        return pd.Timestamp("2000-01-01") + pd.Timedelta(days=i)
+    if col_type == "binary":
+        return b""
+    return None
+
+
+def synthetic_rows(input_schema, n_rows: int = 1) -> List[dict]:
+    # Linhas artificiais, com tipos compatíveis com a assinatura, só para aquecer o modelo
+    return [
+        {col.name: _synthetic_value(str(col.type), i) for col in input_schema}
+        for i in range(n_rows)
+    ]
+
+
+def warmup_model(model, input_schema, n_rows: int = 1, runs: int = 1) -> float:
+    if input_schema is None:
+        logger.warning("Modelo sem input schema: aquecimento ignorado.")
+        return 0.0
+
+    df = preprocessor.preprocess(pd.DataFrame(synthetic_rows(input_schema, n_rows)))
+    start_time = perf_counter()
+    for _ in range(runs):
+        model.predict(df)
+    duration = perf_counter() - start_time
+    logger.info(f"Aquecimento do modelo concluído em {duration:.3f}s ({runs}x {n_rows} linhas).")
+    return duration
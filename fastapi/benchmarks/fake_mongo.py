@@ -0,0 +1,140 @@
+"""
+Collection MongoDB em memória, com a parte da API do Motor usada pelo
+HistoryService, pelo HistoryWriter e pelos rollups do histórico. Serve apenas para os benchmarks:
+elimina a rede e o servidor da medição, isolando o custo da API.
+"""
+from typing import Iterable
+
+from bson import ObjectId
+
+_OPERATORS = {
+    "$lt": lambda value, arg: value is not None and value < arg,
+    "$lte": lambda value, arg: value is not None and value <= arg,
+    "$gt": lambda value, arg: value is not None and value > arg,
+    "$gte": lambda value, arg: value is not None and value >= arg,
+    "$in": lambda value, arg: value in arg,
+}
+
+
+def matches(doc: dict, query: dict) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(op in _OPERATORS for op in condition):
+            if not all(_OPERATORS[op](doc.get(key), arg) for op, arg in condition.items()):
+                return False
+        elif doc.get(key) != condition:
+            return False
+    return True
+
+
+class FakeCursor:
+    def __init__(self, collection: "FakeCollection", query: dict):
+        self._collection = collection
+        self._query = query
+        self._sort = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, keys):
+        self._sort = keys
+        return self
+
+    def skip(self, n: int):
+        self._skip = n
+        return self
+
+    def limit(self, n: int):
+        self._limit = n
+        return self
+
+    def batch_size(self, n: int):
+        return self
+
+    def _results(self) -> list:
+        # Percorre a ordenação já pronta e para ao completar skip + limit, como um índice
+        wanted = self._skip + self._limit if self._limit else None
+        docs = []
+        for doc in self._collection.sorted_docs(self._sort):
+            if matches(doc, self._query):
+                docs.append(doc)
+                if wanted is not None and len(docs) >= wanted:
+                    break
+        return docs[self._skip:]
+
+    async def to_list(self, length=None):
+        return self._results()
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for doc in self._results():
+            yield doc
+
+
+class FakeDatabase:
+    async def command(self, name, *args, **kwargs):
+        return {"ok": 1.0}
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+        self.database = FakeDatabase()
+        self._sorted = {}
+
+    def sorted_docs(self, sort: list) -> list:
+        key = tuple(sort)
+        if key not in self._sorted:
+            docs = self.docs
+            for field, direction in reversed(sort):
+                docs = sorted(docs, key=lambda d: d.get(field), reverse=direction < 0)
+            self._sorted[key] = docs
+        return self._sorted[key]
+
+    async def insert_one(self, doc: dict):
+        doc.setdefault("_id", ObjectId())
+        self.docs.append(doc)
+        self._sorted.clear()
+
+    async def insert_many(self, docs: Iterable[dict], ordered: bool = True):
+        for doc in docs:
+            await self.insert_one(doc)
+
+    def find(self, query: dict = None, projection: dict = None):
+        return FakeCursor(self, query or {})
+
+    async def count_documents(self, query: dict):
+        return sum(1 for d in self.docs if matches(d, query))
+
+    async def estimated_document_count(self):
+        return len(self.docs)
+
+    async def bulk_write(self, operations, ordered: bool = True):
+        # Apenas os upserts com $inc usados pelos rollups do histórico
+        for operation in operations:
+            doc = next((d for d in self.docs if matches(d, operation._filter)), None)
+            if doc is None:
+                doc = {**operation._filter, "_id": ObjectId()}
+                self.docs.append(doc)
+            for path, amount in operation._doc["$inc"].items():
+                *parents, field = path.split(".")
+                target = doc
+                for parent in parents:
+                    target = target.setdefault(parent, {})
+                target[field] = target.get(field, 0) + amount
+        self._sorted.clear()
+
+    async def create_indexes(self, indexes):
+        return [index.document["name"] for index in indexes]
+
+    def seed(self, docs: Iterable[dict]):
+        for doc in docs:
+            doc.setdefault("_id", ObjectId())
+            self.docs.append(doc)
+        self._sorted.clear()
@@ -0,0 +1,96 @@
+"""
+Compara os backends de inferência "thread" e "process" com um modelo pyfunc
+cujo predict é Python puro (limitado pelo GIL).
+
+Uso (a partir de fastapi/):
+    python -m benchmarks.inference_backends --requests 64 --concurrency 8 --rows 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import mlflow
+import pandas as pd
+
+from app.services.inference_backend import ProcessInferenceBackend
+
+
+class PythonHeavyModel(mlflow.pyfunc.PythonModel):
+    def predict(self, context, model_input, params=None):
+        preds = []
+        for value in model_input["x"]:
+            acc = 0.0
+            for i in range(2000):
+                acc += (value * i) % 7
+            preds.append(acc)
+        return preds
+
+
+async def run_thread(model, df, n_requests, concurrency):
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    loop = asyncio.get_running_loop()
+    try:
+        return await _drive(lambda: loop.run_in_executor(executor, model.predict, df), n_requests, concurrency)
+    finally:
+        executor.shutdown()
+
+
+async def run_process(path, df, n_requests, concurrency, workers):
+    backend = ProcessInferenceBackend(max_workers=workers)
+    try:
+        # Primeira chamada em cada processo carrega o modelo: fica fora da medição
+        await asyncio.gather(*(backend.predict(path, df) for _ in range(workers)))
+        return await _drive(lambda: backend.predict(path, df), n_requests, concurrency)
+    finally:
+        backend.shutdown()
+
+
+async def _drive(call, n_requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = perf_counter()
+            await call()
+            latencies.append(perf_counter() - start)
+
+    start = perf_counter()
+    await asyncio.gather(*(one() for _ in range(n_requests)))
+    elapsed = perf_counter() - start
+    latencies.sort()
+    return {
+        "requests_per_second": round(n_requests / elapsed, 2),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    df = pd.DataFrame({"x": range(args.rows)})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "model")
+        mlflow.pyfunc.save_model(path=path, python_model=PythonHeavyModel())
+        model = mlflow.pyfunc.load_model(path)
+
+        results = {
+            "cpu_count": os.cpu_count(),
+            "thread": asyncio.run(run_thread(model, df, args.requests, args.concurrency)),
+            "process": asyncio.run(run_process(path, df, args.requests, args.concurrency, args.workers)),
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Benchmark da API em processo: a app FastAPI real, chamada via httpx
+(ASGITransport, sem rede), com um modelo pyfunc fictício de custo configurável
+e uma collection MongoDB em memória.
+
+Mede vazão e latência p50/p95/p99 de /v1/predict (por tamanho de lote e
+concorrência), /history e /v1/health, e grava o resultado em JSON.
+
+Uso (a partir de fastapi/):
+    python -m benchmarks.suite --output benchmarks/results/atual.json
+    python -m benchmarks.suite --quick --compare benchmarks/results/atual.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from time import perf_counter
+
+# A app exige essas variáveis; o benchmark não usa MLflow nem MongoDB reais
+os.environ.setdefault("MLFLOW_TRACKING_URI", "http://localhost:5000")
+os.environ.setdefault("MLFLOW_MODEL_NAME", "benchmark")
+os.environ.setdefault("MONGO_URI", "mongodb://localhost:27017")
+os.environ.setdefault("MONGO_DB_NAME", "benchmark")
+os.environ.setdefault("MONGODB_HISTORY_COLLECTION", "history")
+os.environ.setdefault("MODEL_CACHE_ENABLED", "false")
+
+import mlflow
+import numpy as np
+import pandas as pd
+from httpx import AsyncClient
+from httpx._transports.asgi import ASGITransport
+from mlflow.models import infer_signature
+
+from app.main import app
+from app.services.history_service import get_history_service
+from app.services.model_service import LoadedModel, get_model_registry
+from benchmarks.fake_mongo import FakeCollection
+
+SAMPLE_ROW = {"Pclass": 1, "Name": "Mitkoff, Mr. Mito", "Sex": "female", "Age": 29.0,
+              "SibSp": 2, "Parch": 0, "Fare": 7.8958, "Embarked": "S"}
+
+
+class DummyModel(mlflow.pyfunc.PythonModel):
+    # Custo fixo de CPU por linha, para simular modelos mais ou menos pesados
+    def __init__(self, cost_us_per_row: float):
+        self.cost_us_per_row = cost_us_per_row
+
+    def predict(self, context, model_input, params=None):
+        deadline = perf_counter() + self.cost_us_per_row * len(model_input) / 1e6
+        while perf_counter() < deadline:
+            pass
+        return [int(p == 1) for p in model_input["Pclass"]]
+
+
+def make_rows(n: int) -> list:
+    return [{**SAMPLE_ROW, "Age": float(20 + i % 50), "Fare": 7.0 + i % 30} for i in range(n)]
+
+
+def install_model(tmp_dir: str, cost_us_per_row: float):
+    sample = pd.DataFrame(make_rows(4))
+    path = os.path.join(tmp_dir, "model")
+    mlflow.pyfunc.save_model(
+        path=path,
+        python_model=DummyModel(cost_us_per_row),
+        signature=infer_signature(sample, [0, 1, 0, 1]),
+    )
+    model = mlflow.pyfunc.load_model(path)
+    signature = model.metadata.signature
+    get_model_registry().register(LoadedModel(
+        model=model,
+        model_name="benchmark",
+        model_version="1",
+        model_uri="models:/benchmark/1",
+        signature=signature,
+        input_schema=signature.inputs,
+        artifact_path=path,
+    ))
+
+
+def seed_history(collection: FakeCollection, n_docs: int):
+    now = datetime.datetime.utcnow()
+    collection.seed({
+        "timestamp": now - datetime.timedelta(seconds=i),
+        "input_payload": make_rows(1),
+        "output_payload": [1],
+        "model_name": "benchmark",
+        "model_version": "1",
+        "model_alias": "champion",
+    } for i in range(n_docs))
+
+
+def summarize(latencies: list, elapsed: float, rows_per_request: int, errors: int) -> dict:
+    ms = np.array(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "rows_per_second": round(len(latencies) * rows_per_request / elapsed, 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+    }
+
+
+async def measure(client: AsyncClient, call, n_requests: int, concurrency: int, rows_per_request: int = 1) -> dict:
+    for _ in range(min(5, n_requests)):
+        response = await call(client)
+        if response.status_code >= 400:
+            # Falha já no aquecimento: o cenário está quebrado, não há o que medir
+            raise RuntimeError(f"Cenário retornou HTTP {response.status_code}: {response.text[:200]}")
+
+    latencies = []
+    errors = 0
+    remaining = iter(range(n_requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            start = perf_counter()
+            response = await call(client)
+            latencies.append(perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, perf_counter() - start, rows_per_request, errors)
+
+
+def predict_call(rows: list):
+    body = {"inputs": rows}
+    return lambda client: client.post("/v1/predict", json=body)
+
+
+def get_call(url: str):
+    return lambda client: client.get(url)
+
+
+async def run_suite(args) -> list:
+    results = []
+
+    def record(scenario: str, result: dict, **params):
+        entry = {"scenario": scenario, **params, **result}
+        results.append(entry)
+        # Latências de respostas de erro não medem o cenário: o resultado é marcado como inválido
+        status = f"  INVÁLIDO: {result['errors']}/{result['requests']} respostas com erro" if result["errors"] else ""
+        print(f"{scenario:<10} {json.dumps(params):<40} "
+              f"{result['throughput_rps']:>10.1f} req/s  p50 {result['p50_ms']:>8.2f} ms  "
+              f"p95 {result['p95_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms{status}", file=sys.stderr)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        for batch_size in args.batch_sizes:
+            rows = make_rows(batch_size)
+            for concurrency in args.concurrency:
+                result = await measure(client, predict_call(rows), args.requests, concurrency, batch_size)
+                record("predict", result, batch_size=batch_size, concurrency=concurrency)
+
+        for concurrency in args.concurrency:
+            result = await measure(client, get_call("/history?limit=50"), args.requests, concurrency)
+            record("history", result, limit=50, concurrency=concurrency)
+            result = await measure(client, get_call("/history?limit=50&model_name=benchmark"), args.requests, concurrency)
+            record("history", result, limit=50, concurrency=concurrency, filtered=True)
+
+            result = await measure(client, get_call("/v1/health"), args.requests, concurrency)
+            record("health", result, concurrency=concurrency)
+
+    return results
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def scenario_key(entry: dict) -> tuple:
+    skip = {"requests", "errors", "throughput_rps", "rows_per_second", "p50_ms", "p95_ms", "p99_ms"}
+    return tuple(sorted((k, v) for k, v in entry.items() if k not in skip))
+
+
+def compare(results: list, baseline_path: str):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {scenario_key(e): e for e in json.load(f)["results"]}
+
+    print(f"\nComparação com {baseline_path} (variação relativa):", file=sys.stderr)
+    for entry in results:
+        base = baseline.get(scenario_key(entry))
+        if base is None or entry["errors"] or base["errors"]:
+            continue
+        deltas = {
+            metric: f"{(entry[metric] - base[metric]) / base[metric] * 100:+.1f}%"
+            for metric in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms") if base[metric]
+        }
+        print(f"  {dict(scenario_key(entry))}: {deltas}", file=sys.stderr)
+
+
+async def main_async(args):
+    collection = FakeCollection()
+    seed_history(collection, args.history_docs)
+    history_service = get_history_service()
+    history_service.collection = collection
+    if history_service.writer is not None:
+        history_service.writer.collection = collection
+    if history_service.rollups is not None:
+        history_service.rollups.collection = FakeCollection()
+    await history_service.start()
+
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            install_model(tmp_dir, args.cost_us)
+            results = await run_suite(args)
+    finally:
+        await history_service.close()
+    return results
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Requisições medidas por cenário")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 32, 256])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--cost-us", type=float, default=20.0, help="Custo do modelo fictício por linha (µs)")
+    parser.add_argument("--history-docs", type=int, default=5000)
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--compare", help="JSON de uma execução anterior para comparação")
+    parser.add_argument("--quick", action="store_true", help="Execução curta, para checagens rápidas")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.requests, args.batch_sizes, args.concurrency = 50, [1, 32], [1, 8]
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = asyncio.run(main_async(args))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        },
+        "results": results,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+    if args.compare:
+        compare(results, args.compare)
+
+    failed = [entry for entry in results if entry["errors"]]
+    if failed:
+        print(f"\n{len(failed)} cenário(s) com respostas de erro; resultados inválidos.", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
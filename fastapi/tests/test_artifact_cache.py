@@ -0,0 +1,106 @@
+import os
+import mlflow
+import pandas as pd
+import pytest
+from unittest.mock import patch
+
+from app.services.artifact_cache import ArtifactCache, tree_checksum
+
+
+class DoubleModel(mlflow.pyfunc.PythonModel):
+    def predict(self, context, model_input, params=None):
+        return model_input["x"] * 2
+
+
+@pytest.fixture(scope="module")
+def local_registry(tmp_path_factory):
+    # Registry MLflow local, baseado em arquivos, com duas versões do mesmo modelo
+    tracking_uri = f"file://{tmp_path_factory.mktemp('mlruns')}"
+    previous_uri = mlflow.get_tracking_uri()
+    mlflow.set_tracking_uri(tracking_uri)
+    experiment_id = mlflow.create_experiment("artifact_cache")
+
+    for _ in range(2):
+        with mlflow.start_run(experiment_id=experiment_id):
+            mlflow.pyfunc.log_model(
+                name="model",
+                python_model=DoubleModel(),
+                registered_model_name="cache_model",
+            )
+
+    yield tracking_uri
+    mlflow.set_tracking_uri(previous_uri)
+
+
+def test_repeat_fetch_is_served_locally(local_registry, tmp_path):
+    cache = ArtifactCache(root=str(tmp_path / "cache"), max_bytes=100 * 1024 * 1024)
+
+    with patch("app.services.artifact_cache.mlflow.artifacts.download_artifacts",
+               wraps=mlflow.artifacts.download_artifacts) as download:
+        first = cache.fetch("cache_model", "1")
+        second = cache.fetch("cache_model", "1")
+
+    assert download.call_count == 1
+    assert first == second
+    assert os.path.basename(first) == tree_checksum(first)[0]
+
+    model = mlflow.pyfunc.load_model(first)
+    assert model.predict(pd.DataFrame({"x": [1, 2]})).tolist() == [2, 4]
+
+
+def test_cache_survives_new_instance(local_registry, tmp_path):
+    root = str(tmp_path / "cache")
+    ArtifactCache(root=root, max_bytes=100 * 1024 * 1024).fetch("cache_model", "1")
+
+    # Simula um restart do container: novo objeto, mesmo diretório
+    with patch("app.services.artifact_cache.mlflow.artifacts.download_artifacts") as download:
+        path = ArtifactCache(root=root, max_bytes=100 * 1024 * 1024).fetch("cache_model", "1")
+
+    download.assert_not_called()
+    assert os.path.isfile(os.path.join(path, "MLmodel"))
+
+
+def test_corrupted_entry_is_downloaded_again(local_registry, tmp_path):
+    cache = ArtifactCache(root=str(tmp_path / "cache"), max_bytes=100 * 1024 * 1024, verify_checksum=True)
+    path = cache.fetch("cache_model", "1")
+    with open(os.path.join(path, "MLmodel"), "a") as f:
+        f.write("# corrompido\n")
+
+    with patch("app.services.artifact_cache.mlflow.artifacts.download_artifacts",
+               wraps=mlflow.artifacts.download_artifacts) as download:
+        cache.fetch("cache_model", "1")
+
+    assert download.call_count == 1
+
+
+def test_eviction_keeps_cache_under_limit(local_registry, tmp_path):
+    root = tmp_path / "cache"
+    first_path = ArtifactCache(root=str(root), max_bytes=10 ** 9).fetch("cache_model", "1")
+    _, size = tree_checksum(first_path)
+
+    # Limite para apenas uma versão: buscar a versão 2 remove a 1 (menos recente)
+    cache = ArtifactCache(root=str(root), max_bytes=size + 1)
+    cache.fetch("cache_model", "2")
+
+    index = cache._read_index()
+    assert list(index.keys()) == ["cache_model/2"]
+
+
+def test_pinned_version_is_not_evicted(local_registry, tmp_path):
+    root = tmp_path / "cache"
+    first_path = ArtifactCache(root=str(root), max_bytes=10 ** 9).fetch("cache_model", "1", pin=True)
+    _, size = tree_checksum(first_path)
+
+    # A versão 1 está em uso: o cache fica acima do limite em vez de apagá-la
+    cache = ArtifactCache(root=str(root), max_bytes=size + 1)
+    cache.fetch("cache_model", "2")
+    assert sorted(cache._read_index().keys()) == ["cache_model/1", "cache_model/2"]
+    assert os.path.isfile(os.path.join(first_path, "MLmodel"))
+
+    # Após o unpin, a próxima remoção LRU pode apagá-la
+    cache.unpin("cache_model", "1")
+    index = cache._read_index()
+    assert index["cache_model/1"]["pinned_by"] == []
+    cache._evict(index, protected="cache_model/2")
+    assert list(index.keys()) == ["cache_model/2"]
+    assert not os.path.exists(first_path)
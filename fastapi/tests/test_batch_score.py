@@ -0,0 +1,109 @@
+import os
+
+import mlflow
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from unittest.mock import patch
+
+from app import batch_score
+from app.services.model_service import ModelRegistry
+
+
+class DoubleModel(mlflow.pyfunc.PythonModel):
+    def predict(self, context, model_input, params=None):
+        return model_input["x"] * 2
+
+
+@pytest.fixture(scope="module")
+def local_registry(tmp_path_factory):
+    tracking_uri = f"file://{tmp_path_factory.mktemp('mlruns')}"
+    previous_uri = mlflow.get_tracking_uri()
+    mlflow.set_tracking_uri(tracking_uri)
+    experiment_id = mlflow.create_experiment("batch_score")
+    with mlflow.start_run(experiment_id=experiment_id):
+        mlflow.pyfunc.log_model(name="model", python_model=DoubleModel(), registered_model_name="batch_model")
+    mlflow.MlflowClient().set_registered_model_alias("batch_model", "champion", "1")
+    yield tracking_uri
+    mlflow.set_tracking_uri(previous_uri)
+
+
+@pytest.fixture
+def scoring_env(local_registry, monkeypatch):
+    # Processos filhos (spawn) leem as configurações do ambiente
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", local_registry)
+    monkeypatch.setenv("MODEL_CACHE_ENABLED", "false")
+    ModelRegistry._instance = None
+    with patch("app.services.model_service.settings.MLFLOW_TRACKING_URI", local_registry), \
+         patch("app.services.model_service.get_artifact_cache", return_value=None):
+        yield local_registry
+    ModelRegistry._instance = None
+
+
+@pytest.fixture
+def input_csv(tmp_path):
+    path = tmp_path / "entrada.csv"
+    pd.DataFrame({"id": range(10), "x": range(10)}).to_csv(path, index=False)
+    return str(path)
+
+
+def read_output(output_dir):
+    return pq.read_table(str(output_dir)).to_pandas().sort_values("row_index")
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_scores_file_in_chunks(scoring_env, input_csv, tmp_path, workers):
+    output_dir = tmp_path / "saida"
+    args = batch_score.parse_args([input_csv, str(output_dir), "--model-name", "batch_model", "--version", "1",
+                                   "--chunk-rows", "3", "--workers", workers, "--id-column", "id"])
+
+    report = batch_score.run(args)
+
+    assert report["rows_scored"] == 10
+    assert report["model_version"] == "1"
+    assert sorted(f for f in os.listdir(output_dir) if f.endswith(".parquet")) == [
+        f"part-{i:06d}.parquet" for i in range(4)
+    ]
+    result = read_output(output_dir)
+    assert result["id"].tolist() == list(range(10))
+    assert result["prediction"].tolist() == [float(i * 2) for i in range(10)]
+    assert set(result["model_version"]) == {"1"}
+    assert pq.read_schema(batch_score.part_path(str(output_dir), 0)).metadata[b"model_version"] == b"1"
+
+
+def test_alias_is_resolved_against_configured_registry(scoring_env, input_csv, tmp_path):
+    # Sem set_tracking_uri prévio: o alias é resolvido na URI das configurações
+    mlflow.set_tracking_uri(f"file://{tmp_path / 'outro-mlruns'}")
+    try:
+        output_dir = tmp_path / "saida"
+        args = batch_score.parse_args([input_csv, str(output_dir), "--model-name", "batch_model",
+                                       "--alias", "champion", "--workers", "1"])
+        report = batch_score.run(args)
+    finally:
+        mlflow.set_tracking_uri(scoring_env)
+
+    assert report["model_version"] == "1"
+    assert report["rows_scored"] == 10
+
+
+def test_resume_skips_completed_chunks(scoring_env, input_csv, tmp_path):
+    output_dir = tmp_path / "saida"
+    argv = [input_csv, str(output_dir), "--model-name", "batch_model", "--version", "1",
+            "--chunk-rows", "3", "--workers", "1"]
+    batch_score.run(batch_score.parse_args(argv))
+    os.remove(batch_score.part_path(str(output_dir), 2))
+
+    report = batch_score.run(batch_score.parse_args(argv))
+
+    assert report["rows_scored"] == 3
+    assert report["rows_skipped"] == 7
+    assert len(read_output(output_dir)) == 10
+
+
+def test_resume_with_other_parameters_is_refused(scoring_env, input_csv, tmp_path):
+    output_dir = tmp_path / "saida"
+    base = [input_csv, str(output_dir), "--model-name", "batch_model", "--version", "1", "--workers", "1"]
+    batch_score.run(batch_score.parse_args(base + ["--chunk-rows", "3"]))
+
+    with pytest.raises(SystemExit):
+        batch_score.run(batch_score.parse_args(base + ["--chunk-rows", "4"]))
@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+import numpy as np
+import pandas as pd
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services.batcher import PredictBatcher
+from app.services.model_service import ModelRegistry, LoadedModel
+
+
+async def echo_runner(model, df):
+    # Devolve o próprio valor de entrada para validar o fatiamento
+    return df["x"].to_numpy()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_batched():
+    runner = AsyncMock(side_effect=echo_runner)
+    batcher = PredictBatcher(runner=runner, max_rows=100, window_ms=20)
+    model = object()
+
+    results = await asyncio.gather(
+        batcher.submit(model, pd.DataFrame({"x": [1, 2]})),
+        batcher.submit(model, pd.DataFrame({"x": [3]})),
+        batcher.submit(model, pd.DataFrame({"x": [4, 5, 6]})),
+    )
+
+    assert runner.await_count == 1
+    assert [list(r) for r in results] == [[1, 2], [3], [4, 5, 6]]
+
+
+@pytest.mark.asyncio
+async def test_batch_flushes_when_max_rows_reached():
+    runner = AsyncMock(side_effect=echo_runner)
+    # Janela longa: somente o limite de linhas pode disparar o flush
+    batcher = PredictBatcher(runner=runner, max_rows=3, window_ms=10_000)
+    model = object()
+
+    results = await asyncio.wait_for(
+        asyncio.gather(
+            batcher.submit(model, pd.DataFrame({"x": [1, 2]})),
+            batcher.submit(model, pd.DataFrame({"x": [3]})),
+        ),
+        timeout=1,
+    )
+
+    assert runner.await_count == 1
+    assert [list(r) for r in results] == [[1, 2], [3]]
+
+
+@pytest.mark.asyncio
+async def test_batches_are_split_by_model_and_columns():
+    async def zeros_runner(model, df):
+        return np.zeros(len(df))
+
+    runner = AsyncMock(side_effect=zeros_runner)
+    batcher = PredictBatcher(runner=runner, max_rows=100, window_ms=10)
+
+    await asyncio.gather(
+        batcher.submit("modelo_a", pd.DataFrame({"x": [1]})),
+        batcher.submit("modelo_b", pd.DataFrame({"x": [1]})),
+        batcher.submit("modelo_a", pd.DataFrame({"y": [1]})),
+    )
+
+    assert runner.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_runner_error_propagates_to_all_callers():
+    runner = AsyncMock(side_effect=RuntimeError("falha no modelo"))
+    batcher = PredictBatcher(runner=runner, max_rows=100, window_ms=5)
+    model = object()
+
+    results = await asyncio.gather(
+        batcher.submit(model, pd.DataFrame({"x": [1]})),
+        batcher.submit(model, pd.DataFrame({"x": [2]})),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert runner.await_count == 1
+
+
+@pytest.mark.asyncio
+@patch("app.services.model_service.settings.PREDICT_BATCHING_ENABLED", True)
+@patch("app.services.model_service.history_service.add", new_callable=AsyncMock)
+async def test_model_registry_predict_uses_batcher(mock_add):
+    ModelRegistry._instance = None
+    registry = ModelRegistry()
+    model = MagicMock()
+    model.predict.side_effect = lambda df: df["feature1"].to_numpy() * 10
+    registry.register(LoadedModel(
+        model=model, model_name="titanic_model", model_version="2", model_uri="models:/titanic_model/2",
+    ))
+
+    first, second = await asyncio.gather(
+        registry.predict([{"feature1": 1}]),
+        registry.predict([{"feature1": 2}, {"feature1": 3}]),
+    )
+
+    assert first == [10.0]
+    assert second == [20.0, 30.0]
+    model.predict.assert_called_once()
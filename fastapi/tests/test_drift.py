@@ -0,0 +1,109 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import pytest
+from mlflow.types import ColSpec, Schema
+
+from app.drift_profile import main as drift_profile_main
+from app.services.drift import DriftMonitor, build_reference_profile, load_reference_profile
+
+
+def make_frame(n=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "Age": rng.normal(30, 10, n).round(),
+        "Sex": rng.choice(["male", "female"], n, p=[0.6, 0.4]),
+        "Embarked": rng.choice(["S", "C", "Q", None], n, p=[0.7, 0.2, 0.05, 0.05]),
+    })
+
+
+def make_loaded(input_schema=None):
+    return SimpleNamespace(model_name="modelo", model_version="1", input_schema=input_schema)
+
+
+def test_reference_profile():
+    profile = build_reference_profile(make_frame(), numeric_bins=4, max_categories=2)
+
+    assert profile["Age"]["type"] == "numeric"
+    assert len(profile["Age"]["edges"]) == 3
+    # Faixas + nulos (numérico); categorias + "outras" + nulos (texto)
+    assert len(profile["Age"]["expected"]) == 5
+    assert profile["Embarked"]["categories"] == ["S", "C"]
+    assert len(profile["Embarked"]["expected"]) == 4
+    assert sum(profile["Sex"]["expected"]) == pytest.approx(1.0)
+
+
+def test_psi_detects_shift():
+    reference = make_frame()
+    monitor = DriftMonitor(build_reference_profile(reference), min_rows=1, publish_interval=0)
+
+    same = monitor.update("modelo", "1", reference)
+    assert max(same.values()) == pytest.approx(0.0, abs=1e-9)
+
+    shifted = reference.assign(Age=reference["Age"] + 15, Sex="female")
+    monitor = DriftMonitor(build_reference_profile(reference), min_rows=1, publish_interval=0)
+    scores = monitor.update("modelo", "1", shifted)
+    assert scores["Age"] > 0.25
+    assert scores["Sex"] > 0.25
+    assert scores["Embarked"] == pytest.approx(0.0, abs=1e-9)
+
+
+def test_window_decay_and_min_rows():
+    monitor = DriftMonitor(build_reference_profile(make_frame()), window_rows=150, min_rows=100, publish_interval=0)
+
+    assert monitor.update("modelo", "1", make_frame(60, seed=1)) == {}
+    monitor.update("modelo", "1", make_frame(60, seed=2))
+    monitor.update("modelo", "1", make_frame(60, seed=3))
+
+    sketch = monitor._sketches[("modelo", "1")]
+    assert sketch.rows == 90
+    assert sketch.counts["Sex"].sum() == 90
+
+
+def test_features_follow_signature():
+    monitor = DriftMonitor(build_reference_profile(make_frame()))
+    schema = Schema([ColSpec("double", "Age"), ColSpec("double", "Sex"), ColSpec("string", "Embarked")])
+
+    assert set(monitor._features(make_frame(10), schema)) == {"Age", "Embarked"}
+    assert set(monitor._features(make_frame(10)[["Sex"]], None)) == {"Sex"}
+
+
+@pytest.mark.asyncio
+async def test_submit_updates_in_background_and_drops_when_full():
+    monitor = DriftMonitor(build_reference_profile(make_frame()), min_rows=1, max_queue=1, publish_interval=0)
+    monitor.start()
+    try:
+        monitor.submit(make_loaded(), make_frame(10))
+        await asyncio.wait_for(monitor._queue.join(), timeout=5)
+        assert set(monitor.scores("modelo", "1")) == {"Age", "Sex", "Embarked"}
+
+        monitor._queue.put_nowait(None)  # ocupa a fila sem liberar o consumidor
+        monitor.submit(make_loaded(), make_frame(10))
+        assert monitor._queue.qsize() == 1
+    finally:
+        await monitor.close()
+
+
+def test_profile_cli(tmp_path):
+    source = tmp_path / "train.csv"
+    output = tmp_path / "profile.json"
+    make_frame().to_csv(source, index=False)
+
+    drift_profile_main([str(source), str(output), "--columns", "Age", "Sex", "--numeric-bins", "5"])
+
+    profile = json.loads(output.read_text())
+    assert set(profile) == {"Age", "Sex"}
+    assert load_reference_profile(str(output)) == profile
+    assert load_reference_profile(str(source))["Age"]["type"] == "numeric"
+
+
+def test_reference_profile_skips_unique_text_columns():
+    df = make_frame(n=200)
+    df["Name"] = [f"Passageiro {i}" for i in range(len(df))]
+
+    profile = build_reference_profile(df, max_categories=5)
+    assert "Name" not in profile
+    assert set(profile) == {"Age", "Sex", "Embarked"}
@@ -0,0 +1,71 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.health_prober import HealthProber
+
+
+async def test_probe_once_records_results():
+    prober = HealthProber(interval=60, timeout=0.05)
+
+    async def ok():
+        return True
+
+    async def broken():
+        raise ConnectionError("recusado")
+
+    async def slow():
+        await asyncio.sleep(1)
+        return True
+
+    prober.register("ok", ok)
+    prober.register("broken", broken)
+    prober.register("slow", slow)
+
+    assert prober.result("ok").ok is False  # ainda sem checagem
+    await prober.probe_once()
+
+    snapshot = prober.snapshot()
+    assert snapshot["ok"]["ok"] is True
+    assert snapshot["ok"]["age_seconds"] >= 0
+    assert snapshot["broken"]["ok"] is False
+    assert snapshot["broken"]["error"] == "recusado"
+    assert snapshot["slow"]["ok"] is False
+    assert "timeout" in snapshot["slow"]["error"]
+
+
+async def test_background_loop_refreshes_snapshot():
+    prober = HealthProber(interval=0.01, timeout=1)
+    calls = []
+
+    async def check():
+        calls.append(time.time())
+        return True
+
+    prober.register("dep", check)
+    prober.start()
+    await asyncio.sleep(0.05)
+    await prober.close()
+
+    assert len(calls) >= 2
+    assert prober.result("dep").ok is True
+
+
+async def test_blocking_mlflow_check_does_not_block_event_loop(monkeypatch):
+    from app.services import mlflow_status
+
+    monkeypatch.setattr(mlflow_status, "check_mlflow_connection", lambda: time.sleep(0.2) or True)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.01)
+
+    task = asyncio.create_task(ticker())
+    assert await mlflow_status.check_mlflow_connection_async() is True
+    task.cancel()
+
+    assert ticks > 5
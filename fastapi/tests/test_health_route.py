@@ -45,6 +45,7 @@ async def test_health_check_success():
     assert data["mlflow_reachable"] is True
     assert data["mongodb_reachable"] is True
     assert data["prometheus_metrics_available"] is True
+    assert set(data["checks"]) >= {"mlflow", "mongodb"}
 
 
 @pytest.mark.asyncio
@@ -69,3 +70,36 @@ async def test_health_check_with_dependencies_down():
     assert data["prometheus_metrics_available"] is False
 
     app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_liveness_has_no_dependencies():
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/v1/health/live")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"status": "alive"}
+
+
+@pytest.mark.asyncio
+async def test_readiness_waits_for_model():
+    from app.services.startup import PreloadState, get_preload_state
+
+    registry = MagicMock()
+    registry.is_model_loaded.return_value = False
+    app.dependency_overrides[get_model_registry] = lambda: registry
+    app.dependency_overrides[get_preload_state] = lambda: PreloadState(status="retrying", attempts=2, last_error="MLflow fora")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        not_ready = await ac.get("/v1/health/ready")
+        registry.is_model_loaded.return_value = True
+        registry.get_model_version.return_value = "7"
+        registry.get_model_uri.return_value = "models:/titanic/7"
+        ready = await ac.get("/v1/health/ready")
+
+    app.dependency_overrides.clear()
+
+    assert not_ready.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert not_ready.json()["preload"]["attempts"] == 2
+    assert ready.status_code == status.HTTP_200_OK
+    assert ready.json()["model_version"] == "7"
@@ -0,0 +1,217 @@
+import asyncio
+import datetime
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bson import ObjectId
+
+from app.schemas.history import HistoryFilters
+from app.services.history_buffer import RecentHistoryBuffer
+from app.services.history_service import HistoryService, decode_cursor
+
+BASE = datetime.datetime(2025, 8, 6, 14, 0, 0)
+
+
+def make_item(i, model_name="modelo", rows=1):
+    return {
+        "input_payload": [{"x": i}] * rows,
+        "output_payload": [i] * rows,
+        "model_name": model_name,
+        "model_alias": None,
+        "model_version": "1",
+        "timestamp": (BASE + datetime.timedelta(seconds=i)).isoformat(),
+    }
+
+
+def fill(buffer, n, start=0, **kwargs):
+    ids = []
+    for i in range(start, start + n):
+        ids.append(ObjectId())
+        buffer.add(BASE + datetime.timedelta(seconds=i), ids[-1], make_item(i, **kwargs))
+    return ids
+
+
+def test_page_serves_newest_items_and_cursor():
+    buffer = RecentHistoryBuffer(max_items=10)
+    ids = fill(buffer, 10)
+
+    page = buffer.page(None, skip=0, limit=3)
+    assert [item["output_payload"] for item in page.items] == [[9], [8], [7]]
+    assert page.next_key == (BASE + datetime.timedelta(seconds=7), ids[7])
+    assert page.total is None
+
+    page = buffer.page(None, skip=0, limit=3, after=page.next_key)
+    assert [item["output_payload"] for item in page.items] == [[6], [5], [4]]
+
+    # O restante pode estar só no MongoDB
+    assert buffer.page(None, skip=0, limit=3, after=(BASE + datetime.timedelta(seconds=2), ids[2])) is None
+    assert buffer.page(None, skip=8, limit=3) is None
+
+
+def test_filters_and_start_inside_buffer():
+    buffer = RecentHistoryBuffer(max_items=10)
+    fill(buffer, 6)
+    buffer.add(BASE + datetime.timedelta(seconds=6), ObjectId(), make_item(6, model_name="outro"))
+
+    page = buffer.page(HistoryFilters(model_name="outro"), skip=0, limit=5)
+    assert page is None
+
+    start = BASE + datetime.timedelta(seconds=3, milliseconds=500)
+    page = buffer.page(HistoryFilters(model_name="modelo", start=start.replace(tzinfo=datetime.timezone.utc)), 0, 5)
+    assert [item["output_payload"] for item in page.items] == [[5], [4]]
+
+
+def test_eviction_by_items_and_rows():
+    buffer = RecentHistoryBuffer(max_items=5, max_rows=12)
+    buffer.replace([], exhaustive=True)
+    fill(buffer, 3)
+    assert buffer.exhaustive
+    assert buffer.page(None, skip=0, limit=10).total == 3
+
+    fill(buffer, 4, start=3, rows=3)
+    # Itens e linhas limitados: 12 linhas cabem nos 4 itens de 3 linhas
+    assert len(buffer) == 4
+    assert buffer.page(None, skip=0, limit=10) is None
+    assert not buffer.exhaustive
+    # Um item mais antigo que o buffer deixaria uma lacuna: é ignorado
+    buffer.add(BASE - datetime.timedelta(seconds=1), ObjectId(), make_item(-1))
+    assert len(buffer) == 4
+
+
+def mock_collection(docs=()):
+    cursor = MagicMock()
+    cursor.sort.return_value = cursor
+    cursor.limit.return_value = cursor
+    cursor.to_list = AsyncMock(return_value=list(docs))
+
+    async def iterate():
+        for doc in docs:
+            yield doc
+
+    cursor.__aiter__ = lambda self=cursor: iterate()
+    collection = MagicMock()
+    collection.find = MagicMock(return_value=cursor)
+    collection.insert_one = AsyncMock()
+    collection.count_documents = AsyncMock(return_value=100)
+    collection.estimated_document_count = AsyncMock(return_value=100)
+    return collection
+
+
+@pytest.mark.asyncio
+async def test_service_serves_recent_pages_from_buffer():
+    collection = mock_collection()
+    history_service = HistoryService(collection=collection, buffer=RecentHistoryBuffer(max_items=100))
+    await history_service.load_buffer()
+
+    for i in range(5):
+        await history_service.add([{"x": i}], [i], "modelo", "1")
+    collection.find.reset_mock()
+
+    items, total, next_cursor = await history_service.list(limit=2)
+    assert [item["output_payload"] for item in items] == [[4], [3]]
+    # Coleção vazia na carga: o buffer tem todo o histórico, inclusive o total
+    assert total == 5
+    assert decode_cursor(next_cursor)[1] == collection.insert_one.await_args_list[3].args[0]["_id"]
+    collection.find.assert_not_called()
+    collection.count_documents.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_service_falls_back_to_mongo_for_older_pages():
+    old_docs = [
+        {"_id": ObjectId(), "timestamp": BASE - datetime.timedelta(seconds=i), "input_payload": [{"x": i}],
+         "output_payload": [i], "model_name": "modelo", "model_version": "1", "model_alias": None}
+        for i in range(3)
+    ]
+    collection = mock_collection(old_docs)
+    history_service = HistoryService(collection=collection, buffer=RecentHistoryBuffer(max_items=3))
+    await history_service.load_buffer()
+    assert not history_service.buffer.exhaustive
+
+    items, total, _ = await history_service.list(limit=2)
+    assert total == 100
+    assert len(items) == 2
+    collection.estimated_document_count.assert_awaited_once()
+
+    # Segunda página recente: contagem reaproveitada do cache
+    await history_service.list(limit=1)
+    collection.estimated_document_count.assert_awaited_once()
+
+    collection.find.reset_mock()
+    await history_service.list(skip=2, limit=2)
+    collection.find.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_refresh_brings_documents_from_other_workers():
+    collection = mock_collection()
+    history_service = HistoryService(collection=collection, buffer=RecentHistoryBuffer(max_items=10))
+    await history_service.add([{"x": 0}], [0], "modelo", "1")
+    local = collection.insert_one.await_args.args[0]
+
+    other = {"_id": ObjectId(), "timestamp": local["timestamp"] + datetime.timedelta(milliseconds=5),
+             "input_payload": [{"x": 1}], "output_payload": [1], "model_name": "modelo", "model_version": "1",
+             "model_alias": None}
+    keys = [{"_id": other["_id"], "timestamp": other["timestamp"]}, {"_id": local["_id"], "timestamp": local["timestamp"]}]
+    collection.find = MagicMock(side_effect=[mock_collection(keys).find(), mock_collection([other]).find()])
+
+    await history_service.refresh_buffer()
+
+    assert collection.find.call_args_list[1].args[0] == {"_id": {"$in": [other["_id"]]}}
+    page = history_service.buffer.page(None, skip=0, limit=1)
+    assert page.items[0]["output_payload"] == [1]
+
+
+@pytest.mark.asyncio
+async def test_writer_buffers_only_confirmed_records():
+    from app.services.history_writer import HistoryWriter
+
+    collection = mock_collection()
+    collection.insert_many = AsyncMock(side_effect=[Exception("Mongo fora do ar"), None])
+    writer = HistoryWriter(collection, max_queue=1, batch_size=1, flush_interval=0.01)
+    history_service = HistoryService(collection=collection, writer=writer, buffer=RecentHistoryBuffer(max_items=10))
+    history_service.buffer.replace([], exhaustive=True)
+
+    await history_service.add([{"x": 0}], [0], "modelo", "1")
+    await asyncio.wait_for(writer._queue.join(), timeout=1)
+    # Falhou no MongoDB: não aparece no /history
+    assert len(history_service.buffer) == 0
+
+    await history_service.add([{"x": 1}], [1], "modelo", "1")
+    # Fila cheia (política drop): descartado, também fora do buffer
+    await history_service.add([{"x": 2}], [2], "modelo", "1")
+    await asyncio.wait_for(writer._queue.join(), timeout=1)
+    await writer.close()
+
+    page = history_service.buffer.page(None, skip=0, limit=10)
+    assert [item["output_payload"] for item in page.items] == [[1]]
+    assert page.total == 1
+
+
+@pytest.mark.asyncio
+async def test_refresh_of_busy_window_fetches_only_missing_documents():
+    collection = mock_collection()
+    history_service = HistoryService(collection=collection, buffer=RecentHistoryBuffer(max_items=3))
+    for i in range(2):
+        await history_service.add([{"x": i}], [i], "modelo", "1")
+    local = [call.args[0] for call in collection.insert_one.await_args_list]
+
+    # Outros workers gravaram mais do que o buffer comporta dentro da janela
+    others = [
+        {"_id": ObjectId(), "timestamp": local[-1]["timestamp"] + datetime.timedelta(milliseconds=i + 1),
+         "input_payload": [{"x": 10 + i}], "output_payload": [10 + i], "model_name": "modelo", "model_version": "1",
+         "model_alias": None}
+        for i in range(2)
+    ]
+    keys = [{"_id": doc["_id"], "timestamp": doc["timestamp"]} for doc in reversed(others)]
+    keys.append({"_id": local[-1]["_id"], "timestamp": local[-1]["timestamp"]})
+    collection.find = MagicMock(side_effect=[mock_collection(keys).find(), mock_collection(others).find()])
+
+    await history_service.refresh_buffer()
+
+    # Uma página de chaves e um $in só com os documentos que faltavam, sem recarga completa
+    assert collection.find.call_count == 2
+    assert collection.find.call_args_list[1].args[0] == {"_id": {"$in": [doc["_id"] for doc in reversed(others)]}}
+    assert len(history_service.buffer) == 3
+    assert [history_service.buffer.get(key["_id"])["output_payload"] for key in keys] == [[11], [10], [1]]
+    assert local[0]["_id"] not in history_service.buffer
@@ -0,0 +1,127 @@
+import datetime
+import math
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.services.history_rollups import HistoryRollups
+
+
+def make_rollups(**kwargs):
+    collection = MagicMock()
+    collection.name = "history_rollups"
+    collection.bulk_write = AsyncMock()
+    return HistoryRollups(collection=collection, **kwargs)
+
+
+def test_bucket_alignment():
+    rollups = make_rollups(bucket_minutes=15)
+
+    assert rollups.bucket_of(datetime.datetime(2025, 8, 6, 14, 29, 59)) == datetime.datetime(2025, 8, 6, 14, 15)
+    assert rollups.histogram_edges[:2] == [0.0, 0.1]
+
+
+@pytest.mark.asyncio
+async def test_record_and_flush_increments():
+    rollups = make_rollups(histogram_bins=4)
+    timestamp = datetime.datetime(2025, 8, 6, 14, 10)
+
+    rollups.record(timestamp, "modelo", "1", [0.1, 0.9, 1.5, -2, True, "sim", float("nan")])
+    rollups.record(timestamp + datetime.timedelta(minutes=5), "modelo", "1", [0.3])
+    await rollups.flush()
+
+    operations = rollups.collection.bulk_write.await_args.args[0]
+    assert len(operations) == 1
+    assert operations[0]._filter == {
+        "model_name": "modelo", "model_version": "1", "bucket": datetime.datetime(2025, 8, 6, 14),
+    }
+    increments = operations[0]._doc["$inc"]
+    assert increments["requests"] == 2
+    assert increments["predictions"] == 8
+    assert increments["score_count"] == 5
+    assert increments["score_sum"] == pytest.approx(0.8)
+    assert (increments["hist.0"], increments["hist.1"], increments["hist.3"]) == (2, 1, 2)
+    assert increments["labels.true"] == 1
+    assert increments["labels.sim"] == 1
+
+
+@pytest.mark.asyncio
+async def test_flush_failure_keeps_increments():
+    rollups = make_rollups()
+    rollups.collection.bulk_write.side_effect = [Exception("mongo fora"), None]
+    rollups.record(datetime.datetime(2025, 8, 6, 14), "modelo", "1", [0.5])
+
+    await rollups.flush()
+    rollups.record(datetime.datetime(2025, 8, 6, 14), "modelo", "1", [0.5])
+    await rollups.flush()
+
+    increments = rollups.collection.bulk_write.await_args.args[0][0]._doc["$inc"]
+    assert increments["requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_backfill_merges_into_rollups():
+    rollups = make_rollups()
+    history = MagicMock()
+    history.aggregate.return_value.to_list = AsyncMock(return_value=[])
+
+    await rollups.backfill(history, {"model_name": "modelo"})
+
+    pipeline = history.aggregate.call_args.args[0]
+    assert pipeline[0] == {"$match": {"model_name": "modelo"}}
+    assert pipeline[-1]["$merge"]["into"] == "history_rollups"
+    assert pipeline[-1]["$merge"]["on"] == ["model_name", "model_version", "bucket"]
+
+
+def _bson_key(value):
+    # Ordem do MongoDB entre números: NaN antes de todos, inclusive -Infinity
+    return (0, 0) if value != value else (1, value)
+
+
+def _evaluate(expr, this):
+    # Avaliador mínimo dos operadores usados nos scores do backfill, com a semântica do MongoDB
+    if expr == "$$this":
+        return this
+    if not isinstance(expr, dict):
+        return expr
+    (op, args), = expr.items()
+    if op == "$and":
+        return all(_evaluate(arg, this) for arg in args)
+    if op == "$isNumber":
+        value = _evaluate(args, this)
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+    if op == "$floor":
+        return math.floor(_evaluate(args, this))
+    values = [_evaluate(arg, this) for arg in args]
+    if op in ("$eq", "$ne"):
+        equal = _bson_key(values[0]) == _bson_key(values[1])
+        return equal if op == "$eq" else not equal
+    if op == "$gt":
+        return _bson_key(values[0]) > _bson_key(values[1])
+    if op == "$lt":
+        return _bson_key(values[0]) < _bson_key(values[1])
+    operations = {
+        "$min": min, "$max": max,
+        "$multiply": lambda a, b: a * b, "$divide": lambda a, b: a / b, "$subtract": lambda a, b: a - b,
+    }
+    return operations[op](*values)
+
+
+@pytest.mark.asyncio
+async def test_backfill_and_record_agree_on_scores():
+    rollups = make_rollups(histogram_bins=4)
+    outputs = [0.1, float("nan"), float("inf"), float("-inf"), 0.9, -2, 1.5, True, "sim"]
+    rollups.record(datetime.datetime(2025, 8, 6, 14), "modelo", "1", outputs)
+    await rollups.flush()
+    increments = rollups.collection.bulk_write.await_args.args[0][0]._doc["$inc"]
+
+    pipeline = rollups.backfill_pipeline({})
+    condition = pipeline[2]["$project"]["scores"]["$filter"]["cond"]
+    scores = [value for value in outputs if _evaluate(condition, value)]
+    assert len(scores) == increments["score_count"]
+    assert sum(scores) == pytest.approx(increments["score_sum"])
+
+    group = pipeline[3]["$group"]
+    for i in range(rollups.histogram_bins):
+        bin_of = group[f"hist_{i}"]["$sum"]["$size"]["$filter"]["cond"]
+        assert sum(1 for score in scores if _evaluate(bin_of, score)) == increments.get(f"hist.{i}", 0)
@@ -19,7 +19,7 @@ def mock_history_service():
             "model_alias": "production",
             "timestamp": "2025-08-06T14:00:00"
         }
-    ], 1))
+    ], 1, "proximo"))
     return service
 
 
@@ -42,6 +42,40 @@ async def test_get_history_success():
     assert json_data["total"] == 1
     assert len(json_data["items"]) == 1
     assert json_data["items"][0]["model_name"] == "modelo"
+    assert json_data["next_cursor"] == "proximo"
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("override_dependency")
+async def test_get_history_with_cursor_and_filters(mock_history_service):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get(
+            "/history?limit=5&cursor=abc&model_name=modelo&model_version=1"
+            "&start=2025-08-01T00:00:00&exact_count=true"
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    kwargs = mock_history_service.list.await_args.kwargs
+    assert kwargs["cursor"] == "abc"
+    assert kwargs["limit"] == 5
+    assert kwargs["exact_count"] is True
+    assert kwargs["filters"].model_name == "modelo"
+    assert kwargs["filters"].model_version == "1"
+    assert kwargs["filters"].start.year == 2025
+    assert kwargs["filters"].end is None
+
+
+@pytest.mark.asyncio
+async def test_get_history_invalid_cursor(mock_history_service):
+    from app.services.history_service import get_history_service, InvalidCursorError
+    mock_history_service.list.side_effect = InvalidCursorError("Cursor de paginação inválido.")
+    app.dependency_overrides[get_history_service] = lambda: mock_history_service
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/history?cursor=lixo")
+
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    app.dependency_overrides.clear()
 
 
 @pytest.mark.asyncio
@@ -58,3 +92,218 @@ async def test_get_history_failure(mock_history_service):
     assert response.json()["detail"] == "Erro interno ao buscar histórico"
 
     app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("override_dependency")
+async def test_get_history_analytics(mock_history_service):
+    from app.schemas.history import HistoryFilters
+
+    mock_history_service.rollups = MagicMock(histogram_edges=[0.0, 0.5, 1.0])
+    mock_history_service.analytics = AsyncMock(return_value=[{
+        "model_name": "modelo", "model_version": "1", "bucket": "2025-08-06T14:00:00",
+        "requests": 3, "predictions": 5, "mean_score": 0.4, "histogram": [3, 2], "labels": {},
+    }])
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/history/analytics?bucket=day&model_name=modelo")
+
+    assert response.status_code == status.HTTP_200_OK
+    body = response.json()
+    assert body["bucket"] == "day"
+    assert body["items"][0]["histogram"] == [3, 2]
+    mock_history_service.analytics.assert_awaited_once_with(filters=HistoryFilters(model_name="modelo"), unit="day")
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("override_dependency")
+async def test_get_history_analytics_disabled(mock_history_service):
+    from app.services.history_service import RollupsDisabledError
+
+    mock_history_service.analytics = AsyncMock(side_effect=RollupsDisabledError("desabilitado"))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/history/analytics")
+        invalid = await ac.get("/history/analytics?bucket=decade")
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert invalid.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+def export_batches(*batches):
+    calls = []
+
+    def export(**kwargs):
+        calls.append(kwargs)
+
+        async def generator():
+            for batch in batches:
+                yield batch
+
+        return generator()
+
+    export.calls = calls
+    return export
+
+
+HISTORY_ITEM = {
+    "input_payload": [{"Sex": "male", "Age": None}, {"Sex": "female", "Age": 30.0}],
+    "output_payload": [0.2, 0.7],
+    "model_name": "modelo",
+    "model_version": "1",
+    "model_alias": "production",
+    "timestamp": "2025-08-06T14:00:00",
+}
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("override_dependency")
+async def test_export_history_ndjson(mock_history_service):
+    import json
+
+    mock_history_service.export = export_batches([HISTORY_ITEM], [HISTORY_ITEM])
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/history/export?model_name=modelo&batch_size=1")
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [HISTORY_ITEM, HISTORY_ITEM]
+    assert mock_history_service.export.calls[0]["batch_size"] == 1
+    assert mock_history_service.export.calls[0]["filters"].model_name == "modelo"
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("override_dependency")
+async def test_export_history_parquet(mock_history_service):
+    import io
+    import pyarrow.parquet as pq
+
+    later = {**HISTORY_ITEM, "input_payload": [{"Sex": "male", "Age": 40.5}], "output_payload": [0.9]}
+    mock_history_service.export = export_batches([HISTORY_ITEM], [later])
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/history/export?format=parquet")
+
+    assert response.status_code == status.HTTP_200_OK
+    parquet_file = pq.ParquetFile(io.BytesIO(response.content))
+    assert parquet_file.num_row_groups == 2
+    rows = parquet_file.read().to_pylist()
+    assert [row["prediction"] for row in rows] == [0.2, 0.7, 0.9]
+    assert [row["Age"] for row in rows] == [None, 30.0, 40.5]
+    assert rows[2]["row_index"] == 0 and rows[2]["model_version"] == "1"
+
+
+def test_parquet_writer_refuses_schema_changes():
+    from app.utils.arrow_io import ParquetStreamWriter
+
+    writer = ParquetStreamWriter()
+    writer.write([{"a": 1, "b": None, "f": 0.5}])
+    # Inteiros em coluna float são aceitos sem perda
+    writer.write([{"a": 2, "b": "x", "f": 1}])
+    for rows in ([{"a": 1.5}], [{"a": 1, "b": 2}], [{"a": 1, "c": 3}], [{"a": 1, "b": ["x", 1]}]):
+        with pytest.raises(ValueError):
+            writer.write(rows)
+
+
+def test_parquet_writer_waits_for_column_types():
+    import io
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from app.utils.arrow_io import ParquetStreamWriter
+
+    writer = ParquetStreamWriter(max_pending_rows=3)
+    # Coluna só com nulos: o lote fica retido até o tipo aparecer
+    assert writer.write([{"Age": None, "Fare": 7}]) == b""
+    data = writer.write([{"Age": 30, "Fare": 7.25}])
+    # Inteiros e floats no trecho retido: a coluna vira float
+    assert writer.schema.field("Fare").type == pa.float64()
+    data += writer.write([{"Age": None, "Fare": 8}]) + writer.close()
+    rows = pq.read_table(io.BytesIO(data)).to_pylist()
+    assert rows == [{"Age": None, "Fare": 7.0}, {"Age": 30, "Fare": 7.25}, {"Age": None, "Fare": 8.0}]
+
+    # Acima do limite de linhas retidas, colunas só com nulos viram texto
+    writer = ParquetStreamWriter(max_pending_rows=2)
+    assert writer.write([{"Cabin": None}]) == b""
+    assert writer.write([{"Cabin": None}])
+    assert writer.schema.field("Cabin").type == pa.string()
+
+
+def test_parquet_writer_uses_signature_types():
+    from mlflow.types import ColSpec, Schema
+    import pyarrow as pa
+    from app.utils.arrow_io import ParquetStreamWriter, schema_from_signatures
+
+    schema = schema_from_signatures([
+        Schema([ColSpec("double", "Fare"), ColSpec("long", "Pclass"), ColSpec("string", "Cabin")]),
+        Schema([ColSpec("long", "Fare"), ColSpec("long", "Pclass")]),
+    ])
+    assert [(field.name, field.type) for field in schema] == [
+        ("Fare", pa.float64()), ("Pclass", pa.int64()), ("Cabin", pa.string()),
+    ]
+
+    writer = ParquetStreamWriter(schema)
+    # Primeiro lote só com inteiros e nulos: a assinatura já define os tipos
+    assert writer.write([{"Fare": 7, "Pclass": 3, "Cabin": None}])
+    writer.write([{"Fare": 7.25, "Pclass": True, "Cabin": "C85"}])
+    with pytest.raises(ValueError):
+        writer.write([{"Fare": 1.0, "Pclass": 1.5, "Cabin": None}])
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("override_dependency")
+async def test_export_parquet_widens_with_model_signature(mock_history_service):
+    import io
+    from unittest.mock import patch
+    import pyarrow.parquet as pq
+    from mlflow.types import ColSpec, Schema
+
+    ints = {**HISTORY_ITEM, "input_payload": [{"Fare": 7, "Cabin": None}], "output_payload": [0.1]}
+    floats = {**HISTORY_ITEM, "input_payload": [{"Fare": 7.25, "Cabin": "C85"}], "output_payload": [0.2]}
+    mock_history_service.export = export_batches([ints], [floats])
+    registry = MagicMock()
+    registry.input_schemas.return_value = [Schema([ColSpec("double", "Fare"), ColSpec("string", "Cabin")])]
+
+    with patch("app.api.v1.endpoints.history.get_model_registry", return_value=registry):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.get("/history/export?format=parquet&model_name=modelo")
+
+    assert response.status_code == status.HTTP_200_OK
+    registry.input_schemas.assert_called_once_with("modelo", None)
+    rows = pq.read_table(io.BytesIO(response.content)).to_pylist()
+    assert [(row["Fare"], row["Cabin"]) for row in rows] == [(7.0, None), (7.25, "C85")]
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("override_dependency")
+async def test_export_parquet_error_is_not_a_complete_response(mock_history_service):
+    changed = {**HISTORY_ITEM, "input_payload": [{"Sex": 1, "Age": 40.5}], "output_payload": [0.9]}
+    mock_history_service.export = export_batches([HISTORY_ITEM], [changed])
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        with pytest.raises(Exception) as excinfo:
+            await ac.get("/history/export?format=parquet")
+    # A resposta já começou: o erro aborta o stream (no servidor, a conexão)
+    assert "Coluna 'Sex' mudou de tipo" in str(excinfo.getrepr())
+
+    # Erro já no primeiro lote: ainda dá para responder com status de erro
+    mock_history_service.export = export_batches([{**HISTORY_ITEM, "input_payload": [{"Sex": 1}, {"Sex": "x"}]}])
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/history/export?format=parquet")
+    assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
+
+
+@pytest.mark.asyncio
+async def test_get_shadow_history_uses_shadow_service(mock_history_service):
+    from app.services.history_service import get_shadow_history_service
+    app.dependency_overrides[get_shadow_history_service] = lambda: mock_history_service
+    try:
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.get("/history/shadow?limit=1&model_name=modelo")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["next_cursor"] == "proximo"
+    assert mock_history_service.list.await_args.kwargs["filters"].model_name == "modelo"
@@ -1,6 +1,8 @@
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from app.services.history_service import HistoryService
+from app.services.history_service import HistoryService, decode_cursor, encode_cursor, InvalidCursorError
+from app.schemas.history import HistoryFilters
+from bson import ObjectId
 import datetime
 
 @pytest.mark.asyncio
@@ -54,13 +56,13 @@ async def test_list_history():
     # Mock da collection
     mock_collection = MagicMock()
     mock_collection.find = MagicMock(return_value=mock_cursor)
-    mock_collection.count_documents = AsyncMock(return_value=5)
+    mock_collection.estimated_document_count = AsyncMock(return_value=5)
 
     # Instancia o serviço
     history_service = HistoryService(collection=mock_collection)
 
     # Chama o método a ser testado
-    items, total = await history_service.list(skip=0, limit=10)
+    items, total, next_cursor = await history_service.list(skip=0, limit=10)
 
     # Asserts
     assert total == 5
@@ -72,3 +74,222 @@ async def test_list_history():
     assert item["model_version"] == "1"
     assert item["model_alias"] == "prod"
     assert item["timestamp"] == "2025-08-06T14:00:00"
+    assert next_cursor is None
+
+
+def mock_collection_with_docs(docs):
+    mock_cursor = MagicMock()
+    mock_cursor.skip.return_value = mock_cursor
+    mock_cursor.limit.return_value = mock_cursor
+    mock_cursor.sort.return_value = mock_cursor
+
+    async def async_generator():
+        for doc in docs:
+            yield doc
+
+    mock_cursor.__aiter__ = lambda self=mock_cursor: async_generator()
+
+    mock_collection = MagicMock()
+    mock_collection.find = MagicMock(return_value=mock_cursor)
+    mock_collection.count_documents = AsyncMock(return_value=len(docs))
+    mock_collection.estimated_document_count = AsyncMock(return_value=len(docs))
+    return mock_collection, mock_cursor
+
+
+def make_doc(second):
+    return {
+        "_id": ObjectId(),
+        "output_payload": [0.5],
+        "model_name": "modelo",
+        "model_version": "1",
+        "timestamp": datetime.datetime(2025, 8, 6, 14, 0, second),
+    }
+
+
+@pytest.mark.asyncio
+async def test_list_history_returns_next_cursor():
+    docs = [make_doc(s) for s in (3, 2, 1)]
+    mock_collection, mock_cursor = mock_collection_with_docs(docs)
+    history_service = HistoryService(collection=mock_collection)
+
+    items, _, next_cursor = await history_service.list(limit=2)
+
+    assert len(items) == 2
+    mock_cursor.limit.assert_called_once_with(3)
+    timestamp, doc_id = decode_cursor(next_cursor)
+    assert timestamp == docs[1]["timestamp"]
+    assert doc_id == docs[1]["_id"]
+
+
+@pytest.mark.asyncio
+async def test_list_history_with_cursor_uses_keyset_query():
+    last = make_doc(2)
+    mock_collection, _ = mock_collection_with_docs([make_doc(1)])
+    history_service = HistoryService(collection=mock_collection)
+
+    await history_service.list(limit=10, cursor=encode_cursor(last), filters=HistoryFilters(model_name="modelo"))
+
+    query = mock_collection.find.call_args.args[0]
+    assert query["$and"][0] == {"model_name": "modelo"}
+    assert query["$and"][1]["$or"] == [
+        {"timestamp": {"$lt": last["timestamp"]}},
+        {"timestamp": last["timestamp"], "_id": {"$lt": last["_id"]}},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_list_history_counts():
+    mock_collection, _ = mock_collection_with_docs([make_doc(1)])
+    history_service = HistoryService(collection=mock_collection)
+    filters = HistoryFilters(model_name="modelo", start=datetime.datetime(2025, 8, 1))
+
+    # Sem filtros: contagem estimada
+    await history_service.list()
+    mock_collection.estimated_document_count.assert_awaited_once()
+    mock_collection.count_documents.assert_not_awaited()
+
+    # Com filtros: count_documents em cache entre chamadas
+    await history_service.list(filters=filters)
+    await history_service.list(filters=filters)
+    assert mock_collection.count_documents.await_count == 1
+    assert mock_collection.count_documents.await_args.args[0] == {
+        "model_name": "modelo",
+        "timestamp": {"$gte": datetime.datetime(2025, 8, 1)},
+    }
+
+    # exact_count sempre consulta o MongoDB
+    await history_service.list(filters=filters, exact_count=True)
+    assert mock_collection.count_documents.await_count == 2
+
+
+def test_decode_invalid_cursor():
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("nao-e-um-cursor")
+
+
+@pytest.mark.asyncio
+async def test_start_creates_indexes():
+    mock_collection = MagicMock()
+    mock_collection.create_indexes = AsyncMock()
+    history_service = HistoryService(collection=mock_collection)
+
+    await history_service.start()
+
+    index_names = [index.document["name"] for index in mock_collection.create_indexes.await_args.args[0]]
+    assert "timestamp_id" in index_names
+    assert "model_name_version_timestamp_id" in index_names
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compression", ["none", "zlib"])
+async def test_columnar_history_roundtrip(compression):
+    mock_collection = AsyncMock()
+    history_service = HistoryService(collection=mock_collection, storage_format="columnar", compression=compression)
+    inputs = [{"Sex": "male", "Age": 22.0}, {"Sex": "female"}, {"Age": None, "Sex": "male"}]
+
+    await history_service.add(inputs, [0.1, 0.9, 0.4], "modelo", "1", "prod")
+
+    doc = mock_collection.insert_one.await_args.args[0]
+    assert "input_payload" not in doc
+    assert doc["payload_format"] == ("columnar+zlib" if compression == "zlib" else "columnar")
+
+    item = history_service._serialize_history_item({**doc, "_id": ObjectId()})
+    assert item["input_payload"] == inputs
+    assert item["output_payload"] == [0.1, 0.9, 0.4]
+    assert item["model_name"] == "modelo"
+
+
+@pytest.mark.asyncio
+async def test_timeseries_history_uses_meta_field():
+    mock_collection, _ = mock_collection_with_docs([])
+    mock_collection.insert_one = AsyncMock()
+    mock_collection.database.command = AsyncMock(return_value={"cursor": {"firstBatch": []}})
+    mock_collection.database.create_collection = AsyncMock()
+    mock_collection.name = "history"
+    mock_collection.create_indexes = AsyncMock()
+    history_service = HistoryService(collection=mock_collection, timeseries=True, ttl_seconds=86400)
+
+    await history_service.start()
+    await history_service.add([{"x": 1}], [0.9], "modelo", "1")
+    await history_service.list(filters=HistoryFilters(model_name="modelo"))
+
+    mock_collection.database.create_collection.assert_awaited_once_with(
+        "history",
+        timeseries={"timeField": "timestamp", "metaField": "meta", "granularity": "seconds"},
+        expireAfterSeconds=86400,
+    )
+    doc = mock_collection.insert_one.await_args.args[0]
+    assert doc["meta"] == {"model_name": "modelo", "model_version": "1", "model_alias": None}
+    assert mock_collection.find.call_args.args[0] == {"meta.model_name": "modelo"}
+
+
+@pytest.mark.asyncio
+async def test_ttl_index_updates_retention_on_conflict():
+    from pymongo.errors import OperationFailure
+
+    mock_collection = MagicMock()
+    mock_collection.name = "history"
+    mock_collection.create_indexes = AsyncMock(side_effect=[None, OperationFailure("conflito", code=85)])
+    mock_collection.database.command = AsyncMock()
+    history_service = HistoryService(collection=mock_collection, ttl_seconds=3600)
+
+    await history_service.ensure_indexes()
+
+    ttl_index = mock_collection.create_indexes.await_args.args[0][0].document
+    assert ttl_index["expireAfterSeconds"] == 3600
+    mock_collection.database.command.assert_awaited_once_with(
+        "collMod", "history", index={"name": "timestamp_ttl", "expireAfterSeconds": 3600}
+    )
+
+
+@pytest.mark.asyncio
+async def test_export_streams_in_batches():
+    docs = [make_doc(s) for s in (1, 2, 3)]
+    mock_collection, mock_cursor = mock_collection_with_docs(docs)
+    mock_cursor.batch_size.return_value = mock_cursor
+    history_service = HistoryService(collection=mock_collection)
+
+    batches = [batch async for batch in history_service.export(filters=HistoryFilters(model_name="modelo"), batch_size=2)]
+
+    assert [len(batch) for batch in batches] == [2, 1]
+    assert mock_collection.find.call_args.args[0] == {"model_name": "modelo"}
+    mock_cursor.sort.assert_called_once_with([("timestamp", 1), ("_id", 1)])
+    mock_cursor.batch_size.assert_called_once_with(2)
+    mock_cursor.limit.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_rollups_count_only_confirmed_writes():
+    import asyncio
+    from app.services.history_writer import HistoryWriter
+
+    collection = MagicMock()
+    collection.insert_many = AsyncMock(side_effect=[Exception("Mongo fora do ar"), None])
+    collection.insert_one = AsyncMock(side_effect=[Exception("Mongo fora do ar"), None])
+    rollups = MagicMock()
+    writer = HistoryWriter(collection, max_queue=1, batch_size=1, flush_interval=0.01)
+    history_service = HistoryService(collection=collection, writer=writer, storage_format="columnar",
+                                     timeseries=True, rollups=rollups)
+
+    await history_service.add([{"x": 0}, {"x": 1}], [0.1, 0.2], "modelo", "1")
+    await asyncio.wait_for(writer._queue.join(), timeout=1)
+    # Falhou no MongoDB: fora dos rollups
+    rollups.record.assert_not_called()
+
+    await history_service.add([{"x": 0}, {"x": 1}], [0.3, 0.4], "modelo", "1")
+    # Fila cheia (política drop): também fora
+    await history_service.add([{"x": 2}], [0.5], "modelo", "1")
+    await asyncio.wait_for(writer._queue.join(), timeout=1)
+    await writer.close()
+
+    rollups.record.assert_called_once()
+    timestamp, model_name, model_version, outputs = rollups.record.call_args.args
+    assert (model_name, model_version, outputs) == ("modelo", "1", [0.3, 0.4])
+
+    # Sem writer: só depois do insert_one confirmado
+    rollups.reset_mock()
+    history_service = HistoryService(collection=collection, rollups=rollups)
+    await history_service.add([{"x": 0}], [0.1], "modelo", "1")
+    rollups.record.assert_not_called()
+    await history_service.add([{"x": 0}], [0.2], "modelo", "1")
+    rollups.record.assert_called_once()
@@ -0,0 +1,202 @@
+import asyncio
+import datetime
+import os
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.history_service import HistoryService
+from app.services.history_writer import HistoryWriter
+
+
+def make_record(i):
+    return {"timestamp": datetime.datetime(2025, 8, 6, 14, 0, i), "output_payload": [i]}
+
+
+@pytest.mark.asyncio
+async def test_flush_when_batch_size_reached():
+    collection = MagicMock()
+    collection.insert_many = AsyncMock()
+    writer = HistoryWriter(collection, batch_size=3, flush_interval=10)
+
+    for i in range(3):
+        await writer.enqueue(make_record(i))
+    await asyncio.wait_for(writer._queue.join(), timeout=1)
+
+    collection.insert_many.assert_awaited_once()
+    assert len(collection.insert_many.await_args.args[0]) == 3
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_flush_after_interval():
+    collection = MagicMock()
+    collection.insert_many = AsyncMock()
+    writer = HistoryWriter(collection, batch_size=100, flush_interval=0.02)
+
+    await writer.enqueue(make_record(1))
+    await asyncio.sleep(0.1)
+
+    collection.insert_many.assert_awaited_once()
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_close_flushes_pending_records():
+    collection = MagicMock()
+    collection.insert_many = AsyncMock()
+    writer = HistoryWriter(collection, batch_size=100, flush_interval=0.05)
+
+    for i in range(5):
+        await writer.enqueue(make_record(i))
+    await writer.close()
+
+    inserted = sum(len(call.args[0]) for call in collection.insert_many.await_args_list)
+    assert inserted == 5
+
+
+@pytest.mark.asyncio
+async def test_drop_policy_discards_when_queue_is_full():
+    collection = MagicMock()
+    collection.insert_many = AsyncMock()
+    writer = HistoryWriter(collection, max_queue=2, batch_size=100, flush_interval=0.05, backpressure="drop")
+
+    # Sem ceder o loop, o flush não consome a fila: o terceiro registro é descartado
+    for i in range(3):
+        await writer.enqueue(make_record(i))
+    await writer.close()
+
+    inserted = sum(len(call.args[0]) for call in collection.insert_many.await_args_list)
+    assert inserted == 2
+
+
+@pytest.mark.asyncio
+async def test_spill_policy_writes_and_replays(tmp_path):
+    spill_path = str(tmp_path / "spill.ndjson")
+    collection = MagicMock()
+    collection.insert_many = AsyncMock()
+    writer = HistoryWriter(
+        collection, max_queue=1, batch_size=100, flush_interval=0.01,
+        backpressure="spill", spill_path=spill_path,
+    )
+
+    await writer.enqueue(make_record(1))
+    await writer.enqueue(make_record(2))  # fila cheia -> spill
+    assert os.path.exists(spill_path)
+
+    await asyncio.sleep(0.05)  # flush do primeiro registro
+    await writer.enqueue(make_record(3))
+    await asyncio.sleep(0.05)  # fila vazia após o flush -> replay do spill
+    await writer.close()
+
+    inserted = [r["output_payload"][0] for call in collection.insert_many.await_args_list for r in call.args[0]]
+    assert sorted(inserted) == [1, 2, 3]
+    assert not os.path.exists(spill_path)
+    # Datas sobrevivem à serialização do spill
+    replayed = [r for call in collection.insert_many.await_args_list for r in call.args[0] if r["output_payload"] == [2]]
+    assert isinstance(replayed[0]["timestamp"], datetime.datetime)
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_is_spilled(tmp_path):
+    spill_path = str(tmp_path / "spill.ndjson")
+    collection = MagicMock()
+    collection.insert_many = AsyncMock(side_effect=Exception("Mongo fora do ar"))
+    writer = HistoryWriter(collection, batch_size=1, backpressure="spill", spill_path=spill_path)
+
+    await writer.enqueue(make_record(1))
+    await asyncio.wait_for(writer._queue.join(), timeout=1)
+    await writer.close()
+
+    # O replay que falhou mantém o registro no arquivo de replay
+    lines = []
+    for path in (spill_path, writer._replay_path):
+        if os.path.exists(path):
+            with open(path) as f:
+                lines += f.readlines()
+    assert len(lines) == 1
+
+
+@pytest.mark.asyncio
+async def test_replay_resumes_from_offset_after_failure(tmp_path):
+    spill_path = str(tmp_path / "spill.ndjson")
+    collection = MagicMock()
+    collection.insert_many = AsyncMock(side_effect=[None, Exception("Mongo fora do ar"), None, None])
+    writer = HistoryWriter(collection, batch_size=1, backpressure="spill", spill_path=spill_path)
+    writer._spill([make_record(1), make_record(2), make_record(3)])
+
+    await writer._replay_spill()
+    # O restante não é regravado: a próxima tentativa continua do offset
+    assert not os.path.exists(spill_path)
+    assert os.path.exists(writer._replay_path)
+    assert writer._replay_offset > 0
+
+    writer._spill([make_record(4)])  # spill novo durante o replay
+    await writer._replay_spill()
+    inserted = [r["output_payload"][0] for call in collection.insert_many.await_args_list for r in call.args[0]]
+    assert inserted == [1, 2, 2, 3]
+    assert not os.path.exists(writer._replay_path)
+    assert writer._has_spill()
+
+
+@pytest.mark.asyncio
+async def test_replay_after_partial_insert_does_not_duplicate(tmp_path):
+    from bson import ObjectId
+    from pymongo.errors import BulkWriteError
+
+    spill_path = str(tmp_path / "spill.ndjson")
+    stored = {}
+
+    async def insert_many(records, ordered=True):
+        assert not ordered
+        errors = []
+        for i, record in enumerate(records):
+            # Como o pymongo: sem _id, gera um novo a cada envio
+            record.setdefault("_id", ObjectId())
+            if record["_id"] in stored:
+                errors.append({"index": i, "code": 11000})
+            elif record["output_payload"] == [2] and not stored.get("failed"):
+                stored["failed"] = True
+                errors.append({"index": i, "code": 91})
+            else:
+                stored[record["_id"]] = record
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+
+    collection = MagicMock()
+    collection.insert_many = insert_many
+    writer = HistoryWriter(collection, batch_size=3, backpressure="spill", spill_path=spill_path)
+    # Registro sem _id (ex.: fila cheia antes de chegar ao MongoDB)
+    writer._spill([make_record(1), make_record(2), make_record(3)])
+
+    # Falha parcial: 1 e 3 gravados, o lote inteiro fica para a próxima tentativa
+    await writer._replay_spill()
+    assert os.path.exists(writer._replay_path)
+    await writer._replay_spill()
+
+    stored.pop("failed")
+    assert sorted(r["output_payload"][0] for r in stored.values()) == [1, 2, 3]
+    assert not os.path.exists(writer._replay_path)
+
+
+def test_invalid_backpressure_policy():
+    with pytest.raises(ValueError):
+        HistoryWriter(MagicMock(), backpressure="ignorar")
+
+
+@pytest.mark.asyncio
+async def test_history_service_add_uses_writer():
+    collection = AsyncMock()
+    writer = MagicMock()
+    writer.enqueue = AsyncMock()
+    history_service = HistoryService(collection=collection, writer=writer)
+
+    await history_service.add(
+        input_payload=[{"x": 1}],
+        output_payload=[0.9],
+        model_name="modelo",
+        model_version="1",
+    )
+
+    writer.enqueue.assert_awaited_once()
+    collection.insert_one.assert_not_called()
+    assert writer.enqueue.await_args.args[0]["output_payload"] == [0.9]
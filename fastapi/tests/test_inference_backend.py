@@ -0,0 +1,71 @@
+import os
+
+import mlflow
+import pandas as pd
+import pytest
+
+from app.services.inference_backend import ProcessInferenceBackend
+
+
+class DoubleModel(mlflow.pyfunc.PythonModel):
+    def predict(self, context, model_input, params=None):
+        return (model_input["x"] * 2).tolist()
+
+
+class PidModel(mlflow.pyfunc.PythonModel):
+    def predict(self, context, model_input, params=None):
+        return [os.getpid()] * len(model_input)
+
+
+@pytest.fixture(scope="module")
+def model_paths(tmp_path_factory):
+    root = tmp_path_factory.mktemp("models")
+    mlflow.pyfunc.save_model(path=str(root / "double"), python_model=DoubleModel())
+    mlflow.pyfunc.save_model(path=str(root / "pid"), python_model=PidModel())
+    return {"double": str(root / "double"), "pid": str(root / "pid")}
+
+
+@pytest.fixture
+def backend():
+    backend = ProcessInferenceBackend(max_workers=1)
+    yield backend
+    backend.shutdown()
+
+
+async def test_predict_runs_in_worker_process(backend, model_paths):
+    df = pd.DataFrame({"x": [1.0, 2.5], "name": ["a", None]})
+
+    assert await backend.predict(model_paths["double"], df) == [2.0, 5.0]
+
+    pids = await backend.predict(model_paths["pid"], df)
+    assert pids[0] != os.getpid()
+
+
+async def test_frame_without_arrow_type_falls_back_to_pickle(backend, model_paths):
+    df = pd.DataFrame({"x": [1, 2], "obj": [object(), object()]})
+
+    assert await backend.predict(model_paths["double"], df) == [2, 4]
+
+
+async def test_pool_is_replaced_after_worker_crash(backend, model_paths):
+    df = pd.DataFrame({"x": [1]})
+    first_pid = (await backend.predict(model_paths["pid"], df))[0]
+
+    # Mata o processo de inferência: a próxima predição recria o pool e repete a chamada
+    with pytest.raises(Exception):
+        backend._get_pool().submit(os._exit, 1).result()
+
+    second_pid = (await backend.predict(model_paths["pid"], df))[0]
+    assert second_pid != first_pid
+
+
+def test_preload_loads_model_in_every_worker(model_paths):
+    backend = ProcessInferenceBackend(max_workers=2)
+    try:
+        pids = backend.preload(model_paths["pid"])
+        assert len(pids) == 2 and os.getpid() not in pids
+        # Processo recriado sobe com o modelo já carregado
+        backend._replace_pool(backend._get_pool())
+        assert backend._get_pool()._initargs[-1] == (model_paths["pid"],)
+    finally:
+        backend.shutdown()
@@ -0,0 +1,158 @@
+import random
+import pytest
+import pandas as pd
+import pyarrow as pa
+from types import SimpleNamespace
+
+from app.utils import arrow_io
+from app.utils.validator import InputValidator, compile_validator
+
+
+SCHEMA = [
+    SimpleNamespace(name="Pclass", type="long"),
+    SimpleNamespace(name="Name", type="string"),
+    SimpleNamespace(name="Fare", type="double"),
+    SimpleNamespace(name="Alone", type="boolean"),
+]
+
+
+def legacy_validate(schema, data):
+    # Validação linha a linha original, usada como referência de comportamento
+    expected_cols = [col.name for col in schema]
+    for i, item in enumerate(data):
+        missing_cols = set(expected_cols) - set(item.keys())
+        if missing_cols:
+            raise ValueError(f"Item {i}: faltando colunas obrigatórias: {missing_cols}")
+        for col in schema:
+            expected_type, value = str(col.type), item[col.name]
+            if expected_type in ("double", "float") and not isinstance(value, (float, int)):
+                raise ValueError(f"Item {i}: coluna '{col.name}' deve ser float")
+            if expected_type in ("integer", "long") and not isinstance(value, int):
+                raise ValueError(f"Item {i}: coluna '{col.name}' deve ser int")
+            if expected_type == "string" and not isinstance(value, str):
+                raise ValueError(f"Item {i}: coluna '{col.name}' deve ser string")
+            if expected_type == "boolean" and not isinstance(value, bool):
+                raise ValueError(f"Item {i}: coluna '{col.name}' deve ser booleano")
+
+
+def validate(schema, data):
+    InputValidator(schema).validate(pd.DataFrame(data), records=data)
+
+
+def valid_row():
+    return {"Pclass": 3, "Name": "Braund, Mr. Owen Harris", "Fare": 7.25, "Alone": False}
+
+
+def test_valid_batch_passes():
+    validate(SCHEMA, [valid_row() for _ in range(50)])
+
+
+def test_int_accepted_for_double_column():
+    rows = [valid_row(), {**valid_row(), "Fare": 8}]
+    validate(SCHEMA, rows)
+
+
+def test_missing_column_reports_first_item():
+    rows = [valid_row(), {k: v for k, v in valid_row().items() if k != "Fare"}]
+    with pytest.raises(ValueError, match=r"Item 1: faltando colunas obrigatórias: \{'Fare'\}"):
+        validate(SCHEMA, rows)
+
+
+def test_none_in_numeric_column_is_rejected():
+    rows = [valid_row(), {**valid_row(), "Fare": None}]
+    with pytest.raises(ValueError, match="Item 1: coluna 'Fare' deve ser float"):
+        validate(SCHEMA, rows)
+
+
+def test_nan_float_is_accepted():
+    rows = [valid_row(), {**valid_row(), "Fare": float("nan")}]
+    validate(SCHEMA, rows)
+
+
+def test_float_in_integer_column_is_rejected():
+    rows = [valid_row(), valid_row(), {**valid_row(), "Pclass": 1.0}]
+    with pytest.raises(ValueError, match="Item 2: coluna 'Pclass' deve ser int"):
+        validate(SCHEMA, rows)
+
+
+def test_frame_without_records_checks_columns():
+    validator = compile_validator(SCHEMA)
+    df = pd.DataFrame([valid_row()]).drop(columns=["Name"])
+    with pytest.raises(ValueError, match="Item 0: faltando colunas obrigatórias"):
+        validator.validate(df)
+
+
+def test_arrow_integer_column_with_nulls():
+    table = pa.table({
+        "Pclass": pa.array([3, None, 1]),
+        "Name": ["a", "b", "c"],
+        "Fare": [7.25, 8.05, None],
+        "Alone": [False, True, False],
+    })
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    df = arrow_io.read_frame(sink.getvalue().to_pybytes(), arrow_io.ARROW_STREAM_MEDIA_TYPE)
+
+    # Sem conversão para float64: só a linha nula é rejeitada
+    assert str(df["Pclass"].dtype) == "Int64"
+    with pytest.raises(ValueError, match="Item 1: coluna 'Pclass' deve ser int"):
+        compile_validator(SCHEMA).validate(df)
+    compile_validator(SCHEMA).validate(df.iloc[[0, 2]])
+
+
+def test_compile_validator_without_schema():
+    assert compile_validator(None) is None
+
+
+def test_matches_legacy_error_messages():
+    rng = random.Random(42)
+    bad_values = [None, "x", 1.5, 2, True, float("nan")]
+
+    for _ in range(300):
+        rows = [valid_row() for _ in range(rng.randint(1, 6))]
+        for _ in range(rng.randint(0, 3)):
+            row = rng.choice(rows)
+            col = rng.choice([c.name for c in SCHEMA])
+            if rng.random() < 0.3:
+                row.pop(col, None)
+            else:
+                row[col] = rng.choice(bad_values)
+
+        expected = None
+        try:
+            legacy_validate(SCHEMA, rows)
+        except ValueError as e:
+            expected = str(e)
+
+        got = None
+        try:
+            validate(SCHEMA, rows)
+        except ValueError as e:
+            got = str(e)
+
+        assert got == expected, rows
+
+
+def test_request_model_matches_validator():
+    from pydantic import ValidationError
+    from app.schemas.predict import build_request_model
+
+    request_model = build_request_model(SCHEMA)
+    for col in SCHEMA:
+        for value in [None, "x", 1.5, 2, True, float("nan")]:
+            row = {**valid_row(), col.name: value}
+            try:
+                validate(SCHEMA, [row])
+                expected = True
+            except ValueError:
+                expected = False
+            try:
+                parsed = request_model.parse_obj({"inputs": [row]})
+                accepted = True
+            except ValidationError:
+                accepted = False
+            assert accepted == expected, (col.name, value)
+            if accepted:
+                # O valor chega ao modelo sem coerção
+                assert type(parsed.dict(by_alias=True)["inputs"][0][col.name]) is type(value)
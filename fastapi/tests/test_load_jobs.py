@@ -0,0 +1,90 @@
+import asyncio
+import pytest
+from unittest.mock import MagicMock
+from types import SimpleNamespace
+
+from app.services.load_jobs import LoadJobManager, JOB_SUCCEEDED, JOB_FAILED
+from app.utils.warmup import synthetic_rows
+
+
+@pytest.mark.asyncio
+async def test_job_runs_load_in_background():
+    registry = MagicMock()
+    registry.load_model.return_value = {"model_version": "3"}
+    manager = LoadJobManager(registry_factory=lambda: registry)
+
+    job = manager.submit("titanic", version="3")
+    await manager.wait(job)
+
+    assert job.status == JOB_SUCCEEDED
+    assert job.result == {"model_version": "3"}
+    assert manager.get(job.job_id) is job
+    registry.load_model.assert_called_once_with(model_name="titanic", alias=None, version="3", shadow=False)
+
+
+@pytest.mark.asyncio
+async def test_failed_job_records_error():
+    registry = MagicMock()
+    registry.load_model.side_effect = RuntimeError("Falha ao carregar modelo")
+    manager = LoadJobManager(registry_factory=lambda: registry)
+
+    job = await manager.wait(manager.submit("titanic", alias="champion"))
+
+    assert job.status == JOB_FAILED
+    assert "Falha ao carregar modelo" in job.error
+    assert job.to_dict()["finished_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_identical_pending_job_is_reused():
+    registry = MagicMock()
+    release = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    registry.load_model.side_effect = lambda **kwargs: asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+    manager = LoadJobManager(registry_factory=lambda: registry)
+
+    first = manager.submit("titanic", alias="champion")
+    second = manager.submit("titanic", alias="champion")
+    assert first is second
+
+    release.set()
+    await manager.wait(first)
+    assert registry.load_model.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_running_jobs_are_not_evicted():
+    registry = MagicMock()
+    release = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    registry.load_model.side_effect = lambda **kwargs: asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+    manager = LoadJobManager(registry_factory=lambda: registry, max_jobs=1)
+
+    first = manager.submit("titanic", version="1")
+    second = manager.submit("titanic", version="2")
+    # Acima do limite, mas nenhum job terminou: ambos continuam consultáveis
+    assert manager.get(first.job_id) is first
+    assert manager.get(second.job_id) is second
+
+    release.set()
+    await manager.wait(first)
+    await manager.wait(second)
+    third = manager.submit("titanic", version="3")
+    await manager.wait(third)
+    assert manager.get(first.job_id) is None
+    assert manager.get(second.job_id) is None
+    assert manager.get(third.job_id) is third
+
+
+def test_synthetic_rows_follow_schema():
+    schema = [
+        SimpleNamespace(name="Pclass", type="long"),
+        SimpleNamespace(name="Fare", type="double"),
+        SimpleNamespace(name="Sex", type="string"),
+    ]
+    rows = synthetic_rows(schema, n_rows=2)
+
+    assert len(rows) == 2
+    assert isinstance(rows[1]["Pclass"], int)
+    assert isinstance(rows[1]["Fare"], float)
+    assert isinstance(rows[1]["Sex"], str)
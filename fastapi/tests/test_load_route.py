@@ -1,3 +1,4 @@
+import time
 from fastapi.testclient import TestClient
 from unittest.mock import patch
 from app.main import app
@@ -10,11 +11,54 @@ def test_load_success():
             "status": "modelo carregado com sucesso",
             "model_uri": "models:/modelo_teste@production"
         }
-        response = client.post("/v1/load", json={"model_name": "modelo_teste", "alias": "production"})
+        response = client.post("/v1/load?wait=true", json={"model_name": "modelo_teste", "alias": "production"})
         assert response.status_code == 200
         assert "model_uri" in response.json()
 
 def test_load_failure():
     with patch("app.api.v1.endpoints.load.ModelRegistry.load_model", side_effect=Exception("Erro")):
-        response = client.post("/v1/load", json={"model_name": "modelo_teste", "alias": "production"})
+        response = client.post("/v1/load?wait=true", json={"model_name": "modelo_teste", "alias": "production"})
         assert response.status_code == 500
+
+def test_load_without_alias_or_version():
+    response = client.post("/v1/load", json={"model_name": "modelo_teste"})
+    assert response.status_code == 422
+
+def test_load_returns_job_and_status():
+    with patch("app.api.v1.endpoints.load.ModelRegistry.load_model") as mock_load_model:
+        mock_load_model.return_value = {
+            "status": "modelo carregado com sucesso",
+            "model_uri": "models:/modelo_teste/3",
+            "model_version": "3"
+        }
+        response = client.post("/v1/load", json={"model_name": "modelo_teste", "version": "3"})
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status_url"] == f"/v1/load/{job['job_id']}"
+
+        # Polling até o job terminar
+        for _ in range(50):
+            status = client.get(job["status_url"]).json()
+            if status["status"] in ("succeeded", "failed"):
+                break
+            time.sleep(0.02)
+
+        assert status["status"] == "succeeded"
+        assert status["result"]["model_version"] == "3"
+        mock_load_model.assert_called_once_with(model_name="modelo_teste", alias=None, version="3", shadow=False)
+
+def test_load_status_not_found():
+    response = client.get("/v1/load/inexistente")
+    assert response.status_code == 404
+
+def test_list_models():
+    with patch("app.api.v1.endpoints.load.ModelRegistry.list_models") as mock_list_models:
+        mock_list_models.return_value = [{"model_name": "modelo_teste", "model_version": "1", "default": True}]
+        response = client.get("/v1/models")
+        assert response.status_code == 200
+        assert response.json()["models"][0]["default"] is True
+
+def test_clear_shadow_without_shadow_model():
+    with patch("app.api.v1.endpoints.load.ModelRegistry.clear_shadow", return_value=None):
+        response = client.delete("/v1/shadow")
+        assert response.status_code == 404
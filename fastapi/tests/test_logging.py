@@ -0,0 +1,60 @@
+import pytest
+from httpx import AsyncClient
+from httpx._transports.asgi import ASGITransport
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.core.logger import HotPathLogger, logger
+from app.main import app
+from app.services.model_service import get_model_registry
+
+
+@pytest.fixture
+def captured():
+    records = []
+    sink_id = logger.add(lambda message: records.append(message.record), level="INFO", format="{message}")
+    yield records
+    logger.remove(sink_id)
+
+
+class Explodes:
+    def __str__(self):
+        raise AssertionError("mensagem não deveria ser formatada")
+
+
+def test_hot_path_rate_limit(captured):
+    hot = HotPathLogger(max_per_second=2)
+    with patch("app.core.logger.monotonic", return_value=100.0):
+        for i in range(5):
+            hot.info("mensagem {}", i)
+
+    assert [r["message"] for r in captured] == ["mensagem 0", "mensagem 1"]
+    assert hot.dropped == 3
+
+
+def test_sampled_out_messages_are_not_formatted(captured):
+    hot = HotPathLogger(sample_rate=0.0)
+    hot.info("valor {}", Explodes())
+    assert captured == []
+
+
+def test_disabled_level_is_not_formatted(captured):
+    # Nenhum sink aceita DEBUG: o loguru descarta antes de formatar
+    HotPathLogger().debug("valor {}", Explodes())
+    assert captured == []
+
+
+async def test_request_id_is_propagated_to_logs_and_response(captured):
+    registry = MagicMock()
+    registry.is_model_loaded.return_value = True
+    registry.predict = AsyncMock(return_value=[1])
+    app.dependency_overrides[get_model_registry] = lambda: registry
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        given = await ac.post("/v1/predict", json={"inputs": [{"x": 1}]}, headers={"X-Request-ID": "abc-123"})
+        generated = await ac.post("/v1/predict", json={"inputs": [{"x": 1}]})
+    app.dependency_overrides.clear()
+
+    assert given.headers["x-request-id"] == "abc-123"
+    assert len(generated.headers["x-request-id"]) == 32
+    request_ids = [r["extra"]["request_id"] for r in captured if "Predição realizada" in r["message"]]
+    assert request_ids == ["abc-123", generated.headers["x-request-id"]]
@@ -1,6 +1,9 @@
+import dataclasses
+import threading
+import time
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
-from app.services.model_service import ModelRegistry
+from app.services.model_service import ModelRegistry, LoadedModel
 from mlflow.exceptions import MlflowException
 from types import SimpleNamespace
 
@@ -12,15 +15,27 @@ def model_registry():
     return ModelRegistry()
 
 
+def make_loaded(model=None, input_schema=None, name="titanic_model", version="2", alias="production", memory_bytes=0):
+    return LoadedModel(
+        model=model if model is not None else MagicMock(),
+        model_name=name,
+        model_version=version,
+        model_uri=f"models:/{name}@{alias}" if alias else f"models:/{name}/{version}",
+        model_alias=alias,
+        input_schema=input_schema,
+        memory_bytes=memory_bytes,
+    )
+
+
+@patch("app.services.model_service.get_artifact_cache", return_value=None)
 @patch("app.services.model_service.mlflow.pyfunc.load_model")
-@patch("app.services.model_service.Model.load")
 @patch("app.services.model_service.MlflowClient")
-def test_load_model_success(mock_client_class, mock_model_load, mock_pyfunc_load, model_registry):
+def test_load_model_success(mock_client_class, mock_pyfunc_load, mock_cache, model_registry):
     mock_model = MagicMock()
     mock_signature = MagicMock()
     mock_signature.inputs = [MagicMock(name="col1", type="string")]
-    mock_model_load.return_value.signature = mock_signature
-    mock_pyfunc_load.return_value = "modelo carregado"
+    mock_model.metadata.signature = mock_signature
+    mock_pyfunc_load.return_value = mock_model
 
     mock_client = MagicMock()
     mock_client.get_latest_versions.return_value = [
@@ -34,12 +49,14 @@ def test_load_model_success(mock_client_class, mock_model_load, mock_pyfunc_load
     assert result["status"] == "modelo carregado com sucesso"
     assert result["model_version"] == "5"
     assert "model_uri" in result
+    # Aquecimento com inferência de teste antes de expor o modelo
+    mock_model.predict.assert_called_once()
 
 
+@patch("app.services.model_service.get_artifact_cache", return_value=None)
 @patch("app.services.model_service.mlflow.pyfunc.load_model", side_effect=MlflowException("erro"))
-@patch("app.services.model_service.Model.load")
 @patch("app.services.model_service.MlflowClient")
-def test_load_model_failure(mock_client_class, mock_model_load, mock_pyfunc_load, model_registry):
+def test_load_model_failure(mock_client_class, mock_pyfunc_load, mock_cache, model_registry):
     mock_client = MagicMock()
     mock_client.get_latest_versions.return_value = [
         MagicMock(aliases=["production"], version="1")
@@ -51,20 +68,51 @@ def test_load_model_failure(mock_client_class, mock_model_load, mock_pyfunc_load
 
 
 
+@patch("app.services.model_service.get_artifact_cache", return_value=None)
+@patch("app.services.model_service.MlflowClient")
+def test_concurrent_loads_measure_memory_separately(mock_client_class, mock_cache, model_registry):
+    rss = [0]
+    active, overlaps = [0], []
+
+    def fake_load(uri):
+        active[0] += 1
+        overlaps.append(active[0])
+        time.sleep(0.02)
+        rss[0] += 100  # cada carga ocupa 100 bytes
+        active[0] -= 1
+        model = MagicMock()
+        model.metadata.signature = None
+        return model
+
+    with patch("app.services.model_service.mlflow.pyfunc.load_model", side_effect=fake_load), \
+            patch("app.services.model_service._current_rss", side_effect=lambda: rss[0]):
+        threads = [
+            threading.Thread(target=model_registry.load_model, args=("titanic_model",), kwargs={"version": v})
+            for v in ("1", "2", "3")
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert max(overlaps) == 1
+    assert [m["memory_bytes"] for m in model_registry.list_models()] == [100, 100, 100]
+
+
 def test_validate_input_success(model_registry):
     mock_schema = [SimpleNamespace(name="col1", type="string")]
-    model_registry._input_schema = mock_schema
+    loaded = make_loaded(input_schema=mock_schema)
     data = [{"col1": "abc"}]
 
-    model_registry._validate_input(data)
+    model_registry._validate_input(loaded, data)
 
 
 def test_validate_input_missing_field(model_registry):
-    model_registry._input_schema = [MagicMock(name="col1", type="string")]
+    loaded = make_loaded(input_schema=[MagicMock(name="col1", type="string")])
     data = [{}]
 
     with pytest.raises(ValueError, match="faltando colunas obrigatórias"):
-        model_registry._validate_input(data)
+        model_registry._validate_input(loaded, data)
 
 
 @pytest.mark.asyncio
@@ -73,11 +121,7 @@ def test_validate_input_missing_field(model_registry):
 @patch("app.services.model_service.postprocessor.postprocess", return_value=[1])
 @patch("app.services.model_service.history_service.add", new_callable=AsyncMock)
 async def test_predict_success(mock_add, mock_post, mock_pre, mock_run, model_registry):
-    model_registry._model = MagicMock()
-    model_registry._input_schema = None  # pula validação
-    model_registry._model_uri = "models:/titanic_model@production"
-    model_registry._model_version = "2"
-    model_registry._model_alias = "production"
+    model_registry.register(make_loaded(input_schema=None))  # sem schema: pula validação
 
     data = [{"feature1": 1}]
     result = await model_registry.predict(data)
@@ -100,11 +144,7 @@ async def test_predict_without_model(model_registry):
 @patch("app.services.model_service.postprocessor.postprocess", return_value=[1])
 @patch("app.services.model_service.history_service.add", new_callable=AsyncMock)
 async def test_predict_validation_error(mock_add, mock_post, mock_pre, mock_run, model_registry):
-    model_registry._model = MagicMock()
-    model_registry._input_schema = [MagicMock(name="col1", type="string")]
-    model_registry._model_uri = "models:/titanic_model@production"
-    model_registry._model_version = "2"
-    model_registry._model_alias = "production"
+    model_registry.register(make_loaded(input_schema=[MagicMock(name="col1", type="string")]))
 
     data = [{"wrong_col": "abc"}]
 
@@ -113,10 +153,206 @@ async def test_predict_validation_error(mock_add, mock_post, mock_pre, mock_run,
 
 
 def test_get_model_uri_version_alias(model_registry):
-    model_registry._model_uri = "models:/titanic_model@production"
-    model_registry._model_version = "3"
-    model_registry._model_alias = "production"
+    model_registry.register(make_loaded(version="3"))
 
     assert model_registry.get_model_uri() == "models:/titanic_model@production"
     assert model_registry.get_model_version() == "3"
     assert model_registry.get_model_alias() == "production"
+
+
+@pytest.mark.asyncio
+@patch("app.services.model_service.run_predict_sync", return_value=[1, 0])
+@patch("app.services.model_service.history_service.add", new_callable=AsyncMock)
+async def test_predict_frame_success(mock_add, mock_run, model_registry):
+    import pandas as pd
+
+    model_registry.register(make_loaded(input_schema=[SimpleNamespace(name="col1", type="string")]))
+
+    result = await model_registry.predict_frame(pd.DataFrame({"col1": ["a", "b"]}))
+
+    assert result == [1.0, 0.0]
+    assert mock_add.await_args.kwargs["input_payload"] == [{"col1": "a"}, {"col1": "b"}]
+
+
+@pytest.mark.asyncio
+@patch("app.services.model_service.history_service.add", new_callable=AsyncMock)
+async def test_predict_routes_to_requested_model(mock_add, model_registry):
+    model_v1 = MagicMock()
+    model_v1.predict.return_value = [1]
+    model_v2 = MagicMock()
+    model_v2.predict.return_value = [2]
+    model_registry.register(make_loaded(model=model_v1, version="1", alias=None))
+    model_registry.register(make_loaded(model=model_v2, version="2", alias="champion"))
+
+    assert await model_registry.predict([{"x": 1}]) == [2.0]
+    assert await model_registry.predict([{"x": 1}], model_name="titanic_model", version="1") == [1.0]
+    assert await model_registry.predict([{"x": 1}], alias="champion") == [2.0]
+    assert mock_add.await_args.kwargs["model_version"] == "2"
+
+    with pytest.raises(RuntimeError, match="Modelo não carregado"):
+        await model_registry.predict([{"x": 1}], model_name="outro_modelo")
+
+
+@patch("app.services.model_service.settings.MODEL_MEMORY_BUDGET_MB", 100)
+def test_register_evicts_least_recently_used(model_registry):
+    mb = 1024 * 1024
+    model_registry.register(make_loaded(version="1", alias=None, memory_bytes=40 * mb), make_default=True)
+    model_registry.register(make_loaded(version="2", alias=None, memory_bytes=40 * mb), make_default=False)
+
+    # Uso da versão 2 a torna a mais recente: a 3 (nova) só cabe removendo alguém
+    model_registry.resolve(version="2")
+    model_registry.register(make_loaded(version="3", alias=None, memory_bytes=40 * mb), make_default=False)
+
+    versions = [m["model_version"] for m in model_registry.list_models()]
+    # A versão 1 é o modelo padrão e nunca é removida; a 2 era a menos recente restante
+    assert versions == ["3", "1"]
+    assert model_registry.is_model_loaded(version="1")
+    assert not model_registry.is_model_loaded(version="2")
+
+
+@patch("app.services.model_service.settings.MODEL_MEMORY_BUDGET_MB", 0)
+def test_register_without_budget_keeps_all_models(model_registry):
+    for version in ("1", "2", "3"):
+        model_registry.register(make_loaded(version=version, alias=None, memory_bytes=10 ** 9))
+
+    assert len(model_registry.list_models()) == 3
+    assert model_registry.get_model_version() == "3"
+
+
+@patch("app.services.model_service.get_artifact_cache", return_value=None)
+@patch("app.services.model_service.mlflow.pyfunc.load_model")
+@patch("app.services.model_service.MlflowClient")
+def test_failed_warmup_keeps_current_model(mock_client_class, mock_pyfunc_load, mock_cache, model_registry):
+    current = make_loaded(version="1", alias=None)
+    model_registry.register(current)
+
+    broken_model = MagicMock()
+    broken_model.predict.side_effect = ValueError("modelo quebrado")
+    broken_model.metadata.signature.inputs = [SimpleNamespace(name="col1", type="double")]
+    mock_pyfunc_load.return_value = broken_model
+
+    with pytest.raises(RuntimeError, match="Falha ao carregar modelo"):
+        model_registry.load_model("titanic_model", version="2")
+
+    assert model_registry.resolve() is current
+    assert not model_registry.is_model_loaded(version="2")
+
+
+@patch("app.services.model_service.mlflow.pyfunc.load_model")
+@patch("app.services.model_service.get_artifact_cache")
+def test_load_model_uses_artifact_cache(mock_get_cache, mock_pyfunc_load, model_registry):
+    mock_get_cache.return_value.fetch.return_value = "/cache/abc123"
+    mock_pyfunc_load.return_value.metadata.signature = None
+
+    model_registry.load_model("titanic_model", version="4")
+
+    mock_get_cache.return_value.fetch.assert_called_once_with("titanic_model", "4", pin=True)
+    mock_pyfunc_load.assert_called_once_with("/cache/abc123")
+    mock_get_cache.return_value.unpin.assert_not_called()
+
+
+@patch("app.services.model_service.mlflow.pyfunc.load_model")
+@patch("app.services.model_service.get_artifact_cache")
+def test_failed_load_unpins_artifacts(mock_get_cache, mock_pyfunc_load, model_registry):
+    mock_get_cache.return_value.fetch.return_value = "/cache/abc123"
+    mock_pyfunc_load.side_effect = MlflowException("erro")
+
+    with pytest.raises(RuntimeError):
+        model_registry.load_model("titanic_model", version="4")
+
+    mock_get_cache.return_value.unpin.assert_called_once_with("titanic_model", "4")
+
+
+@patch("app.services.model_service.get_artifact_cache")
+def test_evicted_model_unpins_artifacts(mock_get_cache, model_registry):
+    mb = 1024 * 1024
+    with patch("app.services.model_service.settings.MODEL_MEMORY_BUDGET_MB", 100):
+        model_registry.register(make_loaded(version="1", alias=None, memory_bytes=60 * mb))
+        old = dataclasses.replace(make_loaded(version="2", alias=None, memory_bytes=30 * mb), artifact_path="/cache/v2")
+        model_registry.register(old, make_default=False)
+        model_registry.register(make_loaded(version="3", alias=None, memory_bytes=30 * mb), make_default=False)
+
+    mock_get_cache.return_value.unpin.assert_called_once_with("titanic_model", "2")
+
+
+@patch("app.services.model_service.get_artifact_cache", return_value=None)
+@patch("app.services.model_service.mlflow.pyfunc.load_model")
+@patch("app.services.model_service.get_inference_backend")
+def test_load_model_preloads_inference_workers(mock_get_backend, mock_pyfunc_load, mock_cache, model_registry):
+    mock_pyfunc_load.return_value.metadata.signature = None
+
+    model_registry.load_model("titanic_model", version="4")
+
+    mock_get_backend.return_value.preload.assert_called_once_with("models:/titanic_model/4")
+
+
+@patch("app.services.model_service.mlflow.pyfunc.load_model")
+@patch("app.services.model_service.get_artifact_cache")
+def test_load_model_falls_back_when_cache_fails(mock_get_cache, mock_pyfunc_load, model_registry):
+    mock_get_cache.return_value.fetch.side_effect = OSError("disco cheio")
+    mock_pyfunc_load.return_value.metadata.signature = None
+
+    model_registry.load_model("titanic_model", version="4")
+
+    mock_pyfunc_load.assert_called_once_with("models:/titanic_model/4")
+
+
+@pytest.mark.asyncio
+@patch("app.services.model_service.history_service.add", new_callable=AsyncMock)
+async def test_predict_uses_row_cache(mock_add, model_registry):
+    from app.services.prediction_cache import PredictionCache
+
+    cache = PredictionCache(max_entries=100, ttl_seconds=60)
+    model = MagicMock()
+    model.predict.side_effect = lambda df: df["x"] * 10
+
+    with patch("app.services.model_service.get_prediction_cache", return_value=cache):
+        model_registry.register(make_loaded(model=model))
+        assert await model_registry.predict([{"x": 1}, {"x": 2}]) == [10.0, 20.0]
+
+        # Apenas a linha nova vai para o modelo; a ordem original é mantida
+        assert await model_registry.predict([{"x": 3}, {"x": 1}]) == [30.0, 10.0]
+        assert model.predict.call_args.args[0]["x"].tolist() == [3]
+        assert mock_add.await_args.kwargs["output_payload"] == [30.0, 10.0]
+
+        # Recarregar o modelo invalida o cache
+        model_registry.register(make_loaded(model=model))
+        await model_registry.predict([{"x": 1}])
+        assert model.predict.call_args.args[0]["x"].tolist() == [1]
+
+
+@pytest.mark.asyncio
+@patch("app.services.model_service.history_service.add", new_callable=AsyncMock)
+async def test_predict_records_stage_latencies(mock_add, model_registry):
+    from prometheus_client import REGISTRY
+
+    def samples(stage):
+        return REGISTRY.get_sample_value(
+            "predict_stage_duration_seconds_count",
+            {"stage": stage, "model_name": "titanic_model", "model_version": "9"},
+        ) or 0
+
+    model = MagicMock()
+    model.predict.return_value = [1, 0]
+    model_registry.register(make_loaded(model=model, version="9"))
+    stages = ["frame", "validate", "preprocess", "queue", "model", "postprocess", "history"]
+    before = {stage: samples(stage) for stage in stages}
+
+    await model_registry.predict([{"x": 1}, {"x": 2}])
+
+    assert all(samples(stage) == before[stage] + 1 for stage in stages)
+    assert REGISTRY.get_sample_value(
+        "predict_rows_per_request_sum", {"model_name": "titanic_model", "model_version": "9"}
+    ) == 2
+
+
+def test_loaded_model_compiles_request_model():
+    from pydantic import ValidationError
+
+    loaded = make_loaded(input_schema=[SimpleNamespace(name="Sex", type="string"), SimpleNamespace(name="Age", type="double")])
+
+    parsed = loaded.request_model.parse_obj({"inputs": [{"Sex": "male", "Age": 22, "extra": 1}]})
+    assert parsed.dict(by_alias=True)["inputs"] == [{"Sex": "male", "Age": 22, "extra": 1}]
+    with pytest.raises(ValidationError):
+        loaded.request_model.parse_obj({"inputs": [{"Sex": "male", "Age": "22"}]})
+    assert make_loaded(input_schema=None).request_model is None
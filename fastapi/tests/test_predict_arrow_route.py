@@ -0,0 +1,96 @@
+import io
+import pytest
+import pyarrow as pa
+import pyarrow.parquet as pq
+from httpx import AsyncClient
+from httpx._transports.asgi import ASGITransport
+from fastapi import status
+from unittest.mock import AsyncMock, MagicMock
+from app.main import app
+from app.services.model_service import get_model_registry
+from app.utils import arrow_io
+
+
+TABLE = pa.table({"Pclass": [1, 3], "Fare": [71.28, 7.25], "Sex": ["female", "male"]})
+
+
+def to_ipc(table):
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def to_parquet(table):
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def mock_model_registry():
+    mock = MagicMock()
+    mock.is_model_loaded.return_value = True
+    mock.predict_frame = AsyncMock(return_value=[1.0, 0.0])
+    return mock
+
+
+@pytest.fixture(autouse=True)
+def override_model_registry(mock_model_registry):
+    app.dependency_overrides[get_model_registry] = lambda: mock_model_registry
+    yield
+    app.dependency_overrides.clear()
+
+
+async def post(content, content_type, accept="application/json"):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        return await ac.post(
+            "/v1/predict/arrow",
+            content=content,
+            headers={"content-type": content_type, "accept": accept},
+        )
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("content, content_type", [
+    (to_ipc(TABLE), arrow_io.ARROW_STREAM_MEDIA_TYPE),
+    (to_parquet(TABLE), "application/vnd.apache.parquet"),
+])
+async def test_predict_arrow_returns_json(mock_model_registry, content, content_type):
+    response = await post(content, content_type)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == {"predictions": [1.0, 0.0]}
+
+    df = mock_model_registry.predict_frame.await_args.args[0]
+    assert list(df.columns) == ["Pclass", "Fare", "Sex"]
+    assert df["Sex"].tolist() == ["female", "male"]
+
+
+@pytest.mark.asyncio
+async def test_predict_arrow_returns_arrow_when_requested():
+    response = await post(to_ipc(TABLE), arrow_io.ARROW_STREAM_MEDIA_TYPE, accept=arrow_io.ARROW_STREAM_MEDIA_TYPE)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"] == arrow_io.ARROW_STREAM_MEDIA_TYPE
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("predictions").to_pylist() == [1.0, 0.0]
+
+
+@pytest.mark.asyncio
+async def test_predict_arrow_unsupported_media_type():
+    response = await post(b"{}", "application/json")
+    assert response.status_code == status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+
+
+@pytest.mark.asyncio
+async def test_predict_arrow_invalid_body():
+    response = await post(b"isto nao e arrow", arrow_io.ARROW_STREAM_MEDIA_TYPE)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.asyncio
+async def test_predict_arrow_model_not_loaded(mock_model_registry):
+    mock_model_registry.is_model_loaded.return_value = False
+    response = await post(to_ipc(TABLE), arrow_io.ARROW_STREAM_MEDIA_TYPE)
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
@@ -32,7 +32,24 @@ async def test_predict_success(mock_model_registry):
 
     assert response.status_code == status.HTTP_200_OK
     assert response.json() == {"predictions": ["aprovado", "reprovado"]}
-    mock_model_registry.predict.assert_awaited_once_with([{"age": 30}, {"age": 18}])
+    mock_model_registry.predict.assert_awaited_once_with(
+        [{"age": 30}, {"age": 18}], model_name=None, version=None, alias=None
+    )
+
+
+@pytest.mark.asyncio
+async def test_predict_routes_to_selected_model(mock_model_registry):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post(
+            "/v1/predict?model_name=titanic&model_version=3",
+            json={"inputs": [{"age": 30}]},
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    mock_model_registry.is_model_loaded.assert_called_once_with(model_name="titanic", version="3", alias=None)
+    mock_model_registry.predict.assert_awaited_once_with(
+        [{"age": 30}], model_name="titanic", version="3", alias=None
+    )
 
 
 @pytest.mark.asyncio
@@ -66,3 +83,66 @@ async def test_predict_internal_error(mock_model_registry):
 
     assert response.status_code == status.HTTP_500_INTERNAL_SERVER_ERROR
     assert "erro inesperado" in response.json()["detail"]
+
+
+@pytest.mark.asyncio
+async def test_predict_queue_full_returns_429(mock_model_registry):
+    from app.services.scheduler import QueueFullError
+    mock_model_registry.predict.side_effect = QueueFullError("Fila de inferência cheia.")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/v1/predict", json={"inputs": [{"age": 30}]})
+
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert response.headers["retry-after"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_predict_deadline_header_sets_request_deadline(mock_model_registry):
+    from time import monotonic
+    from app.services.scheduler import DeadlineExceededError, request_deadline
+
+    seen = {}
+
+    async def fake_predict(*args, **kwargs):
+        seen["remaining"] = request_deadline.get() - monotonic()
+        raise DeadlineExceededError("Prazo da requisição expirou na fila de inferência.")
+
+    mock_model_registry.predict.side_effect = fake_predict
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/v1/predict", json={"inputs": [{"age": 30}]},
+                                 headers={"X-Request-Deadline-Ms": "500"})
+
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert 0 < seen["remaining"] <= 0.5
+
+
+@pytest.mark.asyncio
+async def test_predict_malformed_body_returns_422(mock_model_registry):
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        wrong_shape = await ac.post("/v1/predict", json={"inputs": [1, 2]})
+        invalid_json = await ac.post("/v1/predict", content=b"{\"inputs\": [",
+                                     headers={"content-type": "application/json"})
+
+    assert wrong_shape.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert wrong_shape.json()["detail"][0]["loc"] == ["body", "inputs", 0]
+    assert invalid_json.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    mock_model_registry.predict.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_predict_schema_from_signature(mock_model_registry):
+    from types import SimpleNamespace
+    from app.schemas.predict import build_request_model
+
+    schema = [SimpleNamespace(name="Pclass", type="long"), SimpleNamespace(name="Fare", type="double")]
+    mock_model_registry.resolve.return_value = SimpleNamespace(request_model=build_request_model(schema))
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.get("/v1/predict/schema")
+
+    assert response.status_code == status.HTTP_200_OK
+    row_schema = next(iter(response.json()["definitions"].values()))
+    assert set(row_schema["properties"]) == {"Pclass", "Fare"}
+    assert row_schema["required"] == ["Pclass", "Fare"]
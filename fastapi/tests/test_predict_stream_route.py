@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+import pytest
+from httpx import AsyncClient
+from httpx._transports.asgi import ASGITransport
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.main import app
+from app.services.model_service import get_model_registry
+from app.utils import ndjson
+
+
+@pytest.fixture
+def mock_model_registry():
+    mock = MagicMock()
+    mock.is_model_loaded.return_value = True
+    mock.predict = AsyncMock(side_effect=lambda rows, **kwargs: [row["x"] * 2 for row in rows])
+    app.dependency_overrides[get_model_registry] = lambda: mock
+    yield mock
+    app.dependency_overrides.clear()
+
+
+def ndjson_body(rows):
+    return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+
+async def test_stream_predicts_in_chunks(mock_model_registry):
+    body = ndjson_body([{"x": i} for i in range(5)])
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/v1/predict/stream?chunk_rows=2", content=body,
+                                 headers={"Content-Type": "application/x-ndjson"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines == [{"prediction": i * 2} for i in range(5)]
+    # Um predict (e uma gravação de histórico) por lote
+    assert [len(call.args[0]) for call in mock_model_registry.predict.await_args_list] == [2, 2, 1]
+
+
+async def test_stream_reports_invalid_line(mock_model_registry):
+    body = b'{"x": 1}\n{"x": 2}\nnao-e-json\n'
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/v1/predict/stream?chunk_rows=1", content=body)
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[:2] == [{"prediction": 2}, {"prediction": 4}]
+    assert lines[2]["processed"] == 2
+    assert "Linha 3" in lines[2]["error"]
+
+
+async def test_iter_ndjson_splits_lines_across_chunks():
+    async def chunks():
+        for chunk in (b'{"x"', b': 1}\n{"x": 2', b'}\n\n{"x": 3}'):
+            yield chunk
+
+    assert [row async for row in ndjson.iter_ndjson(chunks())] == [{"x": 1}, {"x": 2}, {"x": 3}]
+
+
+async def test_stream_rejects_line_over_limit(mock_model_registry):
+    body = b'{"x": 1}\n{"x": "' + b"a" * 200 + b'"}\n'
+
+    with patch("app.api.v1.endpoints.predict.settings.PREDICT_STREAM_MAX_LINE_BYTES", 64):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+            response = await ac.post("/v1/predict/stream?chunk_rows=1", content=body)
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert lines[-1]["processed"] == 1
+    assert "Linha 2: excede o limite de 64 bytes" in lines[-1]["error"]
+
+
+async def test_stream_without_model_returns_503(mock_model_registry):
+    mock_model_registry.is_model_loaded.return_value = False
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        response = await ac.post("/v1/predict/stream", content=b'{"x": 1}\n')
+
+    assert response.status_code == 503
+
+
+async def test_stream_responds_while_reading_input(mock_model_registry):
+    # Chama a app ASGI diretamente: o segundo pedaço do corpo só é entregue
+    # depois que a predição do primeiro já foi enviada ao cliente
+    first_sent = asyncio.Event()
+    incoming = [
+        {"type": "http.request", "body": ndjson_body([{"x": 1}]), "more_body": True},
+        {"type": "http.request", "body": ndjson_body([{"x": 2}]), "more_body": False},
+    ]
+    sent = []
+
+    async def receive():
+        if len(incoming) == 1:
+            await first_sent.wait()
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+        if message["type"] == "http.response.body" and message["body"]:
+            first_sent.set()
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/v1/predict/stream", "raw_path": b"/v1/predict/stream",
+        "query_string": b"chunk_rows=1", "root_path": "",
+        "headers": [(b"host", b"test"), (b"content-type", b"application/x-ndjson")],
+        "client": ("test", 123), "server": ("test", 80),
+    }
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+
+    bodies = [m["body"] for m in sent if m["type"] == "http.response.body" and m["body"]]
+    assert [json.loads(b) for b in bodies] == [{"prediction": 2}, {"prediction": 4}]
@@ -0,0 +1,59 @@
+from unittest.mock import patch
+
+from app.services.prediction_cache import PredictionCache, MISS
+
+
+def test_key_is_independent_of_column_order():
+    a = PredictionCache.key("m", "1", "models:/m/1", {"x": 1, "y": "a"})
+    b = PredictionCache.key("m", "1", "models:/m/1", {"y": "a", "x": 1})
+    other_version = PredictionCache.key("m", "2", "models:/m/2", {"x": 1, "y": "a"})
+
+    assert a == b
+    assert a != other_version
+
+
+def test_get_many_returns_hits_and_misses_in_order():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    cache.put_many(["a", "c"], [1.0, 3.0])
+
+    assert cache.get_many(["a", "b", "c"]) == [1.0, MISS, 3.0]
+
+
+def test_entries_expire_after_ttl():
+    cache = PredictionCache(max_entries=10, ttl_seconds=5)
+    with patch("app.services.prediction_cache.monotonic", return_value=100.0):
+        cache.put_many(["a"], [1.0])
+    with patch("app.services.prediction_cache.monotonic", return_value=106.0):
+        assert cache.get_many(["a"]) == [MISS]
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = PredictionCache(max_entries=2, ttl_seconds=60)
+    cache.put_many(["a", "b"], [1.0, 2.0])
+    cache.get_many(["a"])
+    cache.put_many(["c"], [3.0])
+
+    assert cache.get_many(["a", "b", "c"]) == [1.0, MISS, 3.0]
+
+
+def test_invalidate_only_drops_given_model():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    key_m = PredictionCache.key("m", "1", "models:/m/1", {"x": 1})
+    key_n = PredictionCache.key("n", "1", "models:/n/1", {"x": 1})
+    cache.put_many([key_m, key_n], [1.0, 2.0])
+
+    cache.invalidate("m")
+
+    assert cache.get_many([key_m, key_n]) == [MISS, 2.0]
+
+
+def test_invalidate_version_keeps_other_versions():
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    key_v1 = PredictionCache.key("m", "1", "models:/m@champion", {"x": 1})
+    key_v2 = PredictionCache.key("m", "2", "models:/m@challenger", {"x": 1})
+    cache.put_many([key_v1, key_v2], [1.0, 2.0])
+
+    cache.invalidate("m", "2")
+
+    assert cache.get_many([key_v1, key_v2]) == [1.0, MISS]
@@ -0,0 +1,71 @@
+import asyncio
+from time import monotonic
+
+import pytest
+
+from app.services.scheduler import InferenceScheduler, QueueFullError, DeadlineExceededError
+
+
+async def test_concurrency_is_limited():
+    scheduler = InferenceScheduler(max_concurrency=2, max_queue=10)
+    running = 0
+    peak = 0
+
+    async def work():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return "ok"
+
+    results = await asyncio.gather(*(scheduler.run(work) for _ in range(6)))
+
+    assert results == ["ok"] * 6
+    assert peak == 2
+
+
+async def test_full_queue_is_rejected_immediately():
+    scheduler = InferenceScheduler(max_concurrency=1, max_queue=1)
+    release = asyncio.Event()
+
+    async def blocked():
+        await release.wait()
+
+    running = asyncio.create_task(scheduler.run(blocked))
+    queued = asyncio.create_task(scheduler.run(blocked))
+    await asyncio.sleep(0)
+
+    with pytest.raises(QueueFullError):
+        await scheduler.run(blocked)
+
+    release.set()
+    await asyncio.gather(running, queued)
+
+
+async def test_expired_work_in_queue_is_dropped():
+    scheduler = InferenceScheduler(max_concurrency=1, max_queue=10)
+    calls = []
+
+    async def work(name, delay):
+        calls.append(name)
+        await asyncio.sleep(delay)
+
+    first = asyncio.create_task(scheduler.run(work, "primeira", 0.05))
+    await asyncio.sleep(0)
+
+    with pytest.raises(DeadlineExceededError):
+        await scheduler.run(work, "atrasada", 0, deadline=monotonic() + 0.01)
+
+    await first
+    assert calls == ["primeira"]
+
+
+async def test_expired_deadline_never_runs():
+    scheduler = InferenceScheduler(max_concurrency=1, max_queue=10)
+
+    async def work():
+        raise AssertionError("não deveria executar")
+
+    with pytest.raises(DeadlineExceededError):
+        await scheduler.run(work, deadline=monotonic() - 1)
@@ -0,0 +1,162 @@
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.services.model_service import LoadedModel, ModelRegistry
+from app.services.prediction_cache import MISS, PredictionCache
+from app.services.shadow import ShadowRunner
+
+
+@pytest.fixture
+def model_registry():
+    ModelRegistry._instance = None
+    return ModelRegistry()
+
+
+def make_loaded(predict=None, version="1", alias="champion"):
+    model = MagicMock()
+    model.predict.side_effect = predict or (lambda df: [1] * len(df))
+    return LoadedModel(
+        model=model,
+        model_name="titanic",
+        model_version=version,
+        model_uri=f"models:/titanic@{alias}",
+        model_alias=alias,
+    )
+
+
+@pytest.mark.asyncio
+async def test_shadow_records_outputs_next_to_primary(model_registry):
+    model_registry.register(make_loaded(version="1"))
+    model_registry.register(make_loaded(predict=lambda df: [0] * len(df), version="2", alias="challenger"), shadow=True)
+    runner = ShadowRunner(sample_rate=1.0)
+    history = MagicMock(add=AsyncMock())
+
+    with patch("app.services.model_service.history_service", history), \
+            patch("app.services.shadow.get_shadow_history_service", return_value=history), \
+            patch("app.services.model_service.get_shadow_runner", return_value=runner):
+        result = await model_registry.predict([{"Pclass": 1}, {"Pclass": 3}])
+        await asyncio.wait(runner._tasks)
+
+    # A resposta é sempre a do modelo padrão
+    assert result == [1, 1]
+    primary, shadow = [call.kwargs for call in history.add.await_args_list]
+    assert primary["model_version"] == "1"
+    assert primary["latency_ms"] > 0
+    assert shadow["model_version"] == "2"
+    assert shadow["output_payload"] == [0, 0]
+    assert shadow["input_payload"] == [{"Pclass": 1}, {"Pclass": 3}]
+    assert shadow["shadow_of"]["model_version"] == "1"
+    assert shadow["shadow_of"]["output_payload"] == [1, 1]
+    assert runner.inflight == 0
+
+
+@pytest.mark.asyncio
+async def test_failing_shadow_does_not_affect_primary(model_registry):
+    def fail(df):
+        raise ValueError("challenger quebrado")
+
+    model_registry.register(make_loaded(version="1"))
+    model_registry.register(make_loaded(predict=fail, version="2", alias="challenger"), shadow=True)
+    runner = ShadowRunner(sample_rate=1.0)
+    history = MagicMock(add=AsyncMock())
+
+    with patch("app.services.model_service.history_service", history), \
+            patch("app.services.shadow.get_shadow_history_service", return_value=history), \
+            patch("app.services.model_service.get_shadow_runner", return_value=runner):
+        assert await model_registry.predict([{"Pclass": 1}]) == [1]
+        await asyncio.wait(runner._tasks)
+
+    # Só o registro do modelo principal vai para o histórico
+    assert history.add.await_count == 1
+    assert runner.inflight == 0
+
+
+@pytest.mark.asyncio
+async def test_slow_shadow_times_out_and_drops_while_busy():
+    release = threading.Event()
+    primary = make_loaded(version="1")
+    shadow = make_loaded(predict=lambda df: release.wait(5) and [0] * len(df), version="2", alias="challenger")
+    runner = ShadowRunner(sample_rate=1.0, max_concurrency=1, timeout=0.05)
+    history = MagicMock(add=AsyncMock())
+
+    with patch("app.services.shadow.get_shadow_history_service", return_value=history):
+        assert runner.submit(primary, shadow, [{"Pclass": 1}], MagicMock(__len__=lambda self: 1), [1], 0.01)
+        # Sem vaga livre: descarta em vez de enfileirar
+        assert not runner.submit(primary, shadow, [{"Pclass": 1}], MagicMock(), [1], 0.01)
+
+        await asyncio.sleep(0.1)
+        # Depois do timeout, a vaga continua ocupada até a thread terminar
+        assert runner.inflight == 1
+        release.set()
+        await asyncio.wait(runner._tasks)
+
+    assert runner.inflight == 0
+    history.add.assert_not_awaited()
+
+
+def test_submit_outside_event_loop_is_refused():
+    runner = ShadowRunner(sample_rate=1.0)
+    with pytest.raises(RuntimeError):
+        runner.submit(make_loaded(), make_loaded(version="2"), [], MagicMock(), [], 0.0)
+    assert runner.inflight == 0
+
+
+@pytest.mark.asyncio
+async def test_shadow_records_stay_out_of_rollups_and_history():
+    from app.services.history_service import HistoryService
+
+    rollups = MagicMock()
+    service = HistoryService(collection=MagicMock(insert_one=AsyncMock()), rollups=rollups)
+    await service.add([{"x": 1}], [1], "titanic", "2", shadow_of={"model_version": "1"})
+    rollups.record.assert_not_called()
+    await service.add([{"x": 1}], [1], "titanic", "1")
+    rollups.record.assert_called_once()
+
+    # O runner grava na collection de sombra, não no histórico servido
+    from app.services import history_service as module
+    assert module.get_shadow_history_service().collection is not module.get_history_service().collection
+    assert module.get_shadow_history_service().rollups is None
+    assert module.get_shadow_history_service().buffer is None
+    # Mesmo armazenamento do histórico principal
+    for option in ("storage_format", "compression", "ttl_seconds", "timeseries", "meta_prefix"):
+        assert getattr(module.get_shadow_history_service(), option) == getattr(module.get_history_service(), option)
+
+
+@pytest.mark.asyncio
+async def test_sample_rate_zero_never_submits():
+    runner = ShadowRunner(sample_rate=0.0)
+    assert not runner.submit(make_loaded(), make_loaded(version="2"), [], MagicMock(), [], 0.0)
+
+
+def test_register_shadow_keeps_default_predictions_cached(model_registry):
+    cache = PredictionCache(max_entries=10, ttl_seconds=60)
+    champion = make_loaded(version="1")
+    key = PredictionCache.key(champion.model_name, champion.model_version, champion.model_uri, {"Pclass": 1})
+
+    with patch("app.services.model_service.get_prediction_cache", return_value=cache):
+        model_registry.register(champion)
+        cache.put_many([key], [1])
+        model_registry.register(make_loaded(version="2", alias="challenger"), shadow=True)
+        assert cache.get_many([key]) == [1]
+
+        # Recarregar a mesma versão descarta as predições dela
+        model_registry.register(make_loaded(version="1"))
+        assert cache.get_many([key]) == [MISS]
+
+
+def test_register_shadow_keeps_default(model_registry):
+    champion, challenger = make_loaded(version="1"), make_loaded(version="2", alias="challenger")
+    model_registry.register(champion)
+    model_registry.register(challenger, shadow=True)
+
+    assert model_registry.resolve() is champion
+    assert model_registry.shadow_model() is challenger
+    assert {m["model_version"]: m["shadow"] for m in model_registry.list_models()} == {"1": False, "2": True}
+
+    # Promover o challenger a padrão desliga a sombra
+    model_registry.register(challenger)
+    assert model_registry.resolve() is challenger
+    assert model_registry.shadow_model() is None
@@ -0,0 +1,58 @@
+import pytest
+from unittest.mock import MagicMock, AsyncMock, patch
+
+from app.services.load_jobs import LoadJob, JOB_SUCCEEDED, JOB_FAILED
+from app.services.startup import PreloadState, preload_champion_model, PRELOAD_READY, PRELOAD_DISABLED
+
+
+def make_manager(*statuses):
+    jobs = [LoadJob(model_name="titanic", alias="champion", status=s, error="erro" if s == JOB_FAILED else None)
+            for s in statuses]
+    manager = MagicMock()
+    manager.submit.side_effect = jobs
+    manager.wait = AsyncMock(side_effect=lambda job: job)
+    return manager
+
+
+@pytest.mark.asyncio
+@patch("app.services.startup.settings.MLFLOW_MODEL_NAME", "titanic")
+@patch("app.services.startup.settings.MLFLOW_MODEL_ALIAS", "champion")
+@patch("app.services.startup.get_model_registry")
+async def test_preload_loads_configured_model(mock_registry):
+    mock_registry.return_value.is_model_loaded.return_value = False
+    manager = make_manager(JOB_SUCCEEDED)
+    state = PreloadState()
+
+    await preload_champion_model(load_jobs=manager, state=state)
+
+    manager.submit.assert_called_once_with(model_name="titanic", alias="champion")
+    assert state.status == PRELOAD_READY
+    assert state.attempts == 1
+
+
+@pytest.mark.asyncio
+@patch("app.services.startup.settings.MLFLOW_MODEL_NAME", "titanic")
+@patch("app.services.startup.asyncio.sleep", new_callable=AsyncMock)
+@patch("app.services.startup.get_model_registry")
+async def test_preload_retries_with_backoff(mock_registry, mock_sleep):
+    mock_registry.return_value.is_model_loaded.return_value = False
+    manager = make_manager(JOB_FAILED, JOB_FAILED, JOB_SUCCEEDED)
+    state = PreloadState()
+
+    await preload_champion_model(load_jobs=manager, state=state, max_backoff=1.5)
+
+    assert state.status == PRELOAD_READY
+    assert state.attempts == 3
+    assert [call.args[0] for call in mock_sleep.await_args_list] == [1.0, 1.5]
+
+
+@pytest.mark.asyncio
+@patch("app.services.startup.settings.MLFLOW_MODEL_NAME", "")
+async def test_preload_disabled_without_model_name():
+    manager = make_manager()
+    state = PreloadState()
+
+    await preload_champion_model(load_jobs=manager, state=state)
+
+    manager.submit.assert_not_called()
+    assert state.status == PRELOAD_DISABLED
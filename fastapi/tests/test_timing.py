@@ -0,0 +1,48 @@
+from fastapi import FastAPI
+from httpx import AsyncClient
+from httpx._transports.asgi import ASGITransport
+
+from app.core.middleware import ServerTimingMiddleware
+from app.utils.timing import record_stage, server_timing_header, stage_timer
+
+
+def test_stage_timer_accumulates_and_nests():
+    with stage_timer() as timer:
+        with timer.stage("validate"):
+            pass
+        record_stage("queue", 0.5)
+        record_stage("queue", 0.25)
+
+    assert timer.get("queue") == 0.75
+    assert "validate" in timer.stages
+    # Fora do cronômetro, o registro é ignorado
+    record_stage("queue", 1.0)
+    assert timer.get("queue") == 0.75
+
+
+def test_server_timing_header_format():
+    assert server_timing_header({"model": 0.0123, "history": 0.001}) == "model;dur=12.30, history;dur=1.00"
+
+
+async def test_middleware_adds_server_timing_header():
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+
+    @app.get("/com-etapas")
+    async def with_stages():
+        # Duas predições na mesma requisição (ex.: streaming) somam seus tempos
+        for _ in range(2):
+            with stage_timer() as timer:
+                timer.add("model", 0.01)
+        return {"ok": True}
+
+    @app.get("/sem-etapas")
+    async def without_stages():
+        return {"ok": True}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        timed = await ac.get("/com-etapas")
+        untimed = await ac.get("/sem-etapas")
+
+    assert timed.headers["server-timing"] == "model;dur=20.00"
+    assert "server-timing" not in untimed.headers